@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Sequence
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.db.migrations import current_version
+from app.db.repositories import Repository
+from app.db.session import get_engine, init_db, reset_engine, session_scope
+from app.services.archival import archive_old_posts, compress_archive, train_compression_dictionary
+from app.services.audit import drop_expired_audit_partitions, move_legacy_audit_logs
+from app.utils.logging import setup_logging
+
+
+async def migrate() -> tuple[list[int], int | None]:
+    try:
+        applied = await init_db(allow_offline=True)
+        return applied, await current_version(get_engine())
+    finally:
+        await reset_engine()
+
+
+async def reconcile_stats() -> dict[str, int]:
+    await init_db()
+    try:
+        async with session_scope() as session:
+            repo = Repository(session)
+            counted = await repo.reconcile_stats()
+            return {**counted, "boards_with_posts": await repo.reconcile_board_counters()}
+    finally:
+        await reset_engine()
+
+
+async def archive_posts() -> int:
+    await init_db()
+    try:
+        return await archive_old_posts(get_settings())
+    finally:
+        await reset_engine()
+
+
+async def train_dictionary(sample_size: int) -> int | None:
+    await init_db()
+    try:
+        dictionary = await train_compression_dictionary(sample_size)
+        return dictionary.id if dictionary is not None else None
+    finally:
+        await reset_engine()
+
+
+async def compress_posts_archive(batch_size: int, vacuum: bool) -> int:
+    await init_db()
+    try:
+        rewritten = await compress_archive(batch_size)
+        engine = get_engine()
+        if vacuum and engine.dialect.name == "sqlite":
+            # SQLite only returns freed pages to the file system on VACUUM.
+            async with engine.connect() as connection:
+                await connection.execution_options(isolation_level="AUTOCOMMIT")
+                await connection.execute(text("VACUUM"))
+        return rewritten
+    finally:
+        await reset_engine()
+
+
+async def archive_report() -> dict[str, int]:
+    await init_db()
+    try:
+        async with session_scope() as session:
+            return await Repository(session).archive_size_report()
+    finally:
+        await reset_engine()
+
+
+async def partition_audit(batch_size: int) -> int:
+    await init_db()
+    try:
+        return await move_legacy_audit_logs(batch_size)
+    finally:
+        await reset_engine()
+
+
+async def prune_audit() -> list[str]:
+    await init_db()
+    try:
+        return await drop_expired_audit_partitions(get_settings())
+    finally:
+        await reset_engine()
+
+
+def _print_counters(counters: dict[str, int]) -> None:
+    for name, value in counters.items():
+        print(f"{name}: {value}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="board-anon-bot-admin", description="Maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="apply pending schema migrations, including the ones that need the bot stopped")
+    commands.add_parser("reconcile-stats", help="recount the stat and board post counters from the tables")
+    commands.add_parser("archive-posts", help="move old archived posts to posts_archive now")
+    train = commands.add_parser("train-dictionary", help="train a compression dictionary on recent posts")
+    train.add_argument("--samples", type=int, default=5000, help="number of newest posts to learn from")
+    compress = commands.add_parser("compress-archive", help="compress posts_archive with the newest dictionary")
+    compress.add_argument("--batch-size", type=int, default=500)
+    compress.add_argument("--vacuum", action="store_true", help="shrink the SQLite file afterwards")
+    commands.add_parser("archive-report", help="show posts_archive size before and after compression")
+    partition = commands.add_parser("partition-audit", help="move rows of the old audit_logs table into monthly partitions")
+    partition.add_argument("--batch-size", type=int, default=1000)
+    commands.add_parser("prune-audit", help="drop audit partitions older than AUDIT_RETENTION_MONTHS now")
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    setup_logging(get_settings().log_level)
+
+    if args.command == "migrate":
+        applied, version = asyncio.run(migrate())
+        print(f"applied: {', '.join(map(str, applied)) or 'nothing'}")
+        print(f"schema version: {version}")
+    elif args.command == "reconcile-stats":
+        _print_counters(asyncio.run(reconcile_stats()))
+    elif args.command == "archive-posts":
+        print(f"moved: {asyncio.run(archive_posts())}")
+    elif args.command == "train-dictionary":
+        dictionary_id = asyncio.run(train_dictionary(args.samples))
+        print(f"dictionary: {dictionary_id}" if dictionary_id is not None else "dictionary: not enough posts")
+    elif args.command == "compress-archive":
+        print(f"rewritten: {asyncio.run(compress_posts_archive(args.batch_size, args.vacuum))}")
+    elif args.command == "archive-report":
+        _print_counters(asyncio.run(archive_report()))
+    elif args.command == "partition-audit":
+        print(f"moved: {asyncio.run(partition_audit(args.batch_size))}")
+    elif args.command == "prune-audit":
+        for name in asyncio.run(prune_audit()):
+            print(f"dropped: {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from typing import Annotated
 from functools import lru_cache
+from typing import Annotated
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
@@ -10,10 +10,53 @@ from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 class Settings(BaseSettings):
     bot_token: str = Field(default="", alias="BOT_TOKEN")
     database_url: str = Field(default="sqlite:///database.db", alias="DATABASE_URL")
+    sqlite_single_writer: bool = Field(default=True, alias="SQLITE_SINGLE_WRITER")
+    sqlite_read_pool_size: int = Field(default=4, alias="SQLITE_READ_POOL_SIZE")
+    sqlite_write_timeout: float = Field(default=30.0, alias="SQLITE_WRITE_TIMEOUT")
     superadmin_ids: Annotated[list[int], NoDecode] = Field(default_factory=list, alias="SUPERADMIN_IDS")
+    user_sync_cache_size: int = Field(default=10_000, alias="USER_SYNC_CACHE_SIZE")
+    role_cache_size: int = Field(default=10_000, alias="ROLE_CACHE_SIZE")
+    role_cache_ttl_seconds: float = Field(default=300.0, alias="ROLE_CACHE_TTL_SECONDS")
+    audit_batch_size: int = Field(default=100, alias="AUDIT_BATCH_SIZE")
+    audit_flush_interval_seconds: float = Field(default=2.0, alias="AUDIT_FLUSH_INTERVAL_SECONDS")
+    audit_journal_path: str = Field(default="audit.journal", alias="AUDIT_JOURNAL_PATH")
+    audit_retention_months: int = Field(default=12, alias="AUDIT_RETENTION_MONTHS")
+    audit_retention_interval_seconds: float = Field(default=86400.0, alias="AUDIT_RETENTION_INTERVAL_SECONDS")
+    board_catalog_ttl_seconds: float = Field(default=60.0, alias="BOARD_CATALOG_TTL_SECONDS")
+    board_stats_ttl_seconds: float = Field(default=30.0, alias="BOARD_STATS_TTL_SECONDS")
+    post_archive_after_days: int = Field(default=30, alias="POST_ARCHIVE_AFTER_DAYS")
+    post_archive_batch_size: int = Field(default=500, alias="POST_ARCHIVE_BATCH_SIZE")
+    post_archive_interval_seconds: float = Field(default=3600.0, alias="POST_ARCHIVE_INTERVAL_SECONDS")
+    rate_limit_cache_size: int = Field(default=100_000, alias="RATE_LIMIT_CACHE_SIZE")
     default_rate_limit_seconds: int = Field(default=120, alias="DEFAULT_RATE_LIMIT_SECONDS")
     default_max_text_length: int = Field(default=300, alias="DEFAULT_MAX_TEXT_LENGTH")
+    board_import_max_bytes: int = Field(default=1_048_576, alias="BOARD_IMPORT_MAX_BYTES")
+    outbound_global_per_second: float = Field(default=30.0, alias="OUTBOUND_GLOBAL_PER_SECOND")
+    outbound_channel_per_minute: float = Field(default=20.0, alias="OUTBOUND_CHANNEL_PER_MINUTE")
+    outbound_private_per_second: float = Field(default=1.0, alias="OUTBOUND_PRIVATE_PER_SECOND")
+    outbound_max_retries: int = Field(default=3, alias="OUTBOUND_MAX_RETRIES")
+    outbound_max_retry_after: float = Field(default=30.0, alias="OUTBOUND_MAX_RETRY_AFTER")
+    outbox_batch_size: int = Field(default=50, alias="OUTBOX_BATCH_SIZE")
+    outbox_delete_batch_size: int = Field(default=500, alias="OUTBOX_DELETE_BATCH_SIZE")
+    outbox_max_attempts: int = Field(default=8, alias="OUTBOX_MAX_ATTEMPTS")
+    outbox_retry_base_seconds: float = Field(default=2.0, alias="OUTBOX_RETRY_BASE_SECONDS")
+    outbox_retry_max_seconds: float = Field(default=300.0, alias="OUTBOX_RETRY_MAX_SECONDS")
+    outbox_poll_interval_seconds: float = Field(default=5.0, alias="OUTBOX_POLL_INTERVAL_SECONDS")
+    outbox_lease_seconds: float = Field(default=300.0, alias="OUTBOX_LEASE_SECONDS")
+    publish_lock_backend: str = Field(default="local", alias="PUBLISH_LOCK_BACKEND")
+    publish_lock_dir: str = Field(default="locks", alias="PUBLISH_LOCK_DIR")
+    publish_lock_timeout_seconds: float = Field(default=30.0, alias="PUBLISH_LOCK_TIMEOUT_SECONDS")
+    publish_lock_pool_size: int = Field(default=10, alias="PUBLISH_LOCK_POOL_SIZE")
+    update_mode: str = Field(default="polling", alias="UPDATE_MODE")
+    drop_pending_updates: bool = Field(default=False, alias="DROP_PENDING_UPDATES")
     polling_timeout: int = Field(default=10, alias="POLLING_TIMEOUT")
+    webhook_url: str = Field(default="", alias="WEBHOOK_URL")
+    webhook_path: str = Field(default="/webhook", alias="WEBHOOK_PATH")
+    webhook_secret: str = Field(default="", alias="WEBHOOK_SECRET")
+    webhook_host: str = Field(default="0.0.0.0", alias="WEBHOOK_HOST")
+    webhook_port: int = Field(default=8080, alias="WEBHOOK_PORT")
+    webhook_workers: int = Field(default=8, alias="WEBHOOK_WORKERS")
+    webhook_queue_size: int = Field(default=1000, alias="WEBHOOK_QUEUE_SIZE")
     default_locale: str = Field(default="ru", alias="DEFAULT_LOCALE")
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
 
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime
+
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table
+
+from app.db.types import UTCDateTime
+
+# Audit rows live in one table per calendar month (audit_logs_YYYYMM) so that
+# retention drops whole tables instead of deleting rows. The partitions carry
+# no foreign keys: dropping one must never depend on other tables.
+PARTITION_PREFIX = "audit_logs_"
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}\d{{6}}$")
+_metadata = MetaData()
+
+
+def partition_name(moment: datetime) -> str:
+    return f"{PARTITION_PREFIX}{moment:%Y%m}"
+
+
+def is_partition_name(name: str) -> bool:
+    return _PARTITION_NAME.match(name) is not None
+
+
+def months_before(moment: datetime, months: int) -> datetime:
+    """First instant of the month ``months`` calendar months before ``moment``."""
+    index = moment.year * 12 + moment.month - 1 - months
+    return moment.replace(year=index // 12, month=index % 12 + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def audit_partition(name: str) -> Table:
+    table = _metadata.tables.get(name)
+    if table is None:
+        table = Table(
+            name,
+            _metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("actor_user_id", Integer, nullable=False),
+            Column("action", String(64), nullable=False),
+            Column("target_type", String(64), nullable=False),
+            Column("target_id", String(128)),
+            Column("board_id", Integer),
+            Column("metadata_json", String),
+            Column("created_at", UTCDateTime(), nullable=False),
+            Index(f"ix_{name}_board_created", "board_id", "created_at", "id"),
+            Index(f"ix_{name}_created", "created_at", "id"),
+        )
+    return table
@@ -0,0 +1,14 @@
+"""Ordered schema migrations recorded in the ``schema_version`` table.
+
+Add a migration as ``vNNNN_<name>.py`` with an ``async def upgrade(engine)``
+and append it to ``MIGRATIONS`` in ``runner.py``. Each upgrade opens its own
+transactions, so large data changes can commit in chunks (see
+``online.rebuild_table``). An upgrade that must lock a table for its whole
+run lists its dialects in ``offline_dialects``: the bot then refuses to start
+until ``board-anon-bot-admin migrate`` has applied it. Upgrades must be safe
+to rerun: the version is recorded only after ``upgrade`` returns.
+"""
+
+from app.db.migrations.runner import HEAD, MIGRATIONS, Migration, current_version, migrate
+
+__all__ = ["HEAD", "MIGRATIONS", "Migration", "current_version", "migrate"]
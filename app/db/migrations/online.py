@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+_TRIGGERS = ("insert", "update", "delete")
+
+
+async def rebuild_table(engine: AsyncEngine, target: Table, *, key: str = "id", batch_size: int = 5000) -> int:
+    """Rebuild the table named like ``target`` into the shape of ``target`` while it stays in use.
+
+    SQLite can only change most column definitions by copying the table. The
+    copy goes into a shadow table in ``batch_size`` chunks, each its own short
+    transaction, while triggers mirror concurrent writes into the shadow. The
+    only long step under one lock is the final swap and index build. Columns of
+    ``target`` missing from the old table must be nullable or have a server
+    default. Safe to rerun after a crash: the copy skips rows already present.
+    ``engine`` must emit its own BEGIN on SQLite (see ``install_sqlite_transactions``),
+    or the swap's DDL commits statement by statement and loses concurrent writes.
+
+    PostgreSQL changes column definitions in place, so its migrations use
+    ``ALTER TABLE`` instead. Returns the number of copied rows.
+    """
+    name = target.name
+    shadow = f"{name}__rebuild"
+    # Read apart from the writes below: a transaction that reads first cannot
+    # take the write lock while a concurrent writer waits to commit.
+    async with engine.connect() as connection:
+        existing = {column["name"] for column in await connection.run_sync(lambda sync: inspect(sync).get_columns(name))}
+    columns = [column.name for column in target.columns if column.name in existing]
+    column_list = ", ".join(columns)
+    async with engine.begin() as connection:
+        ddl = str(CreateTable(target).compile(dialect=connection.dialect))
+        await connection.execute(text(ddl.replace(f"CREATE TABLE {name} ", f"CREATE TABLE IF NOT EXISTS {shadow} ", 1)))
+        mirror = f"INSERT OR REPLACE INTO {shadow} ({column_list}) VALUES ({', '.join(f'NEW.{c}' for c in columns)})"
+        bodies = {
+            "insert": mirror,
+            "update": mirror,
+            "delete": f"DELETE FROM {shadow} WHERE {key} = OLD.{key}",
+        }
+        for event, body in bodies.items():
+            await connection.execute(
+                text(f"CREATE TRIGGER IF NOT EXISTS {shadow}_{event} AFTER {event.upper()} ON {name} BEGIN {body}; END")
+            )
+
+    copied = 0
+    after = None
+    while True:
+        async with engine.begin() as connection:
+            bound = f"WHERE {key} > :after" if after is not None else ""
+            chunk_end = f"(SELECT max({key}) FROM (SELECT {key} FROM {name} {bound} ORDER BY {key} LIMIT :limit))"
+            chunk = f"{key} > :after AND {key} <= {chunk_end}" if after is not None else f"{key} <= {chunk_end}"
+            # Copy first and read the chunk end after, for the same reason.
+            result = await connection.execute(
+                text(f"INSERT OR IGNORE INTO {shadow} ({column_list}) SELECT {column_list} FROM {name} WHERE {chunk}"),
+                {"after": after, "limit": batch_size},
+            )
+            copied += result.rowcount or 0
+            last = (await connection.execute(text(f"SELECT {chunk_end}"), {"after": after, "limit": batch_size})).scalar()
+        if last is None:
+            break
+        after = last
+        # Let the bot's own transactions in between chunks.
+        await asyncio.sleep(0)
+
+    async with engine.begin() as connection:
+        for event in _TRIGGERS:
+            await connection.execute(text(f"DROP TRIGGER IF EXISTS {shadow}_{event}"))
+        await connection.execute(text(f"DROP TABLE {name}"))
+        await connection.execute(text(f"ALTER TABLE {shadow} RENAME TO {name}"))
+        for index in target.indexes:
+            await connection.execute(CreateIndex(index))
+    return copied
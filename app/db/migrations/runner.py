@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from sqlalchemy import func, insert, inspect, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from app.db.migrations import (
+    v0001_baseline,
+    v0002_reviewed_indexes,
+    v0003_outbox,
+    v0004_stat_counters,
+    v0005_timestamptz,
+    v0006_board_post_counters,
+    v0007_board_state_backfill,
+)
+from app.db.models import STAT_COUNTERS, SchemaVersion, StatCounter
+from app.utils.time import utc_now
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[AsyncEngine], Awaitable[None]]
+    # Dialects on which the upgrade locks a table for its whole run; it is only
+    # applied by an explicit ``board-anon-bot-admin migrate``, never at startup.
+    offline_dialects: tuple[str, ...] = ()
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "baseline", v0001_baseline.upgrade),
+    Migration(2, "reviewed_indexes", v0002_reviewed_indexes.upgrade),
+    Migration(3, "outbox", v0003_outbox.upgrade),
+    Migration(4, "stat_counters", v0004_stat_counters.upgrade),
+    Migration(5, "timestamptz", v0005_timestamptz.upgrade, offline_dialects=("postgresql",)),
+    Migration(6, "board_post_counters", v0006_board_post_counters.upgrade),
+    Migration(7, "board_state_backfill", v0007_board_state_backfill.upgrade),
+)
+HEAD = MIGRATIONS[-1].version
+
+
+async def current_version(engine: AsyncEngine) -> int | None:
+    """The applied schema version, or None when ``schema_version`` does not exist yet."""
+    try:
+        async with engine.connect() as connection:
+            return (await connection.execute(select(func.coalesce(func.max(SchemaVersion.version), 0)))).scalar_one()
+    except DBAPIError:
+        return None
+
+
+async def _has_tables(engine: AsyncEngine) -> bool:
+    async with engine.connect() as connection:
+        return bool(await connection.run_sync(lambda sync: inspect(sync).get_table_names()))
+
+
+async def _record(engine: AsyncEngine, migrations: tuple[Migration, ...]) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(
+            insert(SchemaVersion),
+            [{"version": item.version, "name": item.name, "applied_at": utc_now()} for item in migrations],
+        )
+
+
+async def migrate(engine: AsyncEngine, *, allow_offline: bool = False) -> list[int]:
+    """Apply pending migrations in order; returns the versions applied by this call.
+
+    An up to date database costs one ``SELECT max(version)`` and no reflection.
+    An empty database gets the current models and is stamped with ``HEAD``
+    directly. A database from before versioning starts at version 0. Unless
+    ``allow_offline`` is set, a pending migration that is offline on this
+    dialect raises RuntimeError before anything is applied.
+    """
+    version = await current_version(engine)
+    if version == HEAD:
+        return []
+
+    if version is None:
+        if not await _has_tables(engine):
+            async with engine.begin() as connection:
+                await connection.run_sync(SQLModel.metadata.create_all)
+                # An empty database counts zero of everything.
+                await connection.execute(insert(StatCounter), [{"name": name, "value": 0} for name in STAT_COUNTERS])
+            await _record(engine, MIGRATIONS)
+            return []
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.tables[SchemaVersion.__tablename__].create)
+        version = 0
+
+    pending = [migration for migration in MIGRATIONS if migration.version > version]
+    offline = [migration for migration in pending if engine.dialect.name in migration.offline_dialects]
+    if offline and not allow_offline:
+        names = ", ".join(f"{migration.version} ({migration.name})" for migration in offline)
+        raise RuntimeError(
+            f"Schema migrations {names} lock tables while they run; "
+            "stop the bot and apply them with `board-anon-bot-admin migrate`"
+        )
+
+    applied: list[int] = []
+    for migration in pending:
+        logger.info("Applying schema migration", extra={"version": migration.version, "migration": migration.name})
+        await migration.upgrade(engine)
+        await _record(engine, (migration,))
+        applied.append(migration.version)
+    return applied
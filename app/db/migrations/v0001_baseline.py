@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+
+async def upgrade(engine: AsyncEngine) -> None:
+    """Databases from before versioning: add every table they are missing.
+
+    Earlier releases created tables on each start, so an unversioned database
+    may lack any table added since it was first deployed.
+    """
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
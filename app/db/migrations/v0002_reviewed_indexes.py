@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Dialect
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import SQLModel
+
+# Each was a prefix of a wider index on the same table, or an index on a
+# boolean that the planner never used.
+SUPERSEDED_INDEXES = (
+    "ix_posts_user_board_active",
+    "ix_posts_user_id",
+    "ix_posts_is_archived",
+    "ix_admin_roles_user_id",
+    "ix_board_memberships_user_id",
+)
+# Indexes left behind invalid by an interrupted concurrent build.
+_INVALID_INDEXES = text(
+    "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+)
+
+
+def concurrent_index_statements(dialect: Dialect) -> list[str]:
+    """The PostgreSQL statements of ``upgrade``, which build and drop indexes without blocking writes."""
+    statements = []
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+            statements.append(ddl.replace(" INDEX IF NOT EXISTS ", " INDEX CONCURRENTLY IF NOT EXISTS ", 1))
+    statements.extend(f"DROP INDEX CONCURRENTLY IF EXISTS {name}" for name in SUPERSEDED_INDEXES)
+    return statements
+
+
+def _sync_indexes(connection: Connection) -> None:
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    for name in SUPERSEDED_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def _sync_indexes_concurrently(connection: Connection) -> None:
+    ours = {index.name for table in SQLModel.metadata.sorted_tables for index in table.indexes}
+    # IF NOT EXISTS would keep an invalid leftover of an earlier run.
+    for name in connection.execute(_INVALID_INDEXES).scalars():
+        if name in ours:
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    for statement in concurrent_index_statements(connection.dialect):
+        connection.execute(text(statement))
+
+
+async def upgrade(engine: AsyncEngine) -> None:
+    """Create the composite and partial indexes of the models and drop the ones they replace.
+
+    PostgreSQL builds them ``CONCURRENTLY``, which cannot run in a transaction,
+    so writes to ``posts`` go on meanwhile. SQLite has no such build and blocks
+    writers for the few seconds each index takes.
+    """
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            await connection.run_sync(_sync_indexes_concurrently)
+        return
+    async with engine.begin() as connection:
+        await connection.run_sync(_sync_indexes)
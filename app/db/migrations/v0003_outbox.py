@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from app.db.models import OutboxMessage
+
+
+async def upgrade(engine: AsyncEngine) -> None:
+    """Create the ``outbox`` table of pending channel requests."""
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.tables[OutboxMessage.__tablename__].create, checkfirst=True)
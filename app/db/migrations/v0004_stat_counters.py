@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.repositories import Repository
+
+
+async def upgrade(engine: AsyncEngine) -> None:
+    """Seed ``stat_counters`` with counted values so writes only ever bump existing rows.
+
+    Counters used to be filled lazily by the first ``/stats``, which runs on a
+    read-only session and could not write them.
+    """
+    async with AsyncSession(engine) as session:
+        await Repository(session).reconcile_stats()
+        await session.commit()
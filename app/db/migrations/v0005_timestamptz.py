@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+
+from app.db.audit_partitions import audit_partition, is_partition_name
+from app.db.types import UTCDateTime
+
+
+def timestamptz_statements(table_names: Iterable[str]) -> list[str]:
+    """One ``ALTER TABLE`` per table of ``table_names`` turning its timestamps into ``timestamptz``.
+
+    All columns of a table change in one statement, so each table is rewritten
+    once. Stored values were written as UTC, so they are read back in UTC.
+    """
+    tables: list[Table] = []
+    for name in sorted(table_names):
+        if name in SQLModel.metadata.tables:
+            tables.append(SQLModel.metadata.tables[name])
+        elif is_partition_name(name):
+            tables.append(audit_partition(name))
+    statements = []
+    for table in tables:
+        changes = [
+            f"ALTER COLUMN {column.name} TYPE TIMESTAMP WITH TIME ZONE USING {column.name} AT TIME ZONE 'UTC'"
+            for column in table.columns
+            if isinstance(column.type, UTCDateTime)
+        ]
+        if changes:
+            statements.append(f"ALTER TABLE {table.name} {', '.join(changes)}")
+    return statements
+
+
+def _table_names(connection: Connection) -> list[str]:
+    return inspect(connection).get_table_names()
+
+
+async def upgrade(engine: AsyncEngine) -> None:
+    """Store every timestamp as ``timestamptz`` on PostgreSQL.
+
+    The models write aware UTC datetimes, which asyncpg refuses to bind to a
+    plain ``timestamp`` column. SQLite stores both kinds alike and is left as is.
+    Each table is rewritten under an exclusive lock, in its own transaction, so
+    the migration is offline on PostgreSQL and never runs at bot startup.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    async with engine.connect() as connection:
+        names = await connection.run_sync(_table_names)
+    for statement in timestamptz_statements(names):
+        async with engine.begin() as connection:
+            await connection.execute(text(statement))
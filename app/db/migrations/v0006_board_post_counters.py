@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import BoardPostCounter
+from app.db.repositories import Repository
+
+
+async def upgrade(engine: AsyncEngine) -> None:
+    """Create ``board_post_counters`` and seed it with counted per-board post totals."""
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.tables[BoardPostCounter.__tablename__].create, checkfirst=True)
+    async with AsyncSession(engine) as session:
+        await Repository(session).reconcile_board_counters()
+        await session.commit()
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.repositories import Repository
+
+
+async def upgrade(engine: AsyncEngine) -> None:
+    """Create the ``user_board_state`` rows missing for memberships of older releases.
+
+    Every membership write keeps its state row since, so this runs once here
+    instead of on every start.
+    """
+    async with AsyncSession(engine) as session:
+        await Repository(session).backfill_board_states()
+        await session.commit()
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
 
-from sqlalchemy import Column, Index, String, UniqueConstraint
-from sqlmodel import Field, SQLModel
+from sqlalchemy import Column, Index, LargeBinary, String, UniqueConstraint
+from sqlmodel import Field, SQLModel, col
 
+from app.db.types import UTCDateTime
 from app.utils.time import utc_now
 
 
@@ -13,24 +13,32 @@ class User(SQLModel, table=True):
     __tablename__ = "users"
 
     id: int = Field(primary_key=True)
-    username: Optional[str] = Field(default=None, max_length=64)
-    first_name: Optional[str] = Field(default=None, max_length=128)
-    last_name: Optional[str] = Field(default=None, max_length=128)
+    username: str | None = Field(default=None, max_length=64)
+    first_name: str | None = Field(default=None, max_length=128)
+    last_name: str | None = Field(default=None, max_length=128)
     is_globally_blocked: bool = Field(default=False)
-    created_at: datetime = Field(default_factory=utc_now, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
 
 
 class Board(SQLModel, table=True):
     __tablename__ = "boards"
 
-    id: Optional[int] = Field(default=None, primary_key=True)
+    id: int | None = Field(default=None, primary_key=True)
     slug: str = Field(sa_column=Column(String(64), nullable=False, unique=True, index=True))
     title: str = Field(sa_column=Column(String(128), nullable=False))
     channel_id: str = Field(sa_column=Column(String(64), nullable=False, index=True))
     is_active: bool = Field(default=True, index=True)
     rate_limit_seconds: int = Field(default=120, nullable=False)
     max_text_length: int = Field(default=300, nullable=False)
-    created_at: datetime = Field(default_factory=utc_now, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
+
+
+class BoardRatePolicy(SQLModel, table=True):
+    __tablename__ = "board_rate_policies"
+
+    board_id: int = Field(foreign_key="boards.id", primary_key=True)
+    burst: int = Field(default=1, nullable=False)
+    updated_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
 
 
 class UserBoardSelection(SQLModel, table=True):
@@ -38,53 +46,163 @@ class UserBoardSelection(SQLModel, table=True):
 
     user_id: int = Field(foreign_key="users.id", primary_key=True)
     board_id: int = Field(foreign_key="boards.id", nullable=False)
-    updated_at: datetime = Field(default_factory=utc_now, nullable=False)
+    updated_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
 
 
 class BoardMembership(SQLModel, table=True):
     __tablename__ = "board_memberships"
     __table_args__ = (UniqueConstraint("user_id", "board_id", name="uq_membership_user_board"),)
 
-    id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", nullable=False)
     board_id: int = Field(foreign_key="boards.id", nullable=False, index=True)
     is_blocked: bool = Field(default=False, nullable=False)
-    created_at: datetime = Field(default_factory=utc_now, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
+
+
+# Denormalized from board_memberships and posts so the publish checks are one
+# primary-key lookup; Repository keeps it in step with both tables.
+# ``last_posted_at`` bounds the rate limiter's bucket when it has none in memory.
+class UserBoardState(SQLModel, table=True):
+    __tablename__ = "user_board_state"
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    board_id: int = Field(foreign_key="boards.id", primary_key=True)
+    is_blocked: bool = Field(default=False, nullable=False)
+    active_post_id: int | None = Field(default=None)
+    active_message_id: int | None = Field(default=None)
+    last_posted_at: datetime | None = Field(default=None, sa_type=UTCDateTime())
+    updated_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
 
 
 class AdminRole(SQLModel, table=True):
     __tablename__ = "admin_roles"
-    __table_args__ = (UniqueConstraint("user_id", "board_id", "role", name="uq_admin_role_scope"),)
-
-    id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
-    board_id: Optional[int] = Field(default=None, foreign_key="boards.id")
+    __table_args__ = (
+        UniqueConstraint("user_id", "board_id", "role", name="uq_admin_role_scope"),
+        # Role checks filter on (user_id, role) and board admin joins add board_id.
+        Index("ix_admin_roles_user_role_board", "user_id", "role", "board_id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", nullable=False)
+    board_id: int | None = Field(default=None, foreign_key="boards.id")
     role: str = Field(sa_column=Column(String(32), nullable=False, index=True))
-    created_at: datetime = Field(default_factory=utc_now, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
 
 
 class Post(SQLModel, table=True):
     __tablename__ = "posts"
-    __table_args__ = (Index("ix_posts_user_board_active", "user_id", "board_id", "is_archived"),)
+    __table_args__ = (Index("ix_posts_user_board_posted", "user_id", "board_id", "posted_at"),)
 
-    id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", nullable=False)
     board_id: int = Field(foreign_key="boards.id", nullable=False, index=True)
     text: str = Field(sa_column=Column(String(4000), nullable=False))
-    posted_at: datetime = Field(default_factory=utc_now, nullable=False, index=True)
-    telegram_message_id: Optional[int] = Field(default=None, index=True)
-    is_archived: bool = Field(default=False, nullable=False, index=True)
-    archived_at: Optional[datetime] = Field(default=None)
+    posted_at: datetime = Field(default_factory=utc_now, nullable=False, index=True, sa_type=UTCDateTime())
+    telegram_message_id: int | None = Field(default=None, index=True)
+    is_archived: bool = Field(default=False, nullable=False)
+    archived_at: datetime | None = Field(default=None, sa_type=UTCDateTime())
+
+
+# The archival job's queue: only superseded posts, in id order. A plain index on
+# the boolean would hold every row and is left to table scans by the planner.
+Index(
+    "ix_posts_archived_queue",
+    Post.id,
+    sqlite_where=col(Post.is_archived).is_(True),
+    postgresql_where=col(Post.is_archived).is_(True),
+)
+
+
+class CompressionDictionary(SQLModel, table=True):
+    __tablename__ = "compression_dictionaries"
+
+    id: int | None = Field(default=None, primary_key=True)
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    sample_count: int = Field(default=0, nullable=False)
+    created_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
+
+
+class PostArchive(SQLModel, table=True):
+    # Cold copy of superseded posts moved out of ``posts`` by the archival job.
+    # The text is kept deflated in ``body``; ``text`` only holds rows written
+    # before compression and is emptied by ``compress-archive``.
+    __tablename__ = "posts_archive"
+
+    id: int = Field(primary_key=True)
+    user_id: int = Field(nullable=False)
+    board_id: int = Field(nullable=False, index=True)
+    text: str | None = Field(default=None, sa_column=Column(String(4000), nullable=True))
+    body: bytes | None = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
+    dictionary_id: int | None = Field(default=None, foreign_key="compression_dictionaries.id")
+    raw_size: int = Field(default=0, nullable=False)
+    posted_at: datetime = Field(nullable=False, sa_type=UTCDateTime())
+    telegram_message_id: int | None = Field(default=None)
+    archived_at: datetime | None = Field(default=None, sa_type=UTCDateTime())
+    moved_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
 
 
 class AuditLog(SQLModel, table=True):
     __tablename__ = "audit_logs"
 
-    id: Optional[int] = Field(default=None, primary_key=True)
+    id: int | None = Field(default=None, primary_key=True)
     actor_user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
     action: str = Field(sa_column=Column(String(64), nullable=False, index=True))
     target_type: str = Field(sa_column=Column(String(64), nullable=False))
-    target_id: Optional[str] = Field(default=None, max_length=128)
-    board_id: Optional[int] = Field(default=None, foreign_key="boards.id")
-    metadata_json: Optional[str] = Field(default=None)
-    created_at: datetime = Field(default_factory=utc_now, nullable=False, index=True)
+    target_id: str | None = Field(default=None, max_length=128)
+    board_id: int | None = Field(default=None, foreign_key="boards.id")
+    metadata_json: str | None = Field(default=None)
+    created_at: datetime = Field(default_factory=utc_now, nullable=False, index=True, sa_type=UTCDateTime())
+
+
+# Rows of ``stat_counters``; migrations seed them so every write only bumps.
+STAT_COUNTERS = ("users", "boards_total", "boards_active", "posts_total", "posts_active")
+
+
+class StatCounter(SQLModel, table=True):
+    __tablename__ = "stat_counters"
+
+    name: str = Field(sa_column=Column(String(32), primary_key=True))
+    value: int = Field(default=0, nullable=False)
+
+
+# Per-board post totals, bumped with ``posts_total`` and ``posts_active`` so
+# the board stats never count ``posts`` and ``posts_archive``.
+class BoardPostCounter(SQLModel, table=True):
+    __tablename__ = "board_post_counters"
+
+    board_id: int = Field(foreign_key="boards.id", primary_key=True)
+    posts: int = Field(default=0, nullable=False)
+    active_posts: int = Field(default=0, nullable=False)
+
+
+class OutboxMessage(SQLModel, table=True):
+    # Channel requests written in the transaction that needs them and sent by
+    # the outbox dispatcher: a publish of a post, or a delete of a message.
+    __tablename__ = "outbox"
+    __table_args__ = (Index("ix_outbox_status_due", "status", "next_attempt_at", "id"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    kind: str = Field(sa_column=Column(String(16), nullable=False))
+    status: str = Field(sa_column=Column(String(16), nullable=False))
+    chat_id: str = Field(sa_column=Column(String(64), nullable=False))
+    post_id: int | None = Field(default=None)
+    user_id: int | None = Field(default=None)
+    board_id: int | None = Field(default=None)
+    text: str | None = Field(default=None, sa_column=Column(String(4000), nullable=True))
+    message_id: int | None = Field(default=None)
+    replaces_message_id: int | None = Field(default=None)
+    attempts: int = Field(default=0, nullable=False)
+    last_error: str | None = Field(default=None, sa_column=Column(String(255), nullable=True))
+    next_attempt_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
+    created_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
+
+
+class SchemaVersion(SQLModel, table=True):
+    # One row per applied migration of app/db/migrations; the highest version
+    # is the schema the database is at.
+    __tablename__ = "schema_version"
+
+    version: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    name: str = Field(sa_column=Column(String(128), nullable=False))
+    applied_at: datetime = Field(default_factory=utc_now, nullable=False, sa_type=UTCDateTime())
@@ -1,50 +1,245 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Optional
+import logging
+from collections.abc import Iterable, Mapping, Sequence
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, TypeVar
+from weakref import WeakKeyDictionary
 
 from slugify import slugify
-from sqlmodel import Session, and_, col, desc, func, select
+from sqlalchemy import (
+    Table,
+    case,
+    delete,
+    event,
+    exists,
+    insert,
+    inspect,
+    literal,
+    or_,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.engine import Engine, ScalarResult
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlmodel import SQLModel, and_, col, desc, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.db.audit_partitions import audit_partition, is_partition_name, partition_name
 from app.db.models import (
+    STAT_COUNTERS,
     AdminRole,
     AuditLog,
     Board,
     BoardMembership,
+    BoardPostCounter,
+    BoardRatePolicy,
+    CompressionDictionary,
+    OutboxMessage,
     Post,
+    PostArchive,
+    StatCounter,
     User,
     UserBoardSelection,
+    UserBoardState,
 )
+from app.db.types import UTCDateTime
+from app.db.upsert import upsert
+from app.utils.compression import compress_text, decompress_text
 from app.utils.time import utc_now
 
+_Model = TypeVar("_Model", bound=SQLModel)
+logger = logging.getLogger(__name__)
+
 ROLE_SUPERADMIN = "superadmin"
 ROLE_BOARD_ADMIN = "board_admin"
+OUTBOX_PUBLISH = "publish"
+OUTBOX_DELETE = "delete"
+OUTBOX_PENDING = "pending"
+OUTBOX_SENDING = "sending"
+OUTBOX_FAILED = "failed"
+# Allocation rounds before a slug race with concurrent board creation gives up.
+_SLUG_ATTEMPTS = 5
+# Title bases per prefix query; SQLite caps the depth of an OR chain.
+_SLUG_QUERY_BASES = 200
+
+# Audit partitions already created per database, so only the first write of a
+# month pays for the CREATE TABLE check. A partition created in a transaction
+# waits in the session's ``info`` and is recorded only once that commits: a
+# rolled back CREATE TABLE must be run again.
+_created_audit_partitions: WeakKeyDictionary[Engine, set[str]] = WeakKeyDictionary()
+_PENDING_AUDIT_PARTITIONS = "pending_audit_partitions"
+
+
+@event.listens_for(Session, "after_commit")
+def _record_created_audit_partitions(session: Session) -> None:
+    pending = session.info.pop(_PENDING_AUDIT_PARTITIONS, None)
+    if pending:
+        _created_audit_partitions.setdefault(session.get_bind(), set()).update(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_created_audit_partitions(session: Session, _previous_transaction: SessionTransaction) -> None:
+    session.info.pop(_PENDING_AUDIT_PARTITIONS, None)
+
+
+@dataclass
+class PublishContext:
+    board_id: int
+    user: User | None
+    state: UserBoardState | None
+    is_board_admin: bool
+
+
+@dataclass(frozen=True)
+class BoardStats:
+    board_id: int
+    posts: int = 0
+    active_posts: int = 0
+    members: int = 0
+    blocked_members: int = 0
+    posts_24h: int = 0
+
+
+@dataclass(frozen=True)
+class NewBoard:
+    title: str
+    channel_id: str
+    rate_limit_seconds: int
+    max_text_length: int
+    # Kept as given, e.g. from an import; None picks a free one from the title.
+    slug: str | None = None
+
+
+class SlugTakenError(ValueError):
+    def __init__(self, slugs: Sequence[str]) -> None:
+        super().__init__(", ".join(slugs))
+        self.slugs = list(slugs)
+
+
+def _next_free_slugs(bases: Sequence[str], taken: AbstractSet[str]) -> list[str]:
+    """One slug per base: the base itself or ``base-N`` with the lowest free N >= 2."""
+    used = set(taken)
+    counters: dict[str, int] = {}
+    slugs: list[str] = []
+    for base in bases:
+        slug = base
+        counter = counters.get(base, 2)
+        while slug in used:
+            slug = f"{base}-{counter}"
+            counter += 1
+        counters[base] = counter
+        used.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+@dataclass(frozen=True)
+class AuditCursor:
+    """Keyset position in the audit log: entries strictly older than it come next."""
+
+    created_at: datetime
+    id: int
+
+    def encode(self) -> str:
+        return f"{self.created_at:%Y%m%d%H%M%S%f}:{self.id}"
+
+    @classmethod
+    def decode(cls, value: str) -> AuditCursor:
+        created_at, _, entry_id = value.partition(":")
+        return cls(created_at=datetime.strptime(created_at, "%Y%m%d%H%M%S%f"), id=int(entry_id))
+
+
+@dataclass(frozen=True)
+class AuditEntry:
+    id: int
+    actor_user_id: int
+    action: str
+    target_type: str
+    target_id: str | None
+    board_id: int | None
+    metadata_json: str | None
+    created_at: datetime
+
+    @property
+    def cursor(self) -> AuditCursor:
+        return AuditCursor(created_at=self.created_at, id=self.id)
 
 
 class Repository:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def sync_user(self, user_id: int, username: str | None, first_name: str | None, last_name: str | None) -> User:
-        user = self.session.get(User, user_id)
-        if user is None:
-            user = User(id=user_id, username=username, first_name=first_name, last_name=last_name)
-            self.session.add(user)
-            self.session.flush()
-            return user
-
-        if username is not None:
-            user.username = username
-        if first_name is not None:
-            user.first_name = first_name
-        if last_name is not None:
-            user.last_name = last_name
-        self.session.add(user)
-        self.session.flush()
+    async def sync_user(self, user_id: int, username: str | None, first_name: str | None, last_name: str | None) -> User:
+        user, _ = await self._save_user_profile(user_id, username, first_name, last_name)
         return user
 
-    def get_user(self, user_id: int) -> Optional[User]:
-        return self.session.get(User, user_id)
+    async def sync_user_profile(
+        self,
+        user_id: int,
+        username: str | None,
+        first_name: str | None,
+        last_name: str | None,
+    ) -> bool:
+        """Insert the user or update changed profile fields; return whether a row was written."""
+        _, written = await self._save_user_profile(user_id, username, first_name, last_name)
+        return written
+
+    async def _save_user_profile(
+        self,
+        user_id: int,
+        username: str | None,
+        first_name: str | None,
+        last_name: str | None,
+    ) -> tuple[User, bool]:
+        """Insert the user or update changed profile fields with one upsert."""
+        now = utc_now()
+        profile = {
+            field_name: value
+            for field_name, value in (("username", username), ("first_name", first_name), ("last_name", last_name))
+            if value is not None
+        }
+        loaded = self.session.identity_map.get(self.session.identity_key(User, user_id))
+        if isinstance(loaded, User) and all(getattr(loaded, name) == value for name, value in profile.items()):
+            # Already read in this transaction, e.g. by get_publish_context: no statement needed.
+            return loaded, False
+
+        statement = self._upsert(User).values(id=user_id, created_at=now, **profile)
+        if profile:
+            statement = statement.on_conflict_do_update(
+                index_elements=[col(User.id)],
+                set_={field_name: statement.excluded[field_name] for field_name in profile},
+                where=or_(
+                    *(col(getattr(User, field_name)).is_distinct_from(statement.excluded[field_name]) for field_name in profile)
+                ),
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=[col(User.id)])
+
+        user = (await self._upsert_returning(statement, User)).first()
+        if user is None:
+            # The stored profile already matches, so the upsert wrote nothing.
+            return (await self.session.exec(select(User).where(col(User.id) == user_id))).one(), False
+        # RETURNING looks the same for inserts and updates; only a new row carries our created_at.
+        if user.created_at.replace(tzinfo=None) == now.replace(tzinfo=None):
+            await self._bump_counters(users=1)
+        return user, True
+
+    def _upsert(self, model: Any) -> Any:
+        return upsert(self.session.get_bind().dialect, model)
+
+    async def _upsert_returning(self, statement: Any, model: type[_Model]) -> ScalarResult[_Model]:
+        """Run an upsert and return the written rows as session objects."""
+        result = await self.session.exec(statement.returning(model).execution_options(populate_existing=True))
+        return result.scalars()
+
+    async def get_user(self, user_id: int) -> User | None:
+        return await self.session.get(User, user_id)
 
     @staticmethod
     def _require_board_id(board_id: int | None) -> int:
@@ -52,104 +247,279 @@ class Repository:
             raise ValueError("board_id must not be None")
         return board_id
 
-    def list_boards(self, include_archived: bool = True) -> list[Board]:
+    async def list_boards(self, include_archived: bool = True) -> list[Board]:
         statement = select(Board)
         if not include_archived:
             statement = statement.where(col(Board.is_active).is_(True))
         statement = statement.order_by(col(Board.title))
-        return list(self.session.exec(statement).all())
+        return list((await self.session.exec(statement)).all())
 
-    def get_board(self, board_id: int | None) -> Optional[Board]:
+    async def get_board(self, board_id: int | None) -> Board | None:
         if board_id is None:
             return None
-        return self.session.get(Board, board_id)
+        return await self.session.get(Board, board_id)
 
-    def create_board(
+    async def create_board(
         self,
         title: str,
         channel_id: str,
         rate_limit_seconds: int,
         max_text_length: int,
     ) -> Board:
-        base_slug = slugify(title) or "board"
-        slug = base_slug
-        counter = 2
-        while self.session.exec(select(Board).where(col(Board.slug) == slug)).first() is not None:
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-
-        board = Board(
-            slug=slug,
-            title=title,
-            channel_id=channel_id,
-            rate_limit_seconds=rate_limit_seconds,
-            max_text_length=max_text_length,
-            is_active=True,
-        )
-        self.session.add(board)
-        self.session.flush()
+        (board,) = await self.create_boards([NewBoard(title, channel_id, rate_limit_seconds, max_text_length)])
         return board
 
-    def set_board_active(self, board_id: int | None, is_active: bool) -> Optional[Board]:
-        board = self.get_board(board_id)
+    async def create_boards(self, drafts: Sequence[NewBoard]) -> list[Board]:
+        """Insert ``drafts`` in one flush, each with a slug no other board has.
+
+        Slugs are picked from one prefix query over the taken ones. A board
+        created concurrently with the same slug fails the unique constraint;
+        the batch is then rolled back to its savepoint and allocated again.
+        A draft's own slug is used as is; SlugTakenError lists those already
+        taken or repeated in ``drafts``.
+        """
+        if not drafts:
+            return []
+        explicit = [draft.slug for draft in drafts if draft.slug]
+        bases = [slugify(draft.title) or "board" for draft in drafts if not draft.slug]
+        attempt = 1
+        while True:
+            taken = await self._taken_slugs({*bases, *explicit})
+            clashes: list[str] = []
+            seen: set[str] = set()
+            for slug in explicit:
+                if slug in taken or slug in seen:
+                    clashes.append(slug)
+                seen.add(slug)
+            if clashes:
+                raise SlugTakenError(clashes)
+            generated = iter(_next_free_slugs(bases, taken | set(explicit)))
+            slugs = [draft.slug or next(generated) for draft in drafts]
+            boards = [
+                Board(
+                    slug=slug,
+                    title=draft.title,
+                    channel_id=draft.channel_id,
+                    rate_limit_seconds=draft.rate_limit_seconds,
+                    max_text_length=draft.max_text_length,
+                    is_active=True,
+                )
+                for draft, slug in zip(drafts, slugs)
+            ]
+            try:
+                async with self.session.begin_nested():
+                    self.session.add_all(boards)
+            except IntegrityError:
+                if attempt == _SLUG_ATTEMPTS:
+                    raise
+                attempt += 1
+                continue
+            await self._bump_counters(boards_total=len(boards), boards_active=len(boards))
+            return boards
+
+    async def _taken_slugs(self, bases: AbstractSet[str]) -> set[str]:
+        # A range on the unique slug index rather than LIKE, which SQLite only
+        # runs off an index under case_sensitive_like.
+        conditions = [
+            or_(col(Board.slug) == base, and_(col(Board.slug) >= f"{base}-", col(Board.slug) < f"{base}."))
+            for base in sorted(bases)
+        ]
+        taken: set[str] = set()
+        for start in range(0, len(conditions), _SLUG_QUERY_BASES):
+            chunk = conditions[start : start + _SLUG_QUERY_BASES]
+            taken.update((await self.session.exec(select(Board.slug).where(or_(*chunk)))).all())
+        return taken
+
+    async def set_board_active(self, board_id: int | None, is_active: bool) -> Board | None:
+        board = await self.get_board(board_id)
         if board is None:
             return None
+        if board.is_active != is_active:
+            await self._bump_counters(boards_active=1 if is_active else -1)
         board.is_active = is_active
         self.session.add(board)
-        self.session.flush()
+        await self.session.flush()
         return board
 
-    def update_board_rate_limit(self, board_id: int | None, seconds: int) -> Optional[Board]:
-        board = self.get_board(board_id)
+    async def update_boards(self, changes: Sequence[tuple[Board, Mapping[str, Any]]]) -> None:
+        """Apply field ``changes`` to loaded boards in one flush."""
+        activated = 0
+        for board, fields in changes:
+            if "is_active" in fields and fields["is_active"] != board.is_active:
+                activated += 1 if fields["is_active"] else -1
+            for name, value in fields.items():
+                setattr(board, name, value)
+            self.session.add(board)
+        await self.session.flush()
+        if activated:
+            await self._bump_counters(boards_active=activated)
+
+    async def update_board_rate_limit(self, board_id: int | None, seconds: int) -> Board | None:
+        board = await self.get_board(board_id)
         if board is None:
             return None
         board.rate_limit_seconds = seconds
         self.session.add(board)
-        self.session.flush()
+        await self.session.flush()
         return board
 
-    def set_user_selected_board(self, user_id: int, board_id: int | None) -> UserBoardSelection:
+    async def list_rate_bursts(self) -> dict[int, int]:
+        policies = (await self.session.exec(select(BoardRatePolicy))).all()
+        return {policy.board_id: policy.burst for policy in policies}
+
+    async def set_board_rate_burst(self, board_id: int | None, burst: int) -> BoardRatePolicy:
         board_id = self._require_board_id(board_id)
-        selection = self.session.get(UserBoardSelection, user_id)
-        if selection is None:
-            selection = UserBoardSelection(user_id=user_id, board_id=board_id)
+        policy = await self.session.get(BoardRatePolicy, board_id)
+        if policy is None:
+            policy = BoardRatePolicy(board_id=board_id, burst=burst)
         else:
-            selection.board_id = board_id
-            selection.updated_at = utc_now()
-        self.session.add(selection)
-        self.session.flush()
+            policy.burst = burst
+            policy.updated_at = utc_now()
+        self.session.add(policy)
+        await self.session.flush()
+        return policy
+
+    async def set_board_rate_bursts(self, bursts: Mapping[int, int]) -> None:
+        if not bursts:
+            return
+        statement = self._upsert(BoardRatePolicy)
+        statement = statement.on_conflict_do_update(
+            index_elements=[col(BoardRatePolicy.board_id)],
+            set_={"burst": statement.excluded.burst, "updated_at": statement.excluded.updated_at},
+        )
+        now = utc_now()
+        await self.session.exec(
+            statement,
+            params=[{"board_id": board_id, "burst": burst, "updated_at": now} for board_id, burst in bursts.items()],
+        )
+
+    async def set_user_selected_board(self, user_id: int, board_id: int | None) -> UserBoardSelection:
+        board_id = self._require_board_id(board_id)
+        statement = self._upsert(UserBoardSelection).values(user_id=user_id, board_id=board_id, updated_at=utc_now())
+        statement = statement.on_conflict_do_update(
+            index_elements=[col(UserBoardSelection.user_id)],
+            set_={"board_id": statement.excluded.board_id, "updated_at": statement.excluded.updated_at},
+        )
+        selection = (await self._upsert_returning(statement, UserBoardSelection)).one()
         return selection
 
-    def get_user_selection(self, user_id: int) -> Optional[UserBoardSelection]:
-        return self.session.get(UserBoardSelection, user_id)
+    async def get_user_selection(self, user_id: int) -> UserBoardSelection | None:
+        return await self.session.get(UserBoardSelection, user_id)
 
-    def get_selected_board(self, user_id: int) -> Optional[Board]:
-        selection = self.get_user_selection(user_id)
+    async def get_selected_board(self, user_id: int) -> Board | None:
+        selection = await self.get_user_selection(user_id)
         if selection is None:
             return None
-        return self.get_board(selection.board_id)
+        return await self.get_board(selection.board_id)
 
-    def ensure_membership(self, user_id: int, board_id: int | None) -> BoardMembership:
-        board_id = self._require_board_id(board_id)
-        statement = select(BoardMembership).where(
-            col(BoardMembership.user_id) == user_id,
-            col(BoardMembership.board_id) == board_id,
-        )
-        membership = self.session.exec(statement).first()
-        if membership is None:
-            membership = BoardMembership(user_id=user_id, board_id=board_id, is_blocked=False)
-            self.session.add(membership)
-            self.session.flush()
-        return membership
+    async def ensure_membership(self, user_id: int, board_id: int | None) -> BoardMembership:
+        """Create the membership and its board state unless they exist; safe against concurrent calls."""
+        return await self._upsert_membership(user_id, self._require_board_id(board_id), blocked=None)
+
+    async def set_membership_blocked(self, user_id: int, board_id: int | None, blocked: bool) -> BoardMembership:
+        return await self._upsert_membership(user_id, self._require_board_id(board_id), blocked=blocked)
 
-    def set_membership_blocked(self, user_id: int, board_id: int | None, blocked: bool) -> BoardMembership:
-        membership = self.ensure_membership(user_id=user_id, board_id=board_id)
-        membership.is_blocked = blocked
-        self.session.add(membership)
-        self.session.flush()
+    async def _upsert_membership(self, user_id: int, board_id: int, *, blocked: bool | None) -> BoardMembership:
+        """Upsert the membership and the board state, setting ``is_blocked`` on both unless it is None."""
+        now = utc_now()
+        statement = self._upsert(BoardMembership).values(
+            user_id=user_id,
+            board_id=board_id,
+            is_blocked=bool(blocked),
+            created_at=now,
+        )
+        # A no-op update rather than DO NOTHING, so RETURNING also yields an existing row.
+        statement = statement.on_conflict_do_update(
+            index_elements=[col(BoardMembership.user_id), col(BoardMembership.board_id)],
+            set_={"is_blocked": statement.excluded.is_blocked}
+            if blocked is not None
+            else {"user_id": statement.excluded.user_id},
+        )
+        membership = (await self._upsert_returning(statement, BoardMembership)).one()
+        await self._upsert_board_state(user_id, board_id, blocked=blocked)
         return membership
 
-    def get_active_post(self, user_id: int, board_id: int | None) -> Optional[Post]:
+    async def get_board_state(self, user_id: int, board_id: int | None) -> UserBoardState | None:
+        if board_id is None:
+            return None
+        return await self.session.get(UserBoardState, (user_id, board_id))
+
+    async def _get_or_add_board_state(self, user_id: int, board_id: int) -> UserBoardState:
+        state = await self.session.get(UserBoardState, (user_id, board_id))
+        if state is None:
+            state = await self._upsert_board_state(user_id, board_id, blocked=None)
+        return state
+
+    async def _upsert_board_state(self, user_id: int, board_id: int, *, blocked: bool | None) -> UserBoardState:
+        now = utc_now()
+        statement = self._upsert(UserBoardState).values(
+            user_id=user_id,
+            board_id=board_id,
+            is_blocked=bool(blocked),
+            updated_at=now,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[col(UserBoardState.user_id), col(UserBoardState.board_id)],
+            set_={"is_blocked": statement.excluded.is_blocked, "updated_at": statement.excluded.updated_at}
+            if blocked is not None
+            else {"user_id": statement.excluded.user_id},
+        )
+        state = (await self._upsert_returning(statement, UserBoardState)).one()
+        return state
+
+    async def backfill_board_states(self) -> int:
+        """Create missing ``user_board_state`` rows from memberships and active posts.
+
+        Only memberships without a state row are read; migration v0007 runs it
+        once for databases from before the state table.
+        """
+        active_post = (
+            select(Post.id, Post.telegram_message_id)
+            .where(
+                col(Post.user_id) == col(BoardMembership.user_id),
+                col(Post.board_id) == col(BoardMembership.board_id),
+                col(Post.is_archived).is_(False),
+            )
+            .order_by(desc(col(Post.posted_at)))
+            .limit(1)
+        )
+        last_posted_at = (
+            select(func.max(Post.posted_at))
+            .where(
+                col(Post.user_id) == col(BoardMembership.user_id),
+                col(Post.board_id) == col(BoardMembership.board_id),
+            )
+            .scalar_subquery()
+        )
+        has_state = exists().where(
+            col(UserBoardState.user_id) == col(BoardMembership.user_id),
+            col(UserBoardState.board_id) == col(BoardMembership.board_id),
+        )
+        source = select(
+            BoardMembership.user_id,
+            BoardMembership.board_id,
+            BoardMembership.is_blocked,
+            active_post.with_only_columns(Post.id).scalar_subquery(),
+            active_post.with_only_columns(Post.telegram_message_id).scalar_subquery(),
+            last_posted_at,
+            literal(utc_now(), UTCDateTime()),
+        ).where(~has_state)
+        statement = insert(UserBoardState).from_select(
+            [
+                "user_id",
+                "board_id",
+                "is_blocked",
+                "active_post_id",
+                "active_message_id",
+                "last_posted_at",
+                "updated_at",
+            ],
+            source,
+        )
+        result = await self.session.exec(statement)
+        return result.rowcount or 0
+
+    async def get_active_post(self, user_id: int, board_id: int | None) -> Post | None:
         if board_id is None:
             return None
 
@@ -159,58 +529,471 @@ class Repository:
             col(Post.is_archived).is_(False),
         )
         statement = statement.order_by(desc(col(Post.posted_at))).limit(1)
-        return self.session.exec(statement).first()
+        return (await self.session.exec(statement)).first()
+
+    async def get_publish_context(self, user_id: int, bootstrap_superadmins: AbstractSet[int]) -> PublishContext | None:
+        """Load the user-side state the publish checks need for the selected board.
+
+        One statement of primary-key lookups: the selection, the user and the
+        denormalized board state. Its cost does not depend on the size of ``posts``.
+        """
+        is_admin = exists().where(
+            col(AdminRole.user_id) == col(UserBoardSelection.user_id),
+            or_(
+                col(AdminRole.role) == ROLE_SUPERADMIN,
+                and_(
+                    col(AdminRole.role) == ROLE_BOARD_ADMIN,
+                    col(AdminRole.board_id) == col(UserBoardSelection.board_id),
+                ),
+            ),
+        )
+        statement = (
+            select(UserBoardSelection, User, UserBoardState, is_admin)
+            .outerjoin(User, col(User.id) == col(UserBoardSelection.user_id))
+            .outerjoin(
+                UserBoardState,
+                and_(
+                    col(UserBoardState.user_id) == col(UserBoardSelection.user_id),
+                    col(UserBoardState.board_id) == col(UserBoardSelection.board_id),
+                ),
+            )
+            .where(col(UserBoardSelection.user_id) == user_id)
+        )
+        row = (await self.session.exec(statement)).first()
+        if row is None:
+            return None
+
+        selection, user, state, is_admin_role = row
+        return PublishContext(
+            board_id=selection.board_id,
+            user=user,
+            state=state,
+            is_board_admin=user_id in bootstrap_superadmins or bool(is_admin_role),
+        )
+
+    async def list_post_times_since(
+        self,
+        since: datetime,
+        bootstrap_superadmins: AbstractSet[int],
+    ) -> list[tuple[int, int, datetime]]:
+        """Posting times since ``since`` of users the rate limit applies to, oldest first."""
+        is_admin = exists().where(
+            col(AdminRole.user_id) == col(Post.user_id),
+            or_(
+                col(AdminRole.role) == ROLE_SUPERADMIN,
+                and_(
+                    col(AdminRole.role) == ROLE_BOARD_ADMIN,
+                    col(AdminRole.board_id) == col(Post.board_id),
+                ),
+            ),
+        )
+        statement = (
+            select(Post.user_id, Post.board_id, Post.posted_at)
+            .where(col(Post.posted_at) >= since, ~is_admin)
+            .order_by(col(Post.posted_at))
+        )
+        if bootstrap_superadmins:
+            statement = statement.where(col(Post.user_id).not_in(bootstrap_superadmins))
+        return [(user_id, board_id, posted_at) for user_id, board_id, posted_at in await self.session.exec(statement)]
 
-    def archive_post(self, post: Post) -> Post:
+    async def archive_post(self, post: Post) -> Post:
+        if not post.is_archived:
+            await self._bump_post_counters(post.board_id, active_posts=-1)
         post.is_archived = True
         post.archived_at = utc_now()
         self.session.add(post)
-        self.session.flush()
+        state = await self.get_board_state(post.user_id, post.board_id)
+        if state is not None and state.active_post_id == post.id:
+            state.active_post_id = None
+            state.active_message_id = None
+            state.updated_at = utc_now()
+        await self.session.flush()
         return post
 
-    def create_post(self, user_id: int, board_id: int | None, text: str, telegram_message_id: int) -> Post:
+    async def create_post(
+        self, user_id: int, board_id: int | None, text: str, telegram_message_id: int | None = None
+    ) -> Post:
+        """Insert the new active post of the user on the board, archiving the previous one."""
         board_id = self._require_board_id(board_id)
+        state = await self._get_or_add_board_state(user_id, board_id)
+        if state.active_post_id is not None:
+            archived = await self.session.exec(
+                update(Post)
+                .where(col(Post.id) == state.active_post_id, col(Post.is_archived).is_(False))
+                .values(is_archived=True, archived_at=utc_now())
+            )
+            await self._bump_post_counters(board_id, posts=1, active_posts=1 - archived.rowcount)
+        else:
+            await self._bump_post_counters(board_id, posts=1, active_posts=1)
+
         post = Post(user_id=user_id, board_id=board_id, text=text, telegram_message_id=telegram_message_id)
         self.session.add(post)
-        self.session.flush()
+        await self.session.flush()
+
+        state.active_post_id = post.id
+        state.active_message_id = telegram_message_id
+        state.last_posted_at = post.posted_at
+        state.updated_at = post.posted_at
+        await self.session.flush()
         return post
 
-    def is_superadmin(self, user_id: int, bootstrap_superadmins: set[int]) -> bool:
+    async def add_outbox_publish(
+        self,
+        post: Post,
+        chat_id: str,
+        replaces_message_id: int | None,
+        *,
+        status: str = OUTBOX_SENDING,
+        next_attempt_at: datetime | None = None,
+    ) -> OutboxMessage:
+        """Queue the channel send of ``post``; once it is out ``replaces_message_id`` gets deleted.
+
+        The caller that delivers the entry right after commit passes the
+        default ``sending`` status with its lease end as ``next_attempt_at``,
+        so the dispatchers leave the entry alone until then.
+        """
+        entry = OutboxMessage(
+            kind=OUTBOX_PUBLISH,
+            status=status,
+            chat_id=chat_id,
+            post_id=post.id,
+            user_id=post.user_id,
+            board_id=post.board_id,
+            text=post.text,
+            replaces_message_id=replaces_message_id,
+            next_attempt_at=next_attempt_at or utc_now(),
+        )
+        self.session.add(entry)
+        await self.session.flush()
+        return entry
+
+    async def cancel_outbox_publish(self, post_id: int) -> int | None:
+        """Drop the queued send of ``post_id`` unless it is already being sent.
+
+        Returns the message the dropped send was going to replace, so the
+        next post can take the cleanup over.
+        """
+        result = await self.session.exec(
+            delete(OutboxMessage)
+            .where(
+                col(OutboxMessage.post_id) == post_id,
+                col(OutboxMessage.kind) == OUTBOX_PUBLISH,
+                col(OutboxMessage.status) == OUTBOX_PENDING,
+            )
+            .returning(col(OutboxMessage.replaces_message_id))
+        )
+        return result.scalars().first()
+
+    async def claim_due_outbox(
+        self, now: datetime, limit: int, lease_until: datetime, kind: str | None = None
+    ) -> list[OutboxMessage]:
+        """Lease up to ``limit`` due pending entries until ``lease_until`` and return them, oldest first.
+
+        The rows are locked with SKIP LOCKED where the database supports it,
+        so dispatchers of several processes claim disjoint entries; SQLite
+        serializes the writers instead. A leased entry is ``sending`` with
+        the lease end as ``next_attempt_at``.
+        """
+        statement = (
+            select(OutboxMessage)
+            .where(col(OutboxMessage.status) == OUTBOX_PENDING, col(OutboxMessage.next_attempt_at) <= now)
+            .order_by(col(OutboxMessage.next_attempt_at), col(OutboxMessage.id))
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if kind is not None:
+            statement = statement.where(col(OutboxMessage.kind) == kind)
+        entries = list((await self.session.exec(statement)).all())
+        if entries:
+            await self.session.exec(
+                update(OutboxMessage)
+                .where(col(OutboxMessage.id).in_([entry.id for entry in entries]))
+                .values(status=OUTBOX_SENDING, next_attempt_at=lease_until)
+            )
+            for entry in entries:
+                entry.status = OUTBOX_SENDING
+                entry.next_attempt_at = lease_until
+        return entries
+
+    async def complete_outbox(self, entry: OutboxMessage, telegram_message_id: int) -> None:
+        """Record a delivered publish and queue the delete of the message it replaced.
+
+        When the post was itself replaced while it was being sent, its fresh
+        message is queued for deletion too.
+        """
+        await self.session.exec(
+            update(Post).where(col(Post.id) == entry.post_id).values(telegram_message_id=telegram_message_id)
+        )
+        still_active = await self.session.exec(
+            update(UserBoardState)
+            .where(
+                col(UserBoardState.user_id) == entry.user_id,
+                col(UserBoardState.board_id) == entry.board_id,
+                col(UserBoardState.active_post_id) == entry.post_id,
+            )
+            .values(active_message_id=telegram_message_id)
+        )
+        stale_message_id = entry.replaces_message_id
+        if not still_active.rowcount:
+            if stale_message_id is not None:
+                self._queue_outbox_delete(entry.chat_id, stale_message_id)
+            stale_message_id = telegram_message_id
+        if stale_message_id is None:
+            await self.drop_outbox([entry.id])
+            return
+
+        # The entry is reused as the delete; deletes are sent later in per-chat batches.
+        await self.session.exec(
+            update(OutboxMessage)
+            .where(col(OutboxMessage.id) == entry.id)
+            .values(
+                kind=OUTBOX_DELETE,
+                status=OUTBOX_PENDING,
+                message_id=stale_message_id,
+                text=None,
+                attempts=0,
+                last_error=None,
+                next_attempt_at=utc_now(),
+            )
+        )
+        await self.session.flush()
+
+    def _queue_outbox_delete(self, chat_id: str, message_id: int) -> None:
+        self.session.add(
+            OutboxMessage(kind=OUTBOX_DELETE, status=OUTBOX_PENDING, chat_id=chat_id, message_id=message_id)
+        )
+
+    async def drop_outbox(self, entry_ids: Sequence[int | None]) -> int:
+        """Remove finished or abandoned entries; returns how many."""
+        if not entry_ids:
+            return 0
+        result = await self.session.exec(delete(OutboxMessage).where(col(OutboxMessage.id).in_(entry_ids)))
+        return result.rowcount
+
+    async def retry_outbox(self, entries: Sequence[OutboxMessage], error: str, next_attempt_at: datetime) -> None:
+        """Put ``entries`` back in the queue until ``next_attempt_at``."""
+        await self.session.exec(
+            update(OutboxMessage)
+            .where(col(OutboxMessage.id).in_([entry.id for entry in entries]))
+            .values(
+                status=OUTBOX_PENDING,
+                attempts=col(OutboxMessage.attempts) + 1,
+                last_error=error[:255],
+                next_attempt_at=next_attempt_at,
+            )
+        )
+
+    async def fail_outbox(self, entry: OutboxMessage, error: str) -> None:
+        """Give up on a publish entry.
+
+        The post never reached the channel and is archived. While it is still
+        the user's active post, the post whose message it was replacing is
+        made active again and its message stays in the channel. If a newer
+        post has taken over in the meantime, the replaced message is deleted.
+        """
+        await self.session.exec(
+            update(OutboxMessage)
+            .where(col(OutboxMessage.id) == entry.id)
+            .values(status=OUTBOX_FAILED, attempts=col(OutboxMessage.attempts) + 1, last_error=error[:255])
+        )
+        state = await self.get_board_state(entry.user_id, entry.board_id) if entry.user_id is not None else None
+        still_active = state is not None and entry.post_id is not None and state.active_post_id == entry.post_id
+        post = await self.session.get(Post, entry.post_id) if entry.post_id is not None else None
+        if post is not None and not post.is_archived:
+            await self.archive_post(post)
+
+        replaced = entry.replaces_message_id
+        if replaced is not None:
+            predecessor = await self._get_post_by_message(entry, replaced) if still_active else None
+            if predecessor is None or state is None:
+                self._queue_outbox_delete(entry.chat_id, replaced)
+            else:
+                if predecessor.is_archived:
+                    await self._bump_post_counters(predecessor.board_id, active_posts=1)
+                predecessor.is_archived = False
+                predecessor.archived_at = None
+                self.session.add(predecessor)
+                state.active_post_id = predecessor.id
+                state.active_message_id = replaced
+                state.updated_at = utc_now()
+        await self.session.flush()
+
+    async def _get_post_by_message(self, entry: OutboxMessage, telegram_message_id: int) -> Post | None:
+        statement = select(Post).where(
+            col(Post.telegram_message_id) == telegram_message_id,
+            col(Post.user_id) == entry.user_id,
+            col(Post.board_id) == entry.board_id,
+        )
+        return (await self.session.exec(statement)).first()
+
+    async def requeue_outbox(self, now: datetime) -> int:
+        """Return ``sending`` entries whose lease ended before ``now`` to the queue; returns how many.
+
+        Entries still leased belong to a live dispatcher, possibly of another
+        process, and are left alone.
+        """
+        result = await self.session.exec(
+            update(OutboxMessage)
+            .where(col(OutboxMessage.status) == OUTBOX_SENDING, col(OutboxMessage.next_attempt_at) <= now)
+            .values(status=OUTBOX_PENDING, next_attempt_at=now)
+        )
+        return result.rowcount
+
+    async def move_archived_posts(self, archived_before: datetime, limit: int) -> int:
+        """Move up to ``limit`` posts archived before ``archived_before`` into ``posts_archive``.
+
+        Texts are compressed with the newest dictionary on the way. Returns the
+        number of moved posts; the stat and board post counters are unaffected.
+        """
+        archived_at = func.coalesce(col(Post.archived_at), col(Post.posted_at))
+        batch = (
+            select(Post)
+            .where(col(Post.is_archived).is_(True), archived_at < archived_before)
+            .order_by(col(Post.id))
+            .limit(limit)
+        )
+        posts = list((await self.session.exec(batch)).all())
+        if not posts:
+            return 0
+
+        dictionary = await self.latest_compression_dictionary()
+        moved_at = utc_now()
+        rows = [
+            {
+                "id": post.id,
+                "user_id": post.user_id,
+                "board_id": post.board_id,
+                "text": None,
+                "body": compress_text(post.text, dictionary.data if dictionary else None),
+                "dictionary_id": dictionary.id if dictionary else None,
+                "raw_size": len(post.text.encode()),
+                "posted_at": post.posted_at,
+                "telegram_message_id": post.telegram_message_id,
+                "archived_at": post.archived_at,
+                "moved_at": moved_at,
+            }
+            for post in posts
+        ]
+        await self.session.exec(insert(PostArchive), params=rows)
+        await self.session.exec(delete(Post).where(col(Post.id).in_([post.id for post in posts])))
+        for post in posts:
+            self.session.expunge(post)
+        return len(posts)
+
+    async def latest_compression_dictionary(self) -> CompressionDictionary | None:
+        statement = select(CompressionDictionary).order_by(desc(col(CompressionDictionary.id))).limit(1)
+        return (await self.session.exec(statement)).first()
+
+    async def save_compression_dictionary(self, data: bytes, sample_count: int) -> CompressionDictionary:
+        dictionary = CompressionDictionary(data=data, sample_count=sample_count)
+        self.session.add(dictionary)
+        await self.session.flush()
+        return dictionary
+
+    async def sample_post_texts(self, limit: int) -> list[str]:
+        """Texts of the newest ``limit`` posts, the training set for compression dictionaries."""
+        statement = select(Post.text).order_by(desc(col(Post.id))).limit(limit)
+        return list((await self.session.exec(statement)).all())
+
+    async def get_archived_post_text(self, post_id: int) -> str | None:
+        post = await self.session.get(PostArchive, post_id)
+        if post is None:
+            return None
+        return await self._archived_text(post)
+
+    async def _archived_text(self, post: PostArchive) -> str:
+        if post.body is None:
+            return post.text or ""
+        dictionary = await self.session.get(CompressionDictionary, post.dictionary_id) if post.dictionary_id else None
+        return decompress_text(post.body, dictionary.data if dictionary else None)
+
+    async def recompress_archived_posts(self, after_id: int, limit: int) -> tuple[int, int | None]:
+        """Compress archived rows that are plain or use an older dictionary, in id order.
+
+        Returns the number of rewritten rows and the last scanned id to continue
+        from, or ``None`` once the table is exhausted.
+        """
+        statement = (
+            select(PostArchive).where(col(PostArchive.id) > after_id).order_by(col(PostArchive.id)).limit(limit)
+        )
+        posts = list((await self.session.exec(statement)).all())
+        if not posts:
+            return 0, None
+
+        dictionary = await self.latest_compression_dictionary()
+        dictionary_id = dictionary.id if dictionary else None
+        rewritten = 0
+        for post in posts:
+            if post.body is not None and post.dictionary_id == dictionary_id:
+                continue
+            text = await self._archived_text(post)
+            post.body = compress_text(text, dictionary.data if dictionary else None)
+            post.dictionary_id = dictionary_id
+            post.raw_size = len(text.encode())
+            post.text = None
+            self.session.add(post)
+            rewritten += 1
+        await self.session.flush()
+        return rewritten, posts[-1].id
+
+    async def archive_size_report(self) -> dict[str, int]:
+        statement = select(
+            func.count(),
+            func.count(col(PostArchive.body)),
+            func.coalesce(func.sum(col(PostArchive.raw_size)), 0),
+            func.coalesce(func.sum(func.length(col(PostArchive.body))), 0),
+            func.coalesce(func.sum(func.length(col(PostArchive.text))), 0),
+        ).select_from(PostArchive)
+        rows, compressed_rows, raw_bytes, compressed_bytes, plain_chars = (await self.session.exec(statement)).one()
+        return {
+            "rows": int(rows),
+            "compressed_rows": int(compressed_rows),
+            "plain_rows": int(rows) - int(compressed_rows),
+            "raw_bytes": int(raw_bytes),
+            "compressed_bytes": int(compressed_bytes),
+            "plain_chars": int(plain_chars),
+        }
+
+    async def is_superadmin(self, user_id: int, bootstrap_superadmins: AbstractSet[int]) -> bool:
         if user_id in bootstrap_superadmins:
             return True
         statement = select(AdminRole).where(
             col(AdminRole.user_id) == user_id,
             col(AdminRole.role) == ROLE_SUPERADMIN,
         )
-        return self.session.exec(statement).first() is not None
+        return (await self.session.exec(statement)).first() is not None
 
-    def is_board_admin(self, user_id: int, board_id: int | None, bootstrap_superadmins: set[int]) -> bool:
+    async def is_board_admin(self, user_id: int, board_id: int | None, bootstrap_superadmins: AbstractSet[int]) -> bool:
         if board_id is None:
             return False
-        if self.is_superadmin(user_id=user_id, bootstrap_superadmins=bootstrap_superadmins):
+        if await self.is_superadmin(user_id=user_id, bootstrap_superadmins=bootstrap_superadmins):
             return True
         statement = select(AdminRole).where(
             col(AdminRole.user_id) == user_id,
             col(AdminRole.board_id) == board_id,
             col(AdminRole.role) == ROLE_BOARD_ADMIN,
         )
-        return self.session.exec(statement).first() is not None
+        return (await self.session.exec(statement)).first() is not None
 
-    def is_any_admin(self, user_id: int, bootstrap_superadmins: set[int]) -> bool:
-        if self.is_superadmin(user_id=user_id, bootstrap_superadmins=bootstrap_superadmins):
+    async def is_any_admin(self, user_id: int, bootstrap_superadmins: AbstractSet[int]) -> bool:
+        if await self.is_superadmin(user_id=user_id, bootstrap_superadmins=bootstrap_superadmins):
             return True
         statement = select(AdminRole).where(col(AdminRole.user_id) == user_id)
-        return self.session.exec(statement).first() is not None
+        return (await self.session.exec(statement)).first() is not None
 
-    def list_manageable_boards(
+    async def list_admin_roles(self, user_id: int) -> list[AdminRole]:
+        statement = select(AdminRole).where(col(AdminRole.user_id) == user_id)
+        return list((await self.session.exec(statement)).all())
+
+    async def list_manageable_boards(
         self,
         user_id: int,
-        bootstrap_superadmins: set[int],
+        bootstrap_superadmins: AbstractSet[int],
         *,
         include_archived: bool = False,
     ) -> list[Board]:
-        if self.is_superadmin(user_id=user_id, bootstrap_superadmins=bootstrap_superadmins):
-            return self.list_boards(include_archived=include_archived)
+        if await self.is_superadmin(user_id=user_id, bootstrap_superadmins=bootstrap_superadmins):
+            return await self.list_boards(include_archived=include_archived)
 
         statement = (
             select(Board)
@@ -227,50 +1010,71 @@ class Repository:
         if not include_archived:
             statement = statement.where(col(Board.is_active).is_(True))
         statement = statement.order_by(col(Board.title))
-        return list(self.session.exec(statement).all())
+        return list((await self.session.exec(statement)).all())
 
-    def grant_superadmin(self, user_id: int) -> AdminRole:
+    async def grant_superadmin(self, user_id: int) -> AdminRole:
         statement = select(AdminRole).where(
             col(AdminRole.user_id) == user_id,
             col(AdminRole.role) == ROLE_SUPERADMIN,
             col(AdminRole.board_id).is_(None),
         )
-        role = self.session.exec(statement).first()
+        role = (await self.session.exec(statement)).first()
         if role is not None:
             return role
         role = AdminRole(user_id=user_id, role=ROLE_SUPERADMIN, board_id=None)
         self.session.add(role)
-        self.session.flush()
+        await self.session.flush()
         return role
 
-    def grant_board_admin(self, user_id: int, board_id: int | None) -> AdminRole:
+    async def grant_board_admin(self, user_id: int, board_id: int | None) -> AdminRole:
         board_id = self._require_board_id(board_id)
         statement = select(AdminRole).where(
             col(AdminRole.user_id) == user_id,
             col(AdminRole.board_id) == board_id,
             col(AdminRole.role) == ROLE_BOARD_ADMIN,
         )
-        role = self.session.exec(statement).first()
+        role = (await self.session.exec(statement)).first()
         if role is not None:
             return role
         role = AdminRole(user_id=user_id, board_id=board_id, role=ROLE_BOARD_ADMIN)
         self.session.add(role)
-        self.session.flush()
+        await self.session.flush()
         return role
 
-    def revoke_superadmin(self, user_id: int) -> int:
+    async def grant_board_admins(self, grants: Iterable[tuple[int, int]]) -> None:
+        """Insert board admin roles for ``(user_id, board_id)`` pairs; existing roles are left alone."""
+        now = utc_now()
+        rows = [
+            {"user_id": user_id, "board_id": board_id, "role": ROLE_BOARD_ADMIN, "created_at": now}
+            for user_id, board_id in grants
+        ]
+        if rows:
+            await self.session.exec(self._upsert(AdminRole).on_conflict_do_nothing(), params=rows)
+
+    async def list_board_admin_ids(self) -> dict[int, list[int]]:
+        statement = (
+            select(AdminRole.board_id, AdminRole.user_id)
+            .where(col(AdminRole.role) == ROLE_BOARD_ADMIN, col(AdminRole.board_id).is_not(None))
+            .order_by(col(AdminRole.board_id), col(AdminRole.user_id))
+        )
+        admins: dict[int, list[int]] = {}
+        for board_id, user_id in (await self.session.exec(statement)).all():
+            admins.setdefault(board_id, []).append(user_id)
+        return admins
+
+    async def revoke_superadmin(self, user_id: int) -> int:
         statement = select(AdminRole).where(
             col(AdminRole.user_id) == user_id,
             col(AdminRole.role) == ROLE_SUPERADMIN,
             col(AdminRole.board_id).is_(None),
         )
-        roles = list(self.session.exec(statement).all())
+        roles = list((await self.session.exec(statement)).all())
         for role in roles:
-            self.session.delete(role)
-        self.session.flush()
+            await self.session.delete(role)
+        await self.session.flush()
         return len(roles)
 
-    def revoke_board_admin(self, user_id: int, board_id: int | None) -> int:
+    async def revoke_board_admin(self, user_id: int, board_id: int | None) -> int:
         if board_id is None:
             return 0
         statement = select(AdminRole).where(
@@ -278,13 +1082,13 @@ class Repository:
             col(AdminRole.role) == ROLE_BOARD_ADMIN,
             col(AdminRole.board_id) == board_id,
         )
-        roles = list(self.session.exec(statement).all())
+        roles = list((await self.session.exec(statement)).all())
         for role in roles:
-            self.session.delete(role)
-        self.session.flush()
+            await self.session.delete(role)
+        await self.session.flush()
         return len(roles)
 
-    def write_audit(
+    async def write_audit(
         self,
         actor_user_id: int,
         action: str,
@@ -292,36 +1096,246 @@ class Repository:
         target_id: str | None = None,
         board_id: int | None = None,
         metadata: dict[str, Any] | None = None,
-    ) -> AuditLog:
+    ) -> AuditEntry:
         metadata_json = None
         if metadata:
             metadata_json = json.dumps(metadata, ensure_ascii=False, sort_keys=True)
 
-        item = AuditLog(
-            actor_user_id=actor_user_id,
-            action=action,
-            target_type=target_type,
-            target_id=target_id,
-            board_id=board_id,
-            metadata_json=metadata_json,
+        row = {
+            "actor_user_id": actor_user_id,
+            "action": action,
+            "target_type": target_type,
+            "target_id": target_id,
+            "board_id": board_id,
+            "metadata_json": metadata_json,
+            "created_at": utc_now(),
+        }
+        table = await self._ensure_audit_partition(partition_name(row["created_at"]))
+        result = await self.session.exec(insert(table).values(row))
+        return AuditEntry(id=result.inserted_primary_key[0], **row)
+
+    async def insert_audit_events(self, rows: Sequence[dict[str, Any]]) -> None:
+        """Insert prepared audit rows into their monthly partitions, one executemany per month."""
+        by_partition: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            by_partition.setdefault(partition_name(row["created_at"]), []).append(row)
+        for name, partition_rows in by_partition.items():
+            table = await self._ensure_audit_partition(name)
+            await self.session.exec(insert(table), params=partition_rows)
+
+    async def _ensure_audit_partition(self, name: str) -> Table:
+        table = audit_partition(name)
+        engine = self.session.sync_session.get_bind()
+        pending = self.session.info.setdefault(_PENDING_AUDIT_PARTITIONS, set())
+        if name not in _created_audit_partitions.get(engine, ()) and name not in pending:
+            await self.session.run_sync(lambda session: table.create(session.connection(), checkfirst=True))
+            pending.add(name)
+        return table
+
+    async def list_audit_partitions(self) -> list[str]:
+        """Names of the monthly audit partitions, newest first."""
+        names = await self.session.run_sync(lambda session: inspect(session.connection()).get_table_names())
+        return sorted((name for name in names if is_partition_name(name)), reverse=True)
+
+    async def list_audit_page(
+        self,
+        board_ids: AbstractSet[int] | None,
+        before: AuditCursor | None = None,
+        limit: int = 10,
+    ) -> list[AuditEntry]:
+        """Newest audit entries older than ``before``, optionally only of ``board_ids``.
+
+        Every partition is read through its ``(board_id, created_at, id)`` or
+        ``(created_at, id)`` index starting right after the cursor, so a page
+        costs the same however deep it is. Several boards are read one by one
+        and merged instead of with ``IN`` so the index order is kept.
+        """
+        entries: list[AuditEntry] = []
+        newest = partition_name(before.created_at) if before is not None else None
+        for name in await self.list_audit_partitions():
+            if newest is not None and name > newest:
+                continue
+            table = audit_partition(name)
+            scopes: list[int | None] = sorted(board_ids) if board_ids is not None else [None]
+            found: list[AuditEntry] = []
+            for board_id in scopes:
+                found.extend(await self._audit_partition_page(table, board_id, before, limit - len(entries)))
+            found.sort(key=lambda entry: (entry.created_at, entry.id), reverse=True)
+            entries.extend(found[: limit - len(entries)])
+            if len(entries) >= limit:
+                break
+        return entries
+
+    async def _audit_partition_page(
+        self,
+        table: Table,
+        board_id: int | None,
+        before: AuditCursor | None,
+        limit: int,
+    ) -> list[AuditEntry]:
+        statement = (
+            select(*table.c)
+            .order_by(table.c.created_at.desc(), table.c.id.desc())
+            .limit(limit)
+        )
+        if board_id is not None:
+            statement = statement.where(table.c.board_id == board_id)
+        if before is not None:
+            statement = statement.where(
+                tuple_(table.c.created_at, table.c.id) < tuple_(before.created_at, before.id)
+            )
+        return [AuditEntry(**row._mapping) for row in await self.session.exec(statement)]
+
+    async def drop_audit_partitions(self, before: datetime) -> list[str]:
+        """Drop every monthly partition entirely older than the month of ``before``."""
+        oldest_kept = partition_name(before)
+        dropped = [name for name in await self.list_audit_partitions() if name < oldest_kept]
+        engine = self.session.sync_session.get_bind()
+        for name in dropped:
+            table = audit_partition(name)
+            await self.session.run_sync(lambda session, table=table: table.drop(session.connection(), checkfirst=True))
+            _created_audit_partitions.get(engine, set()).discard(name)
+        return dropped
+
+    async def move_legacy_audit_logs(self, limit: int) -> int:
+        """Move up to ``limit`` of the oldest rows of the unpartitioned ``audit_logs`` into partitions."""
+        statement = select(AuditLog).order_by(col(AuditLog.id)).limit(limit)
+        items = list((await self.session.exec(statement)).all())
+        if not items:
+            return 0
+        await self.insert_audit_events(
+            [
+                {
+                    "actor_user_id": item.actor_user_id,
+                    "action": item.action,
+                    "target_type": item.target_type,
+                    "target_id": item.target_id,
+                    "board_id": item.board_id,
+                    "metadata_json": item.metadata_json,
+                    "created_at": item.created_at,
+                }
+                for item in items
+            ]
+        )
+        await self.session.exec(delete(AuditLog).where(col(AuditLog.id).in_([item.id for item in items])))
+        for item in items:
+            self.session.expunge(item)
+        return len(items)
+
+    async def _count(self, statement: Any) -> int:
+        return int((await self.session.exec(statement)).one())
+
+    async def _bump_counters(self, **deltas: int) -> None:
+        """Apply counter deltas in one upsert, creating a counter row that is missing."""
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        statement = self._upsert(StatCounter).values([{"name": name, "value": delta} for name, delta in deltas.items()])
+        await self.session.exec(
+            statement.on_conflict_do_update(
+                index_elements=[col(StatCounter.name)],
+                set_={"value": col(StatCounter.value) + statement.excluded.value},
+            )
         )
-        self.session.add(item)
-        self.session.flush()
-        return item
 
-    def stats(self) -> dict[str, int]:
+    async def _bump_post_counters(self, board_id: int, posts: int = 0, active_posts: int = 0) -> None:
+        """Apply post count deltas to the global counters and to the board's counter row."""
+        await self._bump_counters(posts_total=posts, posts_active=active_posts)
+        if not posts and not active_posts:
+            return
+        statement = self._upsert(BoardPostCounter).values(board_id=board_id, posts=posts, active_posts=active_posts)
+        await self.session.exec(
+            statement.on_conflict_do_update(
+                index_elements=[col(BoardPostCounter.board_id)],
+                set_={
+                    "posts": col(BoardPostCounter.posts) + statement.excluded.posts,
+                    "active_posts": col(BoardPostCounter.active_posts) + statement.excluded.active_posts,
+                },
+            )
+        )
+
+    async def count_stats(self) -> dict[str, int]:
+        """Compute the global counters from scratch with COUNT queries."""
         return {
-            "users": int(self.session.exec(select(func.count()).select_from(User)).one()),
-            "boards_total": int(self.session.exec(select(func.count()).select_from(Board)).one()),
-            "boards_active": int(
-                self.session.exec(
-                    select(func.count()).select_from(Board).where(col(Board.is_active).is_(True))
-                ).one()
+            "users": await self._count(select(func.count()).select_from(User)),
+            "boards_total": await self._count(select(func.count()).select_from(Board)),
+            "boards_active": await self._count(
+                select(func.count()).select_from(Board).where(col(Board.is_active).is_(True))
             ),
-            "posts_total": int(self.session.exec(select(func.count()).select_from(Post)).one()),
-            "posts_active": int(
-                self.session.exec(
-                    select(func.count()).select_from(Post).where(col(Post.is_archived).is_(False))
-                ).one()
+            "posts_total": await self._count(select(func.count()).select_from(Post))
+            + await self._count(select(func.count()).select_from(PostArchive)),
+            "posts_active": await self._count(
+                select(func.count()).select_from(Post).where(col(Post.is_archived).is_(False))
             ),
         }
+
+    async def reconcile_stats(self) -> dict[str, int]:
+        """Overwrite ``stat_counters`` with freshly counted values and return them."""
+        counted = await self.count_stats()
+        for name, value in counted.items():
+            counter = await self.session.get(StatCounter, name)
+            if counter is None:
+                counter = StatCounter(name=name, value=value)
+            else:
+                counter.value = value
+            self.session.add(counter)
+        await self.session.flush()
+        return counted
+
+    async def reconcile_board_counters(self) -> int:
+        """Overwrite ``board_post_counters`` with counts of ``posts`` and ``posts_archive``.
+
+        Returns the number of boards with posts.
+        """
+        post_rows = select(
+            col(Post.board_id).label("board_id"),
+            case((col(Post.is_archived).is_(False), 1), else_=0).label("active"),
+        )
+        cold_post_rows = select(col(PostArchive.board_id).label("board_id"), literal(0).label("active"))
+        rows = union_all(post_rows, cold_post_rows).subquery()
+        source = select(rows.c.board_id, func.count(), func.sum(rows.c.active)).group_by(rows.c.board_id)
+        await self.session.exec(delete(BoardPostCounter))
+        result = await self.session.exec(
+            insert(BoardPostCounter).from_select(["board_id", "posts", "active_posts"], source)
+        )
+        return result.rowcount or 0
+
+    async def board_stats(self, recent_since: datetime) -> dict[int, BoardStats]:
+        """Per-board post and member counts of every board; boards without rows are absent.
+
+        Post totals are read from ``board_post_counters``. Recent posts are
+        counted on the ``posted_at`` index of ``posts`` alone: the archival job
+        only moves posts archived days ago, long out of any recent window.
+        """
+        counts: dict[int, dict[str, int]] = {}
+        for counter in await self.session.exec(select(BoardPostCounter)):
+            counts[counter.board_id] = {"posts": counter.posts, "active_posts": counter.active_posts}
+        members = select(
+            BoardMembership.board_id,
+            func.count(),
+            func.sum(case((col(BoardMembership.is_blocked).is_(True), 1), else_=0)),
+        ).group_by(col(BoardMembership.board_id))
+        for board_id, member_count, blocked in await self.session.exec(members):
+            counts.setdefault(board_id, {}).update(members=member_count, blocked_members=int(blocked))
+        # Materialized, so the planner reads the posted_at range first instead of
+        # folding the filter into a walk of the board_id index over every post.
+        recent_posts = (
+            select(Post.board_id)
+            .where(col(Post.posted_at) >= recent_since)
+            .cte("recent_posts")
+            .prefix_with("MATERIALIZED")
+        )
+        recent = select(recent_posts.c.board_id, func.count()).group_by(recent_posts.c.board_id)
+        for board_id, recent_count in await self.session.exec(recent):
+            counts.setdefault(board_id, {})["posts_24h"] = recent_count
+        return {board_id: BoardStats(board_id=board_id, **values) for board_id, values in counts.items()}
+
+    async def stats(self) -> dict[str, int]:
+        """Read the global counters; never writes, so it is safe on read-only sessions."""
+        counters = (await self.session.exec(select(StatCounter))).all()
+        values = {counter.name: counter.value for counter in counters}
+        if any(name not in values for name in STAT_COUNTERS):
+            # Migrations seed every counter; a missing one means the table was edited by hand.
+            logger.warning("Stat counters are missing, counting instead; run reconcile-stats")
+            values = {**await self.count_stats(), **values}
+        return {name: values[name] for name in STAT_COUNTERS}
@@ -1,49 +1,175 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Iterator
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any
 
-from sqlalchemy.engine import Engine
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config import get_settings
+from app.db.migrations import migrate
 
-_engine: Engine | None = None
+_engine: AsyncEngine | None = None
+_read_engine: AsyncEngine | None = None
 
+# Plain URLs from .env keep working: the async driver is picked from the dialect.
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
 
-def get_engine() -> Engine:
+_SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+
+def async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    drivername = _ASYNC_DRIVERS.get(url.drivername)
+    if drivername is None:
+        return database_url
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def _is_file_sqlite(url: URL) -> bool:
+    if not url.drivername.startswith("sqlite"):
+        return False
+    return url.database not in (None, "", ":memory:") and url.query.get("mode") != "memory"
+
+
+def _install_sqlite_pragmas(engine: AsyncEngine, *, read_only: bool) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection: Any, _connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def install_sqlite_transactions(engine: AsyncEngine) -> None:
+    """Let SQLAlchemy emit BEGIN itself instead of the sqlite3 module.
+
+    The module's legacy transaction handling sends no BEGIN before SAVEPOINT,
+    so releasing a savepoint committed everything before it. This is the
+    workaround from the SQLAlchemy SQLite dialect documentation.
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection: Any, _connection_record: Any) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _on_begin(connection: Any) -> None:
+        connection.exec_driver_sql("BEGIN")
+
+
+def _single_writer_enabled() -> bool:
+    settings = get_settings()
+    return settings.sqlite_single_writer and _is_file_sqlite(make_url(settings.database_url))
+
+
+def get_engine() -> AsyncEngine:
+    """Engine used for write transactions.
+
+    For file-backed SQLite the pool holds exactly one connection. aiosqlite runs
+    every connection in its own thread fed by a job queue, so all writes of the
+    process go through a single writer thread and wait for the pool checkout
+    instead of fighting over the database lock.
+    """
     global _engine
     if _engine is None:
         settings = get_settings()
-        _engine = create_engine(
-            settings.database_url,
-            connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
+        options: dict[str, Any] = {"pool_pre_ping": True}
+        if settings.database_url.startswith("sqlite"):
+            options["connect_args"] = {"check_same_thread": False}
+        if _single_writer_enabled():
+            options.update(pool_size=1, max_overflow=0, pool_timeout=settings.sqlite_write_timeout)
+
+        _engine = create_async_engine(async_database_url(settings.database_url), **options)
+        if settings.database_url.startswith("sqlite"):
+            install_sqlite_transactions(_engine)
+        if _single_writer_enabled():
+            _install_sqlite_pragmas(_engine, read_only=False)
+    return _engine
+
+
+def get_read_engine() -> AsyncEngine:
+    """Engine for read-only lookups; a separate WAL reader pool on SQLite."""
+    global _read_engine
+    if not _single_writer_enabled():
+        return get_engine()
+
+    if _read_engine is None:
+        settings = get_settings()
+        _read_engine = create_async_engine(
+            async_database_url(settings.database_url),
+            connect_args={"check_same_thread": False},
             pool_pre_ping=True,
+            pool_size=settings.sqlite_read_pool_size,
+            max_overflow=0,
         )
-    return _engine
+        install_sqlite_transactions(_read_engine)
+        _install_sqlite_pragmas(_read_engine, read_only=True)
+    return _read_engine
+
+
+async def init_db(allow_offline: bool = False) -> list[int]:
+    """Bring the schema up to date; returns the versions of the migrations applied now.
 
+    Migrations that lock tables are only applied with ``allow_offline``, which
+    the ``migrate`` command sets; otherwise they raise RuntimeError.
+    """
+    return await migrate(get_engine(), allow_offline=allow_offline)
 
-def init_db() -> None:
-    SQLModel.metadata.create_all(get_engine())
 
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run ``callback`` once the current transaction of ``session`` commits.
 
-@contextmanager
-def session_scope() -> Iterator[Session]:
+    In-process caches use this so a rolled back write never becomes visible.
+    """
+    event.listen(session.sync_session, "after_commit", lambda _session: callback(), once=True)
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
     # Keep loaded attributes accessible after commit when handlers use objects
     # outside the context manager scope.
-    session = Session(get_engine(), expire_on_commit=False)
+    session = AsyncSession(get_engine(), expire_on_commit=False)
     try:
         yield session
-        session.commit()
+        await session.commit()
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
     finally:
-        session.close()
+        await session.close()
 
 
-def reset_engine() -> None:
-    global _engine
+@asynccontextmanager
+async def read_session_scope() -> AsyncIterator[AsyncSession]:
+    session = AsyncSession(get_read_engine(), expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def reset_engine() -> None:
+    global _engine, _read_engine
+    if _read_engine is not None:
+        await _read_engine.dispose()
     if _engine is not None:
-        _engine.dispose()
+        await _engine.dispose()
     _engine = None
+    _read_engine = None
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Dialect
+
+# ON CONFLICT ... RETURNING needs SQLite 3.35.
+_MIN_SQLITE_VERSION = (3, 35, 0)
+
+
+def upsert(dialect: Dialect, model: Any) -> sqlite.Insert | postgresql.Insert:
+    """``INSERT`` for ``model`` with the ``on_conflict_do_update``/``_do_nothing`` API of ``dialect``.
+
+    SQLite and PostgreSQL share the same ON CONFLICT syntax and SQLAlchemy API,
+    so callers build one statement for both.
+    """
+    if dialect.name == "postgresql":
+        return postgresql.insert(model)
+    if dialect.name == "sqlite":
+        version = dialect.server_version_info
+        if version is not None and version < _MIN_SQLITE_VERSION:
+            raise RuntimeError(f"SQLite {'.'.join(map(str, version))} is too old: upserts need 3.35 or newer")
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts are not implemented for {dialect.name}")
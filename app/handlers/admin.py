@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from aiogram import F, Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 
@@ -10,14 +10,24 @@ from app.keyboards.admin import (
     admin_add_role_keyboard,
     admin_panel_keyboard,
     admin_remove_role_keyboard,
+    audit_page_keyboard,
     board_action_keyboard,
 )
-from app.locales.messages import t
+from app.locales.messages import admin_stats_text, audit_page_text, import_issues_text, t
+from app.services.board_transfer import (
+    EXPORT_FORMATS,
+    BoardExportFile,
+    BoardImportError,
+    parse_boards,
+)
+from app.services.outbound import outbound_scheduler
 from app.services.scopes import admin_service_scope
+from app.services.users import user_sync_cache
 from app.states import (
     AdminAddStates,
     AdminRemoveStates,
     BoardCreateStates,
+    BoardImportStates,
     RateLimitStates,
     UserBlockStates,
     UserUnblockStates,
@@ -31,8 +41,8 @@ async def _ensure_any_admin(message: Message) -> bool:
     if message.from_user is None:
         return False
 
-    with admin_service_scope(message.from_user, settings) as service:
-        allowed = service.access.ensure_any_admin()
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        allowed = await service.access.ensure_any_admin()
 
     if not allowed:
         await message.answer(t("admin_denied", locale=settings.default_locale))
@@ -44,8 +54,8 @@ async def _ensure_superadmin(message: Message) -> bool:
     if message.from_user is None:
         return False
 
-    with admin_service_scope(message.from_user, settings) as service:
-        allowed = service.access.ensure_superadmin()
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        allowed = await service.access.ensure_superadmin()
 
     if not allowed:
         await message.answer(t("admin_denied", locale=settings.default_locale))
@@ -72,10 +82,43 @@ async def stats_command(message: Message) -> None:
     if not await _ensure_any_admin(message):
         return
 
-    with admin_service_scope(message.from_user, settings) as service:
-        data = service.boards.stats()
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        data = await service.boards.stats()
+        board_stats = await service.boards.board_stats()
+
+    await message.answer(
+        admin_stats_text(
+            data,
+            board_stats,
+            outbound_scheduler.stats(),
+            user_sync_cache.stats(),
+            locale=settings.default_locale,
+        )
+    )
+
+
+@router.message(Command("audit"))
+async def audit_command(message: Message, command: CommandObject) -> None:
+    if message.from_user is None:
+        return
 
-    await message.answer(t("admin_stats", locale=settings.default_locale, **data))
+    argument = (command.args or "").strip()
+    if argument and not argument.isdigit():
+        await message.answer(t("invalid_number", locale=settings.default_locale))
+        return
+    board_id = int(argument) if argument else None
+
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        page = await service.audit.page(board_id)
+
+    if page is None:
+        await message.answer(t("admin_denied", locale=settings.default_locale))
+        return
+
+    await message.answer(
+        audit_page_text(page.entries, locale=settings.default_locale),
+        reply_markup=audit_page_keyboard(board_id, page.next_cursor.encode() if page.next_cursor else None),
+    )
 
 
 @router.message(Command("board_create"))
@@ -87,6 +130,82 @@ async def board_create_start(message: Message, state: FSMContext) -> None:
     await message.answer(t("admin_enter_board_title", locale=settings.default_locale))
 
 
+@router.message(Command("boards_import"))
+async def boards_import_start(message: Message, state: FSMContext) -> None:
+    if not await _ensure_superadmin(message):
+        return
+
+    await state.set_state(BoardImportStates.waiting_document)
+    await message.answer(t("admin_boards_import_prompt", locale=settings.default_locale))
+
+
+@router.message(BoardImportStates.waiting_document, F.document)
+async def boards_import_document(message: Message, state: FSMContext) -> None:
+    if message.from_user is None or message.document is None or message.bot is None:
+        return
+
+    document = message.document
+    if (document.file_size or 0) > settings.board_import_max_bytes:
+        await message.answer(
+            t("admin_boards_import_too_large", locale=settings.default_locale, limit=settings.board_import_max_bytes)
+        )
+        return
+
+    content = await message.bot.download(document)
+    if content is None:
+        return
+    try:
+        records = parse_boards(content.read(), document.file_name)
+    except BoardImportError as error:
+        await message.answer(import_issues_text(error.issues, locale=settings.default_locale))
+        return
+
+    try:
+        async with admin_service_scope(message.from_user, settings) as service:
+            allowed = await service.access.ensure_superadmin()
+            result = await service.boards.import_boards(records) if allowed else None
+    except BoardImportError as error:
+        await message.answer(import_issues_text(error.issues, locale=settings.default_locale))
+        return
+
+    await state.clear()
+    if result is None:
+        await message.answer(t("admin_denied", locale=settings.default_locale))
+        return
+
+    await message.answer(
+        t(
+            "admin_boards_imported",
+            locale=settings.default_locale,
+            created=result.created,
+            updated=result.updated,
+            skipped=result.skipped,
+        )
+    )
+
+
+@router.message(Command("boards_export"))
+async def boards_export_command(message: Message, command: CommandObject) -> None:
+    if message.from_user is None:
+        return
+
+    export_format = (command.args or "csv").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        await message.answer(t("invalid_export_format", locale=settings.default_locale))
+        return
+
+    if not await _ensure_superadmin(message):
+        return
+
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        records = await service.boards.export_boards()
+
+    await message.answer_document(
+        BoardExportFile(records, export_format),
+        caption=t("admin_boards_exported", locale=settings.default_locale, count=len(records)),
+    )
+
+
 @router.message(Command("board_archive"))
 async def board_archive_command(message: Message) -> None:
     if message.from_user is None:
@@ -95,8 +214,8 @@ async def board_archive_command(message: Message) -> None:
     if not await _ensure_superadmin(message):
         return
 
-    with admin_service_scope(message.from_user, settings) as service:
-        boards = service.access.active_manageable_boards()
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        boards = await service.access.active_manageable_boards()
 
     if not boards:
         await message.answer(t("admin_no_boards", locale=settings.default_locale))
@@ -116,8 +235,8 @@ async def board_activate_command(message: Message) -> None:
     if not await _ensure_superadmin(message):
         return
 
-    with admin_service_scope(message.from_user, settings) as service:
-        boards = service.access.inactive_manageable_boards()
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        boards = await service.access.inactive_manageable_boards()
 
     if not boards:
         await message.answer(t("admin_no_boards", locale=settings.default_locale))
@@ -154,23 +273,21 @@ async def board_create_channel(message: Message, state: FSMContext) -> None:
     data = await state.get_data()
     title = data.get("title", "Новая доска")
 
-    with admin_service_scope(message.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await state.clear()
-            await message.answer(t("admin_denied", locale=settings.default_locale))
-            return
-
-        board = service.boards.create_board(title=title, channel_id=channel_id)
-        board_title = board.title
-        board_id = board.id
+    async with admin_service_scope(message.from_user, settings) as service:
+        allowed = await service.access.ensure_superadmin()
+        board = await service.boards.create_board(title=title, channel_id=channel_id) if allowed else None
 
     await state.clear()
+    if board is None:
+        await message.answer(t("admin_denied", locale=settings.default_locale))
+        return
+
     await message.answer(
         t(
             "admin_board_created",
             locale=settings.default_locale,
-            title=board_title,
-            board_id=board_id,
+            title=board.title,
+            board_id=board.id,
         )
     )
 
@@ -244,8 +361,8 @@ async def block_user_choose_board(message: Message, state: FSMContext) -> None:
 
     target_user_id = int(raw)
 
-    with admin_service_scope(message.from_user, settings) as service:
-        boards = service.access.manageable_boards()
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        boards = await service.access.manageable_boards()
 
     await state.clear()
     if not boards:
@@ -283,8 +400,8 @@ async def unblock_user_choose_board(message: Message, state: FSMContext) -> None
 
     target_user_id = int(raw)
 
-    with admin_service_scope(message.from_user, settings) as service:
-        boards = service.access.manageable_boards()
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        boards = await service.access.manageable_boards()
 
     await state.clear()
     if not boards:
@@ -309,8 +426,8 @@ async def rate_limit_start(message: Message, state: FSMContext) -> None:
     if not await _ensure_any_admin(message):
         return
 
-    with admin_service_scope(message.from_user, settings) as service:
-        boards = service.access.manageable_boards()
+    async with admin_service_scope(message.from_user, settings, read_only=True) as service:
+        boards = await service.access.manageable_boards()
 
     if not boards:
         await message.answer(t("admin_no_boards", locale=settings.default_locale))
@@ -328,13 +445,14 @@ async def rate_limit_save(message: Message, state: FSMContext) -> None:
     if message.from_user is None:
         return
 
-    raw = (message.text or "").strip()
-    if not raw.isdigit():
+    parts = (message.text or "").split()
+    if not 1 <= len(parts) <= 2 or not all(part.isdigit() for part in parts):
         await message.answer(t("invalid_number", locale=settings.default_locale))
         return
 
-    seconds = int(raw)
-    if seconds <= 0:
+    seconds = int(parts[0])
+    burst = int(parts[1]) if len(parts) == 2 else None
+    if seconds <= 0 or (burst is not None and burst <= 0):
         await message.answer(t("invalid_number", locale=settings.default_locale))
         return
 
@@ -345,25 +463,30 @@ async def rate_limit_save(message: Message, state: FSMContext) -> None:
         await message.answer(t("board_not_found", locale=settings.default_locale))
         return
 
-    with admin_service_scope(message.from_user, settings) as service:
-        if not service.access.can_manage_board(board_id):
-            await state.clear()
-            await message.answer(t("admin_denied", locale=settings.default_locale))
-            return
-
-        board = service.boards.update_rate_limit(board_id=board_id, seconds=seconds)
-        if board is None:
-            await state.clear()
-            await message.answer(t("board_not_found", locale=settings.default_locale))
-            return
+    async with admin_service_scope(message.from_user, settings) as service:
+        allowed = await service.access.can_manage_board(board_id)
+        board = (
+            await service.boards.update_rate_limit(board_id=board_id, seconds=seconds, burst=burst)
+            if allowed
+            else None
+        )
 
     await state.clear()
+    if not allowed:
+        await message.answer(t("admin_denied", locale=settings.default_locale))
+        return
+
+    if board is None:
+        await message.answer(t("board_not_found", locale=settings.default_locale))
+        return
+
     await message.answer(
         t(
-            "admin_rate_limit_updated",
+            "admin_rate_limit_updated_burst" if burst and burst > 1 else "admin_rate_limit_updated",
             locale=settings.default_locale,
             title=board.title,
             seconds=seconds,
+            burst=burst,
         )
     )
 
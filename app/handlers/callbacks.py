@@ -6,10 +6,19 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
 
 from app.config import get_settings
-from app.keyboards.admin import admin_board_actions_keyboard, admin_boards_keyboard, admin_panel_keyboard, board_action_keyboard
+from app.db.repositories import AuditCursor
+from app.keyboards.admin import (
+    admin_board_actions_keyboard,
+    admin_boards_keyboard,
+    admin_panel_keyboard,
+    audit_page_keyboard,
+    board_action_keyboard,
+)
 from app.keyboards.user import board_picker_keyboard
-from app.locales.messages import t
+from app.locales.messages import admin_stats_text, audit_page_text, t
+from app.services.outbound import outbound_scheduler
 from app.services.scopes import admin_service_scope, user_service_scope
+from app.services.users import user_sync_cache
 from app.states import RateLimitStates
 
 router = Router(name="callbacks")
@@ -69,13 +78,13 @@ async def user_select_board(callback: CallbackQuery) -> None:
 
     board_id = int(parts[0])
 
-    with user_service_scope(callback.from_user) as service:
-        board = service.select_board(board_id)
-        if board is None:
-            await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
-            return
+    async with user_service_scope(callback.from_user) as service:
+        board = await service.select_board(board_id)
+        board_picker = await service.board_picker_view() if board is not None else None
 
-        board_picker = service.board_picker_view()
+    if board is None or board_picker is None:
+        await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer()
     await _safe_edit_text(message,
@@ -93,10 +102,12 @@ async def admin_panel_home(callback: CallbackQuery) -> None:
     if callback.from_user is None or message is None:
         return
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_any_admin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings, read_only=True) as service:
+        allowed = await service.access.ensure_any_admin()
+
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer()
     await _safe_edit_text(message, 
@@ -111,12 +122,13 @@ async def admin_panel_boards(callback: CallbackQuery) -> None:
     if callback.from_user is None or message is None:
         return
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_any_admin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings, read_only=True) as service:
+        allowed = await service.access.ensure_any_admin()
+        boards = await service.access.manageable_boards(include_archived=True) if allowed else []
 
-        boards = service.access.manageable_boards(include_archived=True)
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer()
     if not boards:
@@ -135,15 +147,55 @@ async def admin_panel_stats(callback: CallbackQuery) -> None:
     if callback.from_user is None or message is None:
         return
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_any_admin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings, read_only=True) as service:
+        allowed = await service.access.ensure_any_admin()
+        data = await service.boards.stats() if allowed else {}
+        board_stats = await service.boards.board_stats() if allowed else []
+
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
+
+    await callback.answer()
+    await _safe_edit_text(
+        message,
+        admin_stats_text(
+            data,
+            board_stats,
+            outbound_scheduler.stats(),
+            user_sync_cache.stats(),
+            locale=settings.default_locale,
+        ),
+    )
+
+
+@router.callback_query(F.data.startswith("admin:audit:"))
+async def admin_audit_next_page(callback: CallbackQuery) -> None:
+    message = _editable_message(callback)
+    if callback.from_user is None or message is None:
+        return
+
+    parts = _parse_tail(callback.data, "admin:audit")
+    try:
+        board_id = int(parts[0]) or None
+        before = AuditCursor.decode(":".join(parts[1:]))
+    except (IndexError, ValueError):
+        await callback.answer(t("invalid_number", locale=settings.default_locale), show_alert=True)
+        return
+
+    async with admin_service_scope(callback.from_user, settings, read_only=True) as service:
+        page = await service.audit.page(board_id, before)
 
-        data = service.boards.stats()
+    if page is None:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer()
-    await _safe_edit_text(message, t("admin_stats", locale=settings.default_locale, **data))
+    await _safe_edit_text(
+        message,
+        audit_page_text(page.entries, locale=settings.default_locale),
+        reply_markup=audit_page_keyboard(board_id, page.next_cursor.encode() if page.next_cursor else None),
+    )
 
 
 @router.callback_query(F.data.startswith("admin:board:"))
@@ -159,18 +211,19 @@ async def admin_board_details(callback: CallbackQuery) -> None:
 
     board_id = int(parts[0])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        board = service.boards.get_board(board_id)
-        if board is None:
-            await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings, read_only=True) as service:
+        board = await service.boards.get_board(board_id)
+        allowed = board is not None and await service.access.can_manage_board(board.id)
 
-        if not service.access.can_manage_board(board.id):
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    if board is None:
+        await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
+        return
 
-        status = "активна" if board.is_active else "архив"
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
+    status = "активна" if board.is_active else "архив"
     await callback.answer()
     await _safe_edit_text(message, 
         t(
@@ -200,15 +253,17 @@ async def admin_board_archive(callback: CallbackQuery) -> None:
 
     board_id = int(parts[0])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings) as service:
+        allowed = await service.access.ensure_superadmin()
+        board = await service.boards.archive_board(board_id=board_id) if allowed else None
 
-        board = service.boards.archive_board(board_id=board_id)
-        if board is None:
-            await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
-            return
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
+
+    if board is None:
+        await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer()
     await _safe_edit_text(message, 
@@ -230,15 +285,17 @@ async def admin_board_activate(callback: CallbackQuery) -> None:
 
     board_id = int(parts[0])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings) as service:
+        allowed = await service.access.ensure_superadmin()
+        board = await service.boards.activate_board(board_id=board_id) if allowed else None
 
-        board = service.boards.activate_board(board_id=board_id)
-        if board is None:
-            await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
-            return
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
+
+    if board is None:
+        await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer()
     await _safe_edit_text(message, 
@@ -259,12 +316,14 @@ async def admin_add_role_super(callback: CallbackQuery) -> None:
 
     target_user_id = int(parts[0])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings) as service:
+        allowed = await service.access.ensure_superadmin()
+        if allowed:
+            await service.roles.grant_superadmin(target_user_id)
 
-        service.roles.grant_superadmin(target_user_id)
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer(t("admin_role_granted", locale=settings.default_locale), show_alert=True)
 
@@ -282,12 +341,13 @@ async def admin_add_role_board_choose(callback: CallbackQuery) -> None:
 
     target_user_id = int(parts[0])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings, read_only=True) as service:
+        allowed = await service.access.ensure_superadmin()
+        boards = await service.access.active_manageable_boards() if allowed else []
 
-        boards = service.access.active_manageable_boards()
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer()
     await _safe_edit_text(message, 
@@ -313,15 +373,21 @@ async def admin_add_role_board_save(callback: CallbackQuery) -> None:
     target_user_id = int(parts[0])
     board_id = int(parts[1])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings) as service:
+        allowed = await service.access.ensure_superadmin()
+        board = (
+            await service.roles.grant_board_admin(target_user_id=target_user_id, board_id=board_id)
+            if allowed
+            else None
+        )
 
-        board = service.roles.grant_board_admin(target_user_id=target_user_id, board_id=board_id)
-        if board is None:
-            await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
-            return
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
+
+    if board is None:
+        await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer(t("admin_role_granted", locale=settings.default_locale), show_alert=True)
 
@@ -338,12 +404,14 @@ async def admin_remove_role_super(callback: CallbackQuery) -> None:
 
     target_user_id = int(parts[0])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings) as service:
+        allowed = await service.access.ensure_superadmin()
+        if allowed:
+            await service.roles.revoke_superadmin(target_user_id)
 
-        service.roles.revoke_superadmin(target_user_id)
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer(t("admin_role_removed", locale=settings.default_locale), show_alert=True)
 
@@ -361,11 +429,13 @@ async def admin_remove_role_board_choose(callback: CallbackQuery) -> None:
 
     target_user_id = int(parts[0])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
-        boards = service.access.manageable_boards(include_archived=True)
+    async with admin_service_scope(callback.from_user, settings, read_only=True) as service:
+        allowed = await service.access.ensure_superadmin()
+        boards = await service.access.manageable_boards(include_archived=True) if allowed else []
+
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer()
     await _safe_edit_text(message, 
@@ -391,12 +461,14 @@ async def admin_remove_role_board_save(callback: CallbackQuery) -> None:
     target_user_id = int(parts[0])
     board_id = int(parts[1])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.ensure_superadmin():
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings) as service:
+        allowed = await service.access.ensure_superadmin()
+        if allowed:
+            await service.roles.revoke_board_admin(target_user_id=target_user_id, board_id=board_id)
 
-        service.roles.revoke_board_admin(target_user_id=target_user_id, board_id=board_id)
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer(t("admin_role_removed", locale=settings.default_locale), show_alert=True)
 
@@ -414,15 +486,21 @@ async def admin_block_user(callback: CallbackQuery) -> None:
     target_user_id = int(parts[0])
     board_id = int(parts[1])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.can_manage_board(board_id):
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings) as service:
+        allowed = await service.access.can_manage_board(board_id)
+        board = (
+            await service.moderation.block_user(target_user_id=target_user_id, board_id=board_id)
+            if allowed
+            else None
+        )
 
-        board = service.moderation.block_user(target_user_id=target_user_id, board_id=board_id)
-        if board is None:
-            await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
-            return
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
+
+    if board is None:
+        await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer(
         t(
@@ -448,15 +526,21 @@ async def admin_unblock_user(callback: CallbackQuery) -> None:
     target_user_id = int(parts[0])
     board_id = int(parts[1])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.can_manage_board(board_id):
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings) as service:
+        allowed = await service.access.can_manage_board(board_id)
+        board = (
+            await service.moderation.unblock_user(target_user_id=target_user_id, board_id=board_id)
+            if allowed
+            else None
+        )
 
-        board = service.moderation.unblock_user(target_user_id=target_user_id, board_id=board_id)
-        if board is None:
-            await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
-            return
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
+
+    if board is None:
+        await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
+        return
 
     await callback.answer(
         t(
@@ -482,15 +566,17 @@ async def admin_rate_limit_choose_board(callback: CallbackQuery, state: FSMConte
 
     board_id = int(parts[0])
 
-    with admin_service_scope(callback.from_user, settings) as service:
-        if not service.access.can_manage_board(board_id):
-            await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
-            return
+    async with admin_service_scope(callback.from_user, settings, read_only=True) as service:
+        allowed = await service.access.can_manage_board(board_id)
+        board = await service.boards.get_board(board_id) if allowed else None
 
-        board = service.boards.get_board(board_id)
-        if board is None:
-            await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
-            return
+    if not allowed:
+        await callback.answer(t("admin_denied", locale=settings.default_locale), show_alert=True)
+        return
+
+    if board is None:
+        await callback.answer(t("board_not_found", locale=settings.default_locale), show_alert=True)
+        return
 
     await state.set_state(RateLimitStates.waiting_seconds)
     await state.update_data(rate_limit_board_id=board_id)
@@ -18,8 +18,8 @@ async def _send_board_picker(message: Message, text: str) -> None:
     if message.from_user is None:
         return
 
-    with user_service_scope(message.from_user) as service:
-        board_picker = service.board_picker_view()
+    async with user_service_scope(message.from_user, read_only=True) as service:
+        board_picker = await service.board_picker_view()
 
     await message.answer(
         text,
@@ -97,6 +97,16 @@ async def text_messages(message: Message) -> None:
         await message.answer(t("publish_error", locale=settings.default_locale))
         return
 
+    if result.status == "queued":
+        await message.answer(
+            t(
+                "publish_queued",
+                locale=settings.default_locale,
+                title=result.board_title,
+            )
+        )
+        return
+
     await message.answer(
         t(
             "publish_success",
@@ -14,6 +14,16 @@ def admin_panel_keyboard() -> InlineKeyboardMarkup:
     )
 
 
+def audit_page_keyboard(board_id: int | None, next_cursor: str | None) -> InlineKeyboardMarkup | None:
+    if next_cursor is None:
+        return None
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="Дальше ▶", callback_data=f"admin:audit:{board_id or 0}:{next_cursor}")],
+        ]
+    )
+
+
 def admin_boards_keyboard(boards: list[Board]) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = []
     for board in boards:
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-from app.db.models import Board
+from app.services.boards import BoardSnapshot
 
 
-def board_picker_keyboard(boards: list[Board], selected_board_id: int | None = None) -> InlineKeyboardMarkup:
+def board_picker_keyboard(boards: Sequence[BoardSnapshot], selected_board_id: int | None = None) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = []
     row: list[InlineKeyboardButton] = []
 
@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from typing import Any
+from collections.abc import Iterable, Mapping, Sequence
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from app.db.repositories import AuditEntry, BoardStats
+    from app.services.board_transfer import ImportIssue
+    from app.services.boards import BoardSnapshot
+    from app.services.outbound import OutboundStats
 
 RU_MESSAGES = {
     "welcome": "Привет! Я публикую анонимные сообщения в доски. Выбери доску ниже.",
@@ -18,6 +25,7 @@ RU_MESSAGES = {
     "post_too_long": "Сообщение слишком длинное. Максимум: {limit} символов.",
     "publish_success": "Сообщение опубликовано в «{title}».",
     "publish_error": "Не удалось отправить сообщение в канал. Попробуйте позже.",
+    "publish_queued": "Канал сейчас недоступен. Сообщение в очереди и будет опубликовано в «{title}» автоматически.",
     "unknown_command": "Не понял команду. Используй /help.",
     "admin_denied": "Недостаточно прав для этого действия.",
     "admin_panel": "Админ-панель. Выберите раздел:",
@@ -34,6 +42,17 @@ RU_MESSAGES = {
     "admin_enter_board_title": "Введите название новой доски.",
     "admin_enter_board_channel": "Введите channel id или @channel_username.",
     "admin_board_created": "Доска создана: <b>{title}</b> (ID {board_id}).",
+    "admin_boards_import_prompt": (
+        "Отправьте CSV или JSON-файл с досками. Обязательные колонки: title, channel_id; "
+        "необязательные: slug, rate_limit_seconds, max_text_length, rate_limit_burst, is_active, admins."
+    ),
+    "admin_boards_import_too_large": "Файл слишком большой. Максимум: {limit} байт.",
+    "admin_boards_import_invalid": "Файл не загружен, исправьте ошибки и отправьте снова:",
+    "admin_boards_import_issue": "запись {position}: поле {field}",
+    "admin_boards_import_document_issue": "файл: {field}",
+    "admin_boards_import_more": "… и ещё {count}",
+    "admin_boards_imported": "Импорт завершён. Создано: {created}, обновлено: {updated}, пропущено: {skipped}.",
+    "admin_boards_exported": "Досок в файле: {count}.",
     "admin_board_archived": "Доска «{title}» архивирована.",
     "admin_board_activated": "Доска «{title}» активирована.",
     "admin_enter_user_id": "Введите Telegram user_id.",
@@ -43,8 +62,12 @@ RU_MESSAGES = {
     "admin_user_blocked": "Пользователь {user_id} заблокирован в доске «{title}».",
     "admin_user_unblocked": "Пользователь {user_id} разблокирован в доске «{title}».",
     "admin_rate_limit_choose_board": "Выберите доску для изменения лимита.",
-    "admin_rate_limit_enter_seconds": "Введите новый лимит в секундах (например 120).",
+    "admin_rate_limit_enter_seconds": (
+        "Введите новый лимит в секундах (например 120). "
+        "Чтобы разрешить несколько постов подряд, добавьте их число: 120 3."
+    ),
     "admin_rate_limit_updated": "Для доски «{title}» лимит установлен: {seconds} сек.",
+    "admin_rate_limit_updated_burst": "Для доски «{title}» лимит установлен: {seconds} сек, до {burst} постов подряд.",
     "admin_stats": (
         "<b>Статистика</b>\n"
         "Пользователей: {users}\n"
@@ -53,8 +76,26 @@ RU_MESSAGES = {
         "Постов всего: {posts_total}\n"
         "Активных постов: {posts_active}"
     ),
+    "admin_outbound_stats": (
+        "Очередь отправки: {queued} (публикаций {queued_publishes}), "
+        "ожидание в среднем {wait_avg:.1f} с, максимум {wait_max:.1f} с, повторов после flood control: {retried}"
+    ),
+    "admin_user_sync_stats": (
+        "Кэш профилей: {size} пользователей, без обращения к базе {hits}, "
+        "с проверкой в базе {misses}, из них обновлено {writes}"
+    ),
+    "admin_board_stats_header": "<b>По доскам</b>",
+    "admin_board_stats_line": (
+        "«{title}»: постов {posts} (активных {active_posts}, за 24 ч {posts_24h}), "
+        "участников {members} (заблокировано {blocked_members})"
+    ),
+    "admin_audit_header": "<b>Журнал действий</b>",
+    "admin_audit_line": "<code>{created_at:%Y-%m-%d %H:%M}</code> {action} · {actor_user_id} → {target_type} {target_id}",
+    "admin_audit_board": " · доска {board_id}",
+    "admin_audit_empty": "В журнале пока нет записей.",
     "invalid_user_id": "Некорректный user_id. Нужен только числовой ID.",
     "invalid_number": "Некорректное число.",
+    "invalid_export_format": "Формат выгрузки: csv или json.",
     "action_cancelled": "Действие отменено.",
 }
 
@@ -65,3 +106,80 @@ def t(key: str, locale: str = "ru", **kwargs: Any) -> str:
     messages = LOCALES.get(locale, RU_MESSAGES)
     template = messages.get(key, key)
     return template.format(**kwargs)
+
+
+def board_stats_text(items: Iterable[tuple[BoardSnapshot, BoardStats]], locale: str = "ru") -> str:
+    lines = [
+        t(
+            "admin_board_stats_line",
+            locale=locale,
+            title=board.title,
+            posts=stats.posts,
+            active_posts=stats.active_posts,
+            posts_24h=stats.posts_24h,
+            members=stats.members,
+            blocked_members=stats.blocked_members,
+        )
+        for board, stats in items
+    ]
+    if not lines:
+        return ""
+    return "\n".join([t("admin_board_stats_header", locale=locale), *lines])
+
+
+def admin_stats_text(
+    counters: Mapping[str, int],
+    board_stats: Iterable[tuple[BoardSnapshot, BoardStats]],
+    outbound: OutboundStats,
+    user_sync: Mapping[str, int],
+    locale: str = "ru",
+) -> str:
+    """The stats screen shared by ``/stats`` and the admin panel button."""
+    text = "\n".join(
+        [
+            t("admin_stats", locale=locale, **counters),
+            t(
+                "admin_outbound_stats",
+                locale=locale,
+                queued=outbound.queued,
+                queued_publishes=outbound.queued_publishes,
+                wait_avg=outbound.wait_avg_seconds,
+                wait_max=outbound.wait_max_seconds,
+                retried=outbound.retried,
+            ),
+            t("admin_user_sync_stats", locale=locale, **user_sync),
+        ]
+    )
+    details = board_stats_text(board_stats, locale=locale)
+    return f"{text}\n\n{details}" if details else text
+
+
+def audit_page_text(entries: Iterable[AuditEntry], locale: str = "ru") -> str:
+    lines = [
+        t(
+            "admin_audit_line",
+            locale=locale,
+            created_at=entry.created_at,
+            action=entry.action,
+            actor_user_id=entry.actor_user_id,
+            target_type=entry.target_type,
+            target_id=entry.target_id or "",
+        )
+        + (t("admin_audit_board", locale=locale, board_id=entry.board_id) if entry.board_id is not None else "")
+        for entry in entries
+    ]
+    if not lines:
+        return t("admin_audit_empty", locale=locale)
+    return "\n".join([t("admin_audit_header", locale=locale), *lines])
+
+
+def import_issues_text(issues: Sequence[ImportIssue], locale: str = "ru", limit: int = 20) -> str:
+    lines = [
+        t("admin_boards_import_issue", locale=locale, position=issue.position, field=issue.field)
+        if issue.position
+        else t("admin_boards_import_document_issue", locale=locale, field=issue.field)
+        for issue in issues[:limit]
+    ]
+    if len(issues) > limit:
+        lines.append(t("admin_boards_import_more", locale=locale, count=len(issues) - limit))
+    return "\n".join([t("admin_boards_import_invalid", locale=locale), *lines])
@@ -1,41 +1,77 @@
 from __future__ import annotations
 
 import asyncio
+from pathlib import Path
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 from app.config import get_settings
-from app.db.session import init_db
+from app.db.repositories import Repository
+from app.db.session import init_db, read_session_scope
 from app.handlers import admin, callbacks, user
+from app.services.archival import run_archival_job
+from app.services.audit import audit_sink, run_audit_retention_job
+from app.services.outbound import OutboundRequestMiddleware, outbound_scheduler
+from app.services.outbox import outbox_dispatcher
+from app.services.rate_limit import rebuild_rate_limiter
 from app.utils.logging import setup_logging
+from app.webhook import run_webhook
+
+UPDATE_MODES = ("polling", "webhook")
 
 
 async def run_bot() -> None:
     settings = get_settings()
     if not settings.bot_token:
         raise RuntimeError("BOT_TOKEN is not configured")
+    if settings.update_mode not in UPDATE_MODES:
+        raise RuntimeError(f"UPDATE_MODE must be one of {', '.join(UPDATE_MODES)}")
 
     setup_logging(settings.log_level)
-    init_db()
+    await init_db()
+    async with read_session_scope() as session:
+        await rebuild_rate_limiter(Repository(session), set(settings.superadmin_ids))
+    await audit_sink.start(Path(settings.audit_journal_path))
 
     bot = Bot(
         token=settings.bot_token,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
+    bot.session.middleware(
+        OutboundRequestMiddleware(
+            outbound_scheduler,
+            max_retries=settings.outbound_max_retries,
+            max_retry_after=settings.outbound_max_retry_after,
+        )
+    )
 
     dispatcher = Dispatcher()
     dispatcher.include_router(admin.router)
     dispatcher.include_router(callbacks.router)
     dispatcher.include_router(user.router)
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dispatcher.start_polling(
-        bot,
-        allowed_updates=dispatcher.resolve_used_update_types(),
-        polling_timeout=settings.polling_timeout,
-    )
+    archival = asyncio.create_task(run_archival_job(settings)) if settings.post_archive_after_days > 0 else None
+    retention = asyncio.create_task(run_audit_retention_job(settings)) if settings.audit_retention_months > 0 else None
+    await outbox_dispatcher.start(bot)
+    try:
+        if settings.update_mode == "webhook":
+            await run_webhook(dispatcher, bot, settings)
+        else:
+            await bot.delete_webhook(drop_pending_updates=settings.drop_pending_updates)
+            await dispatcher.start_polling(
+                bot,
+                allowed_updates=dispatcher.resolve_used_update_types(),
+                polling_timeout=settings.polling_timeout,
+            )
+    finally:
+        for job in (archival, retention):
+            if job is not None:
+                job.cancel()
+        await outbox_dispatcher.stop()
+        await outbound_scheduler.stop()
+        await audit_sink.stop()
 
 
 def run() -> None:
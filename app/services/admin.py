@@ -1,13 +1,89 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass, field
+from datetime import timedelta
+from functools import cached_property
 
 from aiogram.types import User as TelegramUser
 
-from app.config import Settings
-from app.db.models import Board, User
-from app.db.repositories import Repository
+from app.config import Settings, get_settings
+from app.db.models import AdminRole, Board
+from app.db.repositories import (
+    ROLE_BOARD_ADMIN,
+    ROLE_SUPERADMIN,
+    AuditCursor,
+    AuditEntry,
+    BoardStats,
+    NewBoard,
+    Repository,
+    SlugTakenError,
+)
+from app.db.session import on_commit
+from app.services.audit import audit_sink
+from app.services.board_transfer import BoardImportError, BoardRecord, ImportIssue
+from app.services.boards import BoardSnapshot, board_catalog
+from app.services.rate_limit import rate_limiter
 from app.services.users import sync_telegram_user
+from app.utils.cache import SingleFlightCache, TTLCache
+from app.utils.time import utc_now
+
+
+@dataclass(frozen=True)
+class Permissions:
+    """Immutable snapshot of one user's admin roles."""
+
+    user_id: int
+    is_superadmin: bool
+    board_ids: frozenset[int]
+
+    @classmethod
+    def from_roles(cls, user_id: int, roles: Iterable[AdminRole], bootstrap_superadmins: frozenset[int]) -> Permissions:
+        is_superadmin = user_id in bootstrap_superadmins
+        board_ids: set[int] = set()
+        for role in roles:
+            if role.role == ROLE_SUPERADMIN:
+                is_superadmin = True
+            elif role.role == ROLE_BOARD_ADMIN and role.board_id is not None:
+                board_ids.add(role.board_id)
+        return cls(user_id=user_id, is_superadmin=is_superadmin, board_ids=frozenset(board_ids))
+
+    @property
+    def is_any_admin(self) -> bool:
+        return self.is_superadmin or bool(self.board_ids)
+
+    def can_manage_board(self, board_id: int | None) -> bool:
+        if board_id is None:
+            return False
+        return self.is_superadmin or board_id in self.board_ids
+
+
+_settings = get_settings()
+# Shared by every update of the process; AdminRoleService drops entries on grant/revoke.
+permissions_cache: TTLCache[int, Permissions] = TTLCache(
+    maxsize=_settings.role_cache_size,
+    ttl=_settings.role_cache_ttl_seconds,
+)
+
+# Stats of all boards are computed together and filtered per admin, so every
+# admin shares one computation per TTL window.
+board_stats_cache: SingleFlightCache[str, dict[int, BoardStats]] = SingleFlightCache(
+    maxsize=1,
+    ttl=_settings.board_stats_ttl_seconds,
+)
+_BOARD_STATS_KEY = "boards"
+AUDIT_PAGE_SIZE = 10
+
+
+def invalidate_permissions(repo: Repository, user_id: int) -> None:
+    """Forget cached roles of ``user_id`` now and again once the change commits.
+
+    The second pop covers a concurrent update that reloads the old roles before commit.
+    """
+    permissions_cache.pop(user_id)
+    on_commit(repo.session, lambda: permissions_cache.pop(user_id))
+    # New admins are exempt from rate limits; stale buckets would still reject them.
+    on_commit(repo.session, lambda: rate_limiter.forget_user(user_id))
 
 
 @dataclass
@@ -15,75 +91,102 @@ class AdminContext:
     repo: Repository
     settings: Settings
     tg_user: TelegramUser
-    _actor: User | None = field(default=None, init=False, repr=False)
+    _actor_synced: bool = field(default=False, init=False, repr=False)
+    _permissions: Permissions | None = field(default=None, init=False, repr=False)
 
-    @property
-    def bootstrap_superadmins(self) -> set[int]:
-        return set(self.settings.superadmin_ids)
+    @cached_property
+    def bootstrap_superadmins(self) -> frozenset[int]:
+        return frozenset(self.settings.superadmin_ids)
 
-    @property
-    def actor(self) -> User:
-        if self._actor is None:
-            self._actor = sync_telegram_user(self.repo, self.tg_user)
-        return self._actor
+    async def actor_id(self) -> int:
+        if not self._actor_synced:
+            await sync_telegram_user(self.repo, self.tg_user)
+            self._actor_synced = True
+        return self.tg_user.id
+
+    async def permissions(self) -> Permissions:
+        if self._permissions is None:
+            self._permissions = permissions_cache.get(self.tg_user.id)
+        if self._permissions is None:
+            roles = await self.repo.list_admin_roles(self.tg_user.id)
+            self._permissions = Permissions.from_roles(self.tg_user.id, roles, self.bootstrap_superadmins)
+            permissions_cache.set(self.tg_user.id, self._permissions)
+        return self._permissions
 
 
 @dataclass
 class AdminAccessService:
     context: AdminContext
 
-    def ensure_any_admin(self) -> bool:
-        return self.context.repo.is_any_admin(
-            user_id=self.context.actor.id,
-            bootstrap_superadmins=self.context.bootstrap_superadmins,
-        )
+    async def ensure_any_admin(self) -> bool:
+        return (await self.context.permissions()).is_any_admin
 
-    def ensure_superadmin(self) -> bool:
-        return self.context.repo.is_superadmin(
-            user_id=self.context.actor.id,
-            bootstrap_superadmins=self.context.bootstrap_superadmins,
-        )
+    async def ensure_superadmin(self) -> bool:
+        return (await self.context.permissions()).is_superadmin
 
-    def can_manage_board(self, board_id: int | None) -> bool:
-        return self.context.repo.is_board_admin(
-            user_id=self.context.actor.id,
-            board_id=board_id,
-            bootstrap_superadmins=self.context.bootstrap_superadmins,
-        )
+    async def can_manage_board(self, board_id: int | None) -> bool:
+        return (await self.context.permissions()).can_manage_board(board_id)
 
-    def manageable_boards(self, *, include_archived: bool = False) -> list[Board]:
-        return self.context.repo.list_manageable_boards(
-            user_id=self.context.actor.id,
-            bootstrap_superadmins=self.context.bootstrap_superadmins,
-            include_archived=include_archived,
-        )
+    async def manageable_boards(self, *, include_archived: bool = False) -> list[Board]:
+        permissions = await self.context.permissions()
+        if not permissions.is_any_admin:
+            return []
+
+        boards = await self.context.repo.list_boards(include_archived=include_archived)
+        return [board for board in boards if permissions.can_manage_board(board.id)]
+
+    async def active_manageable_boards(self) -> list[Board]:
+        return await self.manageable_boards(include_archived=False)
+
+    async def inactive_manageable_boards(self) -> list[Board]:
+        return [board for board in await self.manageable_boards(include_archived=True) if not board.is_active]
 
-    def active_manageable_boards(self) -> list[Board]:
-        return self.manageable_boards(include_archived=False)
 
-    def inactive_manageable_boards(self) -> list[Board]:
-        return [board for board in self.manageable_boards(include_archived=True) if not board.is_active]
+@dataclass(frozen=True)
+class BoardImportResult:
+    created: int
+    updated: int
+    skipped: int
 
 
 @dataclass
 class AdminBoardService:
     context: AdminContext
 
-    def stats(self) -> dict[str, int]:
-        return self.context.repo.stats()
+    async def stats(self) -> dict[str, int]:
+        return await self.context.repo.stats()
 
-    def get_board(self, board_id: int) -> Board | None:
-        return self.context.repo.get_board(board_id)
+    async def board_stats(self) -> list[tuple[BoardSnapshot, BoardStats]]:
+        """Per-board counters of every board the actor manages, at most ``board_stats_ttl_seconds`` old."""
+        permissions = await self.context.permissions()
+        if not permissions.is_any_admin:
+            return []
 
-    def create_board(self, title: str, channel_id: str) -> Board:
-        board = self.context.repo.create_board(
+        repo = self.context.repo
+        stats = await board_stats_cache.get(
+            _BOARD_STATS_KEY,
+            lambda: repo.board_stats(recent_since=utc_now() - timedelta(hours=24)),
+        )
+        return [
+            (board, stats.get(board.id) or BoardStats(board_id=board.id))
+            for board in await board_catalog.all_boards(repo)
+            if permissions.can_manage_board(board.id)
+        ]
+
+    async def get_board(self, board_id: int) -> Board | None:
+        return await self.context.repo.get_board(board_id)
+
+    async def create_board(self, title: str, channel_id: str) -> Board:
+        board = await self.context.repo.create_board(
             title=title,
             channel_id=channel_id,
             rate_limit_seconds=self.context.settings.default_rate_limit_seconds,
             max_text_length=self.context.settings.default_max_text_length,
         )
-        self.context.repo.write_audit(
-            actor_user_id=self.context.actor.id,
+        on_commit(self.context.repo.session, board_catalog.invalidate)
+        audit_sink.record(
+            self.context.repo.session,
+            actor_user_id=await self.context.actor_id(),
             action="board_create",
             target_type="board",
             target_id=str(board.id),
@@ -92,34 +195,158 @@ class AdminBoardService:
         )
         return board
 
-    def archive_board(self, board_id: int) -> Board | None:
-        return self._set_board_active(board_id=board_id, is_active=False)
-
-    def activate_board(self, board_id: int) -> Board | None:
-        return self._set_board_active(board_id=board_id, is_active=True)
-
-    def update_rate_limit(self, board_id: int, seconds: int) -> Board | None:
-        board = self.context.repo.update_board_rate_limit(board_id=board_id, seconds=seconds)
+    async def export_boards(self) -> list[BoardRecord]:
+        repo = self.context.repo
+        bursts = await repo.list_rate_bursts()
+        admins = await repo.list_board_admin_ids()
+        return [
+            BoardRecord(
+                slug=board.slug,
+                title=board.title,
+                channel_id=board.channel_id,
+                rate_limit_seconds=board.rate_limit_seconds,
+                max_text_length=board.max_text_length,
+                rate_limit_burst=bursts.get(board.id, 1),
+                is_active=board.is_active,
+                admins=tuple(admins.get(board.id, ())),
+            )
+            for board in sorted(await repo.list_boards(include_archived=True), key=lambda board: board.id or 0)
+        ]
+
+    async def import_boards(self, records: Sequence[BoardRecord]) -> BoardImportResult:
+        """Create or update boards from ``records`` in the current transaction.
+
+        A record matches an existing board by slug, then by channel. Missing
+        fields keep the current value, or the configured default for new
+        boards, which keep the record's slug when it has one. Listed admins
+        are granted; admins not listed keep their role. A new board whose
+        slug is taken raises BoardImportError; the caller rolls the whole
+        import back.
+        """
+        repo = self.context.repo
+        settings = self.context.settings
+        boards = sorted(await repo.list_boards(include_archived=True), key=lambda board: board.id or 0)
+        bursts = await repo.list_rate_bursts()
+        admins = await repo.list_board_admin_ids()
+        by_slug = {board.slug: board for board in boards}
+        by_channel: dict[str, Board] = {}
+        for board in boards:
+            by_channel.setdefault(board.channel_id, board)
+
+        matched: set[int] = set()
+        new_records: list[tuple[int, BoardRecord]] = []
+        changes: list[tuple[Board, dict[str, object]]] = []
+        new_bursts: dict[int, int] = {}
+        grants: list[tuple[int, int]] = []
+        updated = skipped = 0
+        for position, record in enumerate(records, start=1):
+            board = by_slug.get(record.slug) if record.slug else None
+            board = board or by_channel.get(record.channel_id)
+            if board is None:
+                new_records.append((position, record))
+                continue
+            if board.id is None or board.id in matched:
+                skipped += 1
+                continue
+            matched.add(board.id)
+
+            fields = {
+                name: value
+                for name in ("title", "channel_id", "rate_limit_seconds", "max_text_length", "is_active")
+                if (value := getattr(record, name)) is not None and value != getattr(board, name)
+            }
+            if fields:
+                changes.append((board, fields))
+            if record.rate_limit_burst is not None and record.rate_limit_burst != bursts.get(board.id, 1):
+                new_bursts[board.id] = record.rate_limit_burst
+            board_grants = [(user_id, board.id) for user_id in record.admins if user_id not in admins.get(board.id, ())]
+            grants.extend(board_grants)
+            if fields or board.id in new_bursts or board_grants:
+                updated += 1
+            else:
+                skipped += 1
+
+        try:
+            created = await repo.create_boards(
+                [
+                    NewBoard(
+                        title=record.title,
+                        channel_id=record.channel_id,
+                        rate_limit_seconds=record.rate_limit_seconds or settings.default_rate_limit_seconds,
+                        max_text_length=record.max_text_length or settings.default_max_text_length,
+                        slug=record.slug,
+                    )
+                    for _, record in new_records
+                ]
+            )
+        except SlugTakenError as error:
+            clashes = set(error.slugs)
+            raise BoardImportError(
+                [ImportIssue(position, "slug") for position, record in new_records if record.slug in clashes]
+            ) from None
+        for board, (_, record) in zip(created, new_records):
+            if board.id is None:
+                continue
+            if record.is_active is False:
+                changes.append((board, {"is_active": False}))
+            if record.rate_limit_burst is not None and record.rate_limit_burst != 1:
+                new_bursts[board.id] = record.rate_limit_burst
+            grants.extend((user_id, board.id) for user_id in record.admins)
+
+        await repo.update_boards(changes)
+        await repo.set_board_rate_bursts(new_bursts)
+        await repo.grant_board_admins(grants)
+        for user_id in {user_id for user_id, _ in grants}:
+            invalidate_permissions(repo, user_id)
+
+        result = BoardImportResult(created=len(created), updated=updated, skipped=skipped)
+        if result.created or result.updated:
+            on_commit(repo.session, board_catalog.invalidate)
+            audit_sink.record(
+                repo.session,
+                actor_user_id=await self.context.actor_id(),
+                action="board_import",
+                target_type="board",
+                metadata={"created": result.created, "updated": result.updated, "skipped": result.skipped},
+            )
+        return result
+
+    async def archive_board(self, board_id: int) -> Board | None:
+        return await self._set_board_active(board_id=board_id, is_active=False)
+
+    async def activate_board(self, board_id: int) -> Board | None:
+        return await self._set_board_active(board_id=board_id, is_active=True)
+
+    async def update_rate_limit(self, board_id: int, seconds: int, burst: int | None = None) -> Board | None:
+        board = await self.context.repo.update_board_rate_limit(board_id=board_id, seconds=seconds)
         if board is None:
             return None
-
-        self.context.repo.write_audit(
-            actor_user_id=self.context.actor.id,
+        metadata: dict[str, int] = {"rate_limit_seconds": seconds}
+        if burst is not None:
+            await self.context.repo.set_board_rate_burst(board_id=board_id, burst=burst)
+            metadata["rate_limit_burst"] = burst
+
+        on_commit(self.context.repo.session, board_catalog.invalidate)
+        audit_sink.record(
+            self.context.repo.session,
+            actor_user_id=await self.context.actor_id(),
             action="board_rate_limit_update",
             target_type="board",
             target_id=str(board_id),
             board_id=board_id,
-            metadata={"rate_limit_seconds": seconds},
+            metadata=metadata,
         )
         return board
 
-    def _set_board_active(self, board_id: int, *, is_active: bool) -> Board | None:
-        board = self.context.repo.set_board_active(board_id=board_id, is_active=is_active)
+    async def _set_board_active(self, board_id: int, *, is_active: bool) -> Board | None:
+        board = await self.context.repo.set_board_active(board_id=board_id, is_active=is_active)
         if board is None:
             return None
 
-        self.context.repo.write_audit(
-            actor_user_id=self.context.actor.id,
+        on_commit(self.context.repo.session, board_catalog.invalidate)
+        audit_sink.record(
+            self.context.repo.session,
+            actor_user_id=await self.context.actor_id(),
             action="board_activate" if is_active else "board_archive",
             target_type="board",
             target_id=str(board.id),
@@ -132,23 +359,27 @@ class AdminBoardService:
 class AdminRoleService:
     context: AdminContext
 
-    def grant_superadmin(self, target_user_id: int) -> None:
-        self.context.repo.grant_superadmin(target_user_id)
-        self.context.repo.write_audit(
-            actor_user_id=self.context.actor.id,
+    async def grant_superadmin(self, target_user_id: int) -> None:
+        await self.context.repo.grant_superadmin(target_user_id)
+        invalidate_permissions(self.context.repo, target_user_id)
+        audit_sink.record(
+            self.context.repo.session,
+            actor_user_id=await self.context.actor_id(),
             action="grant_superadmin",
             target_type="user",
             target_id=str(target_user_id),
         )
 
-    def grant_board_admin(self, target_user_id: int, board_id: int) -> Board | None:
-        board = self.context.repo.get_board(board_id)
+    async def grant_board_admin(self, target_user_id: int, board_id: int) -> Board | None:
+        board = await self.context.repo.get_board(board_id)
         if board is None:
             return None
 
-        self.context.repo.grant_board_admin(user_id=target_user_id, board_id=board_id)
-        self.context.repo.write_audit(
-            actor_user_id=self.context.actor.id,
+        await self.context.repo.grant_board_admin(user_id=target_user_id, board_id=board_id)
+        invalidate_permissions(self.context.repo, target_user_id)
+        audit_sink.record(
+            self.context.repo.session,
+            actor_user_id=await self.context.actor_id(),
             action="grant_board_admin",
             target_type="user",
             target_id=str(target_user_id),
@@ -156,19 +387,23 @@ class AdminRoleService:
         )
         return board
 
-    def revoke_superadmin(self, target_user_id: int) -> None:
-        self.context.repo.revoke_superadmin(target_user_id)
-        self.context.repo.write_audit(
-            actor_user_id=self.context.actor.id,
+    async def revoke_superadmin(self, target_user_id: int) -> None:
+        await self.context.repo.revoke_superadmin(target_user_id)
+        invalidate_permissions(self.context.repo, target_user_id)
+        audit_sink.record(
+            self.context.repo.session,
+            actor_user_id=await self.context.actor_id(),
             action="revoke_superadmin",
             target_type="user",
             target_id=str(target_user_id),
         )
 
-    def revoke_board_admin(self, target_user_id: int, board_id: int) -> None:
-        self.context.repo.revoke_board_admin(user_id=target_user_id, board_id=board_id)
-        self.context.repo.write_audit(
-            actor_user_id=self.context.actor.id,
+    async def revoke_board_admin(self, target_user_id: int, board_id: int) -> None:
+        await self.context.repo.revoke_board_admin(user_id=target_user_id, board_id=board_id)
+        invalidate_permissions(self.context.repo, target_user_id)
+        audit_sink.record(
+            self.context.repo.session,
+            actor_user_id=await self.context.actor_id(),
             action="revoke_board_admin",
             target_type="user",
             target_id=str(target_user_id),
@@ -180,21 +415,22 @@ class AdminRoleService:
 class AdminModerationService:
     context: AdminContext
 
-    def block_user(self, target_user_id: int, board_id: int) -> Board | None:
-        return self._set_user_blocked(target_user_id=target_user_id, board_id=board_id, blocked=True)
+    async def block_user(self, target_user_id: int, board_id: int) -> Board | None:
+        return await self._set_user_blocked(target_user_id=target_user_id, board_id=board_id, blocked=True)
 
-    def unblock_user(self, target_user_id: int, board_id: int) -> Board | None:
-        return self._set_user_blocked(target_user_id=target_user_id, board_id=board_id, blocked=False)
+    async def unblock_user(self, target_user_id: int, board_id: int) -> Board | None:
+        return await self._set_user_blocked(target_user_id=target_user_id, board_id=board_id, blocked=False)
 
-    def _set_user_blocked(self, target_user_id: int, board_id: int, *, blocked: bool) -> Board | None:
-        board = self.context.repo.get_board(board_id)
+    async def _set_user_blocked(self, target_user_id: int, board_id: int, *, blocked: bool) -> Board | None:
+        board = await self.context.repo.get_board(board_id)
         if board is None:
             return None
 
-        self.context.repo.sync_user(user_id=target_user_id, username=None, first_name=None, last_name=None)
-        self.context.repo.set_membership_blocked(user_id=target_user_id, board_id=board_id, blocked=blocked)
-        self.context.repo.write_audit(
-            actor_user_id=self.context.actor.id,
+        await self.context.repo.sync_user(user_id=target_user_id, username=None, first_name=None, last_name=None)
+        await self.context.repo.set_membership_blocked(user_id=target_user_id, board_id=board_id, blocked=blocked)
+        audit_sink.record(
+            self.context.repo.session,
+            actor_user_id=await self.context.actor_id(),
             action="block_user" if blocked else "unblock_user",
             target_type="user",
             target_id=str(target_user_id),
@@ -203,9 +439,45 @@ class AdminModerationService:
         return board
 
 
+@dataclass(frozen=True)
+class AuditPage:
+    entries: list[AuditEntry]
+    next_cursor: AuditCursor | None
+
+
+@dataclass
+class AdminAuditService:
+    context: AdminContext
+
+    async def page(self, board_id: int | None = None, before: AuditCursor | None = None) -> AuditPage | None:
+        """One page of the audit log, newest first; None when the actor may not see it.
+
+        Without ``board_id`` superadmins see every entry and board admins the
+        entries of their boards.
+        """
+        permissions = await self.context.permissions()
+        board_ids: frozenset[int] | None
+        if board_id is not None:
+            if not permissions.can_manage_board(board_id):
+                return None
+            board_ids = frozenset({board_id})
+        elif permissions.is_superadmin:
+            board_ids = None
+        elif permissions.board_ids:
+            board_ids = permissions.board_ids
+        else:
+            return None
+
+        # One extra row tells whether another page exists without a COUNT.
+        entries = await self.context.repo.list_audit_page(board_ids, before, AUDIT_PAGE_SIZE + 1)
+        next_cursor = entries[AUDIT_PAGE_SIZE - 1].cursor if len(entries) > AUDIT_PAGE_SIZE else None
+        return AuditPage(entries=entries[:AUDIT_PAGE_SIZE], next_cursor=next_cursor)
+
+
 @dataclass
 class AdminServices:
     access: AdminAccessService
     boards: AdminBoardService
     roles: AdminRoleService
     moderation: AdminModerationService
+    audit: AdminAuditService
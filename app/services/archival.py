@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from app.config import Settings
+from app.db.models import CompressionDictionary
+from app.db.repositories import Repository
+from app.db.session import session_scope
+from app.utils.compression import train_dictionary
+from app.utils.time import utc_now
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_old_posts(settings: Settings) -> int:
+    """Move posts archived more than ``post_archive_after_days`` ago into ``posts_archive``.
+
+    Every batch is its own short write transaction so publishing is never held
+    up behind the whole backlog. Returns the number of moved posts.
+    """
+    archived_before = utc_now() - timedelta(days=settings.post_archive_after_days)
+    moved = 0
+    while True:
+        async with session_scope() as session:
+            batch = await Repository(session).move_archived_posts(archived_before, settings.post_archive_batch_size)
+        moved += batch
+        if batch < settings.post_archive_batch_size:
+            return moved
+        await asyncio.sleep(0)
+
+
+async def train_compression_dictionary(sample_size: int) -> CompressionDictionary | None:
+    """Train a dictionary on the newest ``sample_size`` posts and make it the current one.
+
+    Returns None when there is nothing to learn from yet.
+    """
+    async with session_scope() as session:
+        repo = Repository(session)
+        samples = await repo.sample_post_texts(sample_size)
+        data = train_dictionary(samples)
+        if not data:
+            return None
+        return await repo.save_compression_dictionary(data, sample_count=len(samples))
+
+
+async def compress_archive(batch_size: int) -> int:
+    """Rewrite plain or outdated archive rows with the current dictionary.
+
+    Walks ``posts_archive`` by id in short transactions. Returns the number of
+    rewritten rows.
+    """
+    rewritten = 0
+    after_id = 0
+    while True:
+        async with session_scope() as session:
+            batch, last_id = await Repository(session).recompress_archived_posts(after_id, batch_size)
+        rewritten += batch
+        if last_id is None:
+            return rewritten
+        after_id = last_id
+        await asyncio.sleep(0)
+
+
+async def run_archival_job(settings: Settings) -> None:
+    """Run ``archive_old_posts`` every ``post_archive_interval_seconds`` until cancelled."""
+    while True:
+        try:
+            moved = await archive_old_posts(settings)
+        except Exception:
+            logger.exception("Post archival failed")
+        else:
+            if moved:
+                logger.info("Moved archived posts to cold storage", extra={"moved": moved})
+        await asyncio.sleep(settings.post_archive_interval_seconds)
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, TextIO
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import Settings, get_settings
+from app.db.audit_partitions import months_before
+from app.db.repositories import Repository
+from app.db.session import on_commit, session_scope
+from app.utils.time import utc_now
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AuditEvent:
+    actor_user_id: int
+    action: str
+    target_type: str
+    target_id: str | None
+    board_id: int | None
+    metadata_json: str | None
+    created_at: datetime
+
+    def to_journal_line(self) -> str:
+        return json.dumps({**asdict(self), "created_at": self.created_at.isoformat()}, ensure_ascii=False) + "\n"
+
+    @classmethod
+    def from_journal_line(cls, line: str) -> AuditEvent:
+        data = json.loads(line)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+
+class AuditSink:
+    """Buffers audit events and inserts them in batches outside request transactions.
+
+    ``record`` queues an event once the caller's transaction commits, so
+    rolled back actions are never audited. Queued events are appended to a
+    local journal until their batch is stored; the journal is replayed on the
+    next ``start`` after a crash. Delivery is at least once: a crash between a
+    batch commit and the journal rewrite replays that batch again.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.flushed = 0
+        self._pending: list[AuditEvent] = []
+        self._journal_path: Path | None = None
+        self._journal: TextIO | None = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    def record(
+        self,
+        session: AsyncSession,
+        *,
+        actor_user_id: int,
+        action: str,
+        target_type: str,
+        target_id: str | None = None,
+        board_id: int | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        event = AuditEvent(
+            actor_user_id=actor_user_id,
+            action=action,
+            target_type=target_type,
+            target_id=target_id,
+            board_id=board_id,
+            metadata_json=json.dumps(metadata, ensure_ascii=False, sort_keys=True) if metadata else None,
+            created_at=utc_now(),
+        )
+        on_commit(session, lambda: self._enqueue(event))
+
+    def _enqueue(self, event: AuditEvent) -> None:
+        if self._journal is not None:
+            self._journal.write(event.to_journal_line())
+            self._journal.flush()
+        self._pending.append(event)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Insert every queued event with executemany batches; return how many were stored."""
+        async with self._flush_lock:
+            stored = 0
+            while self._pending:
+                batch = self._pending[: self.batch_size]
+                async with session_scope() as session:
+                    await Repository(session).insert_audit_events([asdict(event) for event in batch])
+                # Events queued during the insert were appended after the batch.
+                del self._pending[: len(batch)]
+                self._rewrite_journal()
+                stored += len(batch)
+            self.flushed += stored
+            return stored
+
+    def _open_journal(self, path: Path) -> list[AuditEvent]:
+        events: list[AuditEvent] = []
+        if path.exists():
+            with path.open(encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        events.append(AuditEvent.from_journal_line(line))
+                    except (ValueError, TypeError, KeyError):
+                        # A torn last line from a crash mid-write.
+                        logger.warning("Skipping unreadable audit journal line", extra={"path": str(path)})
+        self._journal_path = path
+        self._journal = path.open("a", encoding="utf-8")
+        return events
+
+    def _rewrite_journal(self) -> None:
+        if self._journal is None or self._journal_path is None:
+            return
+        self._journal.close()
+        temporary = self._journal_path.with_suffix(self._journal_path.suffix + ".tmp")
+        with temporary.open("w", encoding="utf-8") as journal:
+            journal.writelines(event.to_journal_line() for event in self._pending)
+        os.replace(temporary, self._journal_path)
+        self._journal = self._journal_path.open("a", encoding="utf-8")
+
+    async def start(self, journal_path: Path) -> int:
+        """Replay ``journal_path`` into the database and start the background flusher.
+
+        Returns the number of replayed events.
+        """
+        self._wake = asyncio.Event()
+        replayed = self._open_journal(journal_path)
+        self._pending[:0] = replayed
+        await self.flush()
+        self._task = asyncio.create_task(self._run())
+        return len(replayed)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush audit events", extra={"pending": len(self._pending)})
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        finally:
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = None
+            self._journal_path = None
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self.flushed = 0
+        # Fresh primitives: the next user may run on a different event loop.
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+
+async def drop_expired_audit_partitions(settings: Settings) -> list[str]:
+    """Drop audit partitions of months older than ``audit_retention_months``; 0 keeps everything."""
+    if settings.audit_retention_months <= 0:
+        return []
+    async with session_scope() as session:
+        return await Repository(session).drop_audit_partitions(
+            months_before(utc_now(), settings.audit_retention_months)
+        )
+
+
+async def move_legacy_audit_logs(batch_size: int) -> int:
+    """Move rows of the unpartitioned ``audit_logs`` table into monthly partitions in short transactions."""
+    moved = 0
+    while True:
+        async with session_scope() as session:
+            batch = await Repository(session).move_legacy_audit_logs(batch_size)
+        moved += batch
+        if batch < batch_size:
+            return moved
+        await asyncio.sleep(0)
+
+
+async def run_audit_retention_job(settings: Settings) -> None:
+    """Run ``drop_expired_audit_partitions`` every ``audit_retention_interval_seconds`` until cancelled."""
+    while True:
+        try:
+            dropped = await drop_expired_audit_partitions(settings)
+        except Exception:
+            logger.exception("Audit retention failed")
+        else:
+            if dropped:
+                logger.info("Dropped expired audit partitions", extra={"partitions": dropped})
+        await asyncio.sleep(settings.audit_retention_interval_seconds)
+
+
+_settings = get_settings()
+audit_sink = AuditSink(batch_size=_settings.audit_batch_size, flush_interval=_settings.audit_flush_interval_seconds)
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+from collections.abc import AsyncGenerator, Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from aiogram.types import InputFile
+from slugify import slugify
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+EXPORT_FORMATS = ("csv", "json")
+EXPORT_FIELDS = (
+    "slug",
+    "title",
+    "channel_id",
+    "rate_limit_seconds",
+    "max_text_length",
+    "rate_limit_burst",
+    "is_active",
+    "admins",
+)
+_REQUIRED_FIELDS = ("title", "channel_id")
+_FIELD_LIMITS = {"slug": 64, "title": 128, "channel_id": 64}
+_TRUE = {"1", "true", "yes", "y", "да"}
+_FALSE = {"0", "false", "no", "n", "нет"}
+_ADMIN_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+@dataclass(frozen=True)
+class BoardRecord:
+    """One board of an import or export document; unset fields keep the current or default value."""
+
+    title: str
+    channel_id: str
+    slug: str | None = None
+    rate_limit_seconds: int | None = None
+    max_text_length: int | None = None
+    rate_limit_burst: int | None = None
+    is_active: bool | None = None
+    admins: tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class ImportIssue:
+    # 1-based data row of a CSV file or element of a JSON array; 0 for the whole document.
+    position: int
+    field: str
+
+
+class BoardImportError(ValueError):
+    def __init__(self, issues: list[ImportIssue]) -> None:
+        super().__init__(", ".join(f"{issue.position}:{issue.field}" for issue in issues))
+        self.issues = issues
+
+
+def parse_boards(data: bytes, filename: str | None = None) -> list[BoardRecord]:
+    """Read a CSV or JSON board document; raises BoardImportError listing every bad field.
+
+    JSON is either an array of board objects or ``{"boards": [...]}``. CSV needs
+    a header row with at least ``title`` and ``channel_id``.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise BoardImportError([ImportIssue(0, "encoding")]) from None
+
+    is_json = filename.lower().endswith(".json") if filename else text.lstrip()[:1] in ("[", "{")
+    rows = _json_rows(text) if is_json else _csv_rows(text)
+
+    records: list[BoardRecord] = []
+    issues: list[ImportIssue] = []
+    seen: dict[str, set[str]] = {"slug": set(), "channel_id": set()}
+    for position, row in enumerate(rows, start=1):
+        record, row_issues = _parse_row(position, row)
+        for key, values in seen.items():
+            value = getattr(record, key) if record is not None else None
+            if value is None:
+                continue
+            if value in values:
+                row_issues.append(ImportIssue(position, key))
+            values.add(value)
+        issues.extend(row_issues)
+        if record is not None:
+            records.append(record)
+    if issues:
+        raise BoardImportError(issues)
+    return records
+
+
+def _json_rows(text: str) -> list[Mapping[str, Any]]:
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError:
+        raise BoardImportError([ImportIssue(0, "json")]) from None
+    if isinstance(document, dict):
+        document = document.get("boards")
+    if not isinstance(document, list):
+        raise BoardImportError([ImportIssue(0, "boards")])
+    return [row if isinstance(row, dict) else {} for row in document]
+
+
+def _csv_rows(text: str) -> list[Mapping[str, Any]]:
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [name for name in _REQUIRED_FIELDS if name not in (reader.fieldnames or ())]
+    if missing:
+        raise BoardImportError([ImportIssue(0, name) for name in missing])
+    return list(reader)
+
+
+def _parse_row(position: int, row: Mapping[str, Any]) -> tuple[BoardRecord | None, list[ImportIssue]]:
+    issues: list[ImportIssue] = []
+
+    def text_field(name: str, *, required: bool = False) -> str | None:
+        value = row.get(name)
+        value = str(value).strip() if value is not None else ""
+        if not value:
+            if required:
+                issues.append(ImportIssue(position, name))
+            return None
+        if len(value) > _FIELD_LIMITS[name]:
+            issues.append(ImportIssue(position, name))
+            return None
+        return value
+
+    def positive_int(name: str) -> int | None:
+        value = row.get(name)
+        if value is None or value == "":
+            return None
+        if isinstance(value, bool) or not str(value).strip().isdigit() or int(value) <= 0:
+            issues.append(ImportIssue(position, name))
+            return None
+        return int(value)
+
+    def flag(name: str) -> bool | None:
+        value = row.get(name)
+        if value is None or value == "":
+            return None
+        if isinstance(value, bool):
+            return value
+        normalized = str(value).strip().lower()
+        if normalized in _TRUE:
+            return True
+        if normalized in _FALSE:
+            return False
+        issues.append(ImportIssue(position, name))
+        return None
+
+    def admin_ids() -> tuple[int, ...]:
+        value = row.get("admins")
+        if value is None or value == "":
+            return ()
+        items = value if isinstance(value, list) else _ADMIN_SEPARATORS.split(str(value).strip())
+        parsed: list[int] = []
+        for item in items:
+            if isinstance(item, bool) or not str(item).isdigit():
+                issues.append(ImportIssue(position, "admins"))
+                return ()
+            parsed.append(int(item))
+        return tuple(dict.fromkeys(parsed))
+
+    def slug_field() -> str | None:
+        value = text_field("slug")
+        # Only slugs the bot could have generated itself, so a link to one never needs escaping.
+        if value is not None and slugify(value) != value:
+            issues.append(ImportIssue(position, "slug"))
+            return None
+        return value
+
+    title = text_field("title", required=True)
+    channel_id = text_field("channel_id", required=True)
+    record_fields = {
+        "slug": slug_field(),
+        "rate_limit_seconds": positive_int("rate_limit_seconds"),
+        "max_text_length": positive_int("max_text_length"),
+        "rate_limit_burst": positive_int("rate_limit_burst"),
+        "is_active": flag("is_active"),
+        "admins": admin_ids(),
+    }
+    if title is None or channel_id is None:
+        return None, issues
+    return BoardRecord(title=title, channel_id=channel_id, **record_fields), issues
+
+
+class BoardExportFile(InputFile):
+    """Board configuration serialized row by row while it is uploaded."""
+
+    def __init__(self, records: Iterable[BoardRecord], export_format: str = "csv") -> None:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown board export format: {export_format}")
+        super().__init__(filename=f"boards.{export_format}")
+        self.records = tuple(records)
+        self.export_format = export_format
+
+    async def read(self, bot: Bot) -> AsyncGenerator[bytes]:
+        chunk = bytearray()
+        for piece in self._pieces():
+            chunk += piece.encode("utf-8")
+            if len(chunk) >= self.chunk_size:
+                yield bytes(chunk)
+                chunk.clear()
+        if chunk:
+            yield bytes(chunk)
+
+    def _pieces(self) -> Iterator[str]:
+        if self.export_format == "json":
+            yield "["
+            for index, record in enumerate(self.records):
+                row = _export_row(record)
+                row["admins"] = list(record.admins)
+                yield ("," if index else "") + "\n" + json.dumps(row, ensure_ascii=False)
+            yield "\n]\n"
+            return
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        for record in self.records:
+            row = _export_row(record)
+            row["admins"] = " ".join(map(str, record.admins))
+            row["is_active"] = int(bool(record.is_active))
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+
+def _export_row(record: BoardRecord) -> dict[str, Any]:
+    return {name: getattr(record, name) for name in EXPORT_FIELDS}
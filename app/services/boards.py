@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+from app.config import get_settings
+from app.db.models import Board
+from app.db.repositories import Repository
+
+
+@dataclass(frozen=True)
+class BoardSnapshot:
+    id: int
+    slug: str
+    title: str
+    channel_id: str
+    is_active: bool
+    rate_limit_seconds: int
+    max_text_length: int
+    rate_limit_burst: int = 1
+
+    @classmethod
+    def from_board(cls, board: Board, rate_limit_burst: int = 1) -> BoardSnapshot:
+        if board.id is None:
+            raise ValueError("board must be persisted before it is cached")
+        return cls(
+            id=board.id,
+            slug=board.slug,
+            title=board.title,
+            channel_id=board.channel_id,
+            is_active=board.is_active,
+            rate_limit_seconds=board.rate_limit_seconds,
+            max_text_length=board.max_text_length,
+            rate_limit_burst=rate_limit_burst,
+        )
+
+
+class BoardCatalog:
+    """In-memory copy of the boards table for user-facing lookups.
+
+    Board mutations bump ``version``; the next reader rebuilds the snapshot with
+    one query. Readers never see a half-built catalog: the tuple and the index
+    are swapped together. Mutations made by other processes are not seen
+    here; a ``ttl`` bounds how long the snapshot can miss them.
+    """
+
+    def __init__(self, ttl: float | None = None) -> None:
+        self.ttl = ttl
+        self.version = 0
+        self._built_version = -1
+        self._built_at = 0.0
+        self._boards: tuple[BoardSnapshot, ...] = ()
+        self._by_id: dict[int, BoardSnapshot] = {}
+        self._rebuild_lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self.version += 1
+
+    def clear(self) -> None:
+        self.invalidate()
+        self._boards = ()
+        self._by_id = {}
+
+    def _is_fresh(self) -> bool:
+        if self._built_version != self.version:
+            return False
+        return self.ttl is None or time.monotonic() - self._built_at < self.ttl
+
+    async def _current(self, repo: Repository) -> tuple[BoardSnapshot, ...]:
+        if self._is_fresh():
+            return self._boards
+
+        async with self._rebuild_lock:
+            if not self._is_fresh():
+                version = self.version
+                built_at = time.monotonic()
+                bursts = await repo.list_rate_bursts()
+                boards = tuple(
+                    BoardSnapshot.from_board(board, bursts.get(board.id, 1)) for board in await repo.list_boards()
+                )
+                self._boards = boards
+                self._by_id = {board.id: board for board in boards}
+                self._built_version = version
+                self._built_at = built_at
+        return self._boards
+
+    def peek(self, board_id: int | None) -> BoardSnapshot | None:
+        """Return the cached board without touching the database, or None if stale."""
+        if board_id is None or not self._is_fresh():
+            return None
+        return self._by_id.get(board_id)
+
+    async def all_boards(self, repo: Repository) -> list[BoardSnapshot]:
+        return list(await self._current(repo))
+
+    async def active_boards(self, repo: Repository) -> list[BoardSnapshot]:
+        return [board for board in await self._current(repo) if board.is_active]
+
+    async def get(self, repo: Repository, board_id: int | None) -> BoardSnapshot | None:
+        if board_id is None:
+            return None
+        await self._current(repo)
+        return self._by_id.get(board_id)
+
+
+board_catalog = BoardCatalog(ttl=get_settings().board_catalog_ttl_seconds)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Protocol
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+
+from app.config import Settings, get_settings
+from app.db.session import async_database_url
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOCK_BACKENDS = ("local", "file", "postgres")
+# Polling bounds for backends that cannot block without a thread.
+_POLL_MIN_SECONDS = 0.01
+_POLL_MAX_SECONDS = 0.2
+
+
+def _key_hash(key: str) -> int:
+    """Stable signed 64-bit hash of ``key``, the argument type of pg advisory locks."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class LockBackend(Protocol):
+    async def acquire(self, key: str) -> None: ...
+
+    async def release(self, key: str) -> None: ...
+
+
+class FileLockBackend:
+    """``flock`` on one of ``stripes`` files in ``directory``, for workers on one host.
+
+    Keys are hashed onto a fixed set of files so the directory never grows;
+    two keys sharing a stripe only ever wait for each other.
+    """
+
+    def __init__(self, directory: Path, stripes: int = 1024) -> None:
+        if fcntl is None:
+            raise RuntimeError("File locks need fcntl, which this platform does not have")
+        self.directory = directory
+        self.stripes = stripes
+        self._held: dict[str, int] = {}
+
+    async def acquire(self, key: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{_key_hash(key) % self.stripes}.lock"
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        delay = _POLL_MIN_SECONDS
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, _POLL_MAX_SECONDS)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._held[key] = fd
+
+    async def release(self, key: str) -> None:
+        fd = self._held.pop(key)
+        # Closing the descriptor drops the flock with it.
+        os.close(fd)
+
+
+class PostgresAdvisoryLockBackend:
+    """Session-level ``pg_advisory_lock`` held on a connection of its own.
+
+    Lock connections come from a pool of ``pool_size`` separate from the
+    sessions' pool: a holder opens sessions while it keeps its lock, so a
+    burst of holders sharing one pool could take every connection and then
+    wait for one forever. If the process dies, PostgreSQL drops the lock with
+    the connection.
+    """
+
+    def __init__(self, database_url: str, pool_size: int) -> None:
+        self.database_url = database_url
+        self.pool_size = pool_size
+        self._engine: AsyncEngine | None = None
+        self._held: dict[str, AsyncConnection] = {}
+
+    def _get_engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = create_async_engine(
+                async_database_url(self.database_url), pool_size=self.pool_size, max_overflow=0
+            )
+        return self._engine
+
+    async def acquire(self, key: str) -> None:
+        connection = await self._get_engine().connect()
+        try:
+            await connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _key_hash(key)})
+        except BaseException:
+            # A cancelled wait may still get the lock; dropping the connection drops it.
+            await connection.invalidate()
+            await connection.close()
+            raise
+        self._held[key] = connection
+
+    async def release(self, key: str) -> None:
+        connection = self._held.pop(key)
+        try:
+            await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _key_hash(key)})
+            await connection.rollback()
+        except Exception:
+            logger.exception("Failed to release advisory lock", extra={"key": key})
+            await connection.invalidate()
+        finally:
+            await connection.close()
+
+
+@dataclass
+class _Slot:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    refs: int = 0
+
+
+class LockManager:
+    """Per-key mutual exclusion that keeps only the locks currently in use.
+
+    A key's ``asyncio.Lock`` exists while someone holds or waits for it and is
+    dropped with the last reference, so the table stays as small as the
+    number of concurrent callers. With a ``backend`` the holder also takes
+    the cross-process lock for the key, after the local one: waiters of one
+    process queue locally and only one of them at a time contends across
+    processes. Waiting for the backend lock is bounded by ``timeout`` and
+    raises TimeoutError past it.
+    """
+
+    def __init__(self, backend: LockBackend | None = None, timeout: float | None = None) -> None:
+        self.backend = backend
+        self.timeout = timeout
+        self._slots: dict[str, _Slot] = {}
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _Slot()
+        slot.refs += 1
+        try:
+            async with slot.lock:
+                if self.backend is None:
+                    yield
+                    return
+                async with asyncio.timeout(self.timeout):
+                    await self.backend.acquire(key)
+                try:
+                    yield
+                finally:
+                    await self.backend.release(key)
+        finally:
+            slot.refs -= 1
+            if not slot.refs:
+                del self._slots[key]
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+def build_lock_backend(settings: Settings) -> LockBackend | None:
+    backend = settings.publish_lock_backend.lower()
+    if backend not in LOCK_BACKENDS:
+        raise RuntimeError(f"PUBLISH_LOCK_BACKEND must be one of {', '.join(LOCK_BACKENDS)}, got {backend!r}")
+    if backend == "file":
+        return FileLockBackend(Path(settings.publish_lock_dir))
+    if backend == "postgres":
+        if not make_url(settings.database_url).get_backend_name().startswith("postgres"):
+            raise RuntimeError("PUBLISH_LOCK_BACKEND=postgres needs a PostgreSQL DATABASE_URL")
+        return PostgresAdvisoryLockBackend(settings.database_url, settings.publish_lock_pool_size)
+    return None
+
+
+_settings = get_settings()
+publish_locks = LockManager(build_lock_backend(_settings), timeout=_settings.publish_lock_timeout_seconds)
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import TYPE_CHECKING
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods.base import TelegramType
+
+from app.config import get_settings
+from app.utils.cache import LRUCache
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.methods import Response, TelegramMethod
+
+logger = logging.getLogger(__name__)
+
+# Requests of these API families post into a chat and count against its limits.
+_SCHEDULED_PREFIXES = ("send", "edit", "delete", "copy", "forward")
+_CHANNEL_BURST = 3.0
+_WAIT_WINDOW = 1000
+
+
+class SendPriority(IntEnum):
+    """Lower goes first when several requests wait for the global bucket."""
+
+    PUBLISH = 0
+    REPLY = 1
+    CLEANUP = 2
+
+
+_priority: ContextVar[SendPriority] = ContextVar("outbound_priority", default=SendPriority.REPLY)
+_prepaid: ContextVar[str | None] = ContextVar("outbound_prepaid", default=None)
+
+
+@contextmanager
+def send_priority(priority: SendPriority) -> Iterator[None]:
+    """Queue the bot requests made inside the block with ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def prepaid_send(chat_id: str | int) -> Iterator[None]:
+    """Send the request to ``chat_id`` made inside the block on tokens already taken by ``try_acquire``."""
+    token = _prepaid.set(str(chat_id))
+    try:
+        yield
+    finally:
+        _prepaid.reset(token)
+
+
+@dataclass
+class _Lane:
+    # Token bucket refilled at ``rate`` per second, plus a pause set by retry_after.
+    rate: float
+    capacity: float
+    tokens: float
+    updated_at: float
+    paused_until: float = 0.0
+
+    def ready_at(self, now: float) -> float:
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+        if self.tokens >= 1:
+            return max(now, self.paused_until)
+        return max(self.paused_until, now + (1 - self.tokens) / self.rate)
+
+
+@dataclass
+class _Waiter:
+    priority: SendPriority
+    seq: int
+    chat_id: str
+    enqueued_at: float
+    future: asyncio.Future[None] = field(repr=False)
+
+
+@dataclass(frozen=True)
+class OutboundStats:
+    queued: int
+    queued_publishes: int
+    sent: int
+    retried: int
+    wait_avg_seconds: float
+    wait_max_seconds: float
+
+
+class OutboundScheduler:
+    """Paces every chat-bound Bot API request under Telegram's flood limits.
+
+    Each chat has a token bucket (``channel_per_minute`` for channels and
+    groups, ``private_per_second`` for private chats) and all requests share a
+    ``global_per_second`` bucket. A request whose buckets have a token goes out
+    at once; otherwise it waits in one queue served by priority, skipping
+    requests whose own chat is still throttled. ``pause`` holds a chat back
+    after Telegram answered with retry_after.
+    """
+
+    def __init__(
+        self,
+        global_per_second: float,
+        channel_per_minute: float,
+        private_per_second: float,
+        maxsize: int = 10_000,
+    ) -> None:
+        self.global_per_second = global_per_second
+        self.channel_per_minute = channel_per_minute
+        self.private_per_second = private_per_second
+        self.sent = 0
+        self.retried = 0
+        self._global = self._new_lane(global_per_second, global_per_second)
+        self._lanes: LRUCache[str, _Lane] = LRUCache(maxsize)
+        self._waiters: list[_Waiter] = []
+        self._waits: deque[float] = deque(maxlen=_WAIT_WINDOW)
+        self._seq = itertools.count()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @staticmethod
+    def _new_lane(rate: float, capacity: float) -> _Lane:
+        capacity = max(capacity, 1.0)
+        return _Lane(rate=rate, capacity=capacity, tokens=capacity, updated_at=time.monotonic())
+
+    def _lane(self, chat_id: str) -> _Lane:
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            if chat_id.lstrip("-").isdigit() and int(chat_id) > 0:
+                lane = self._new_lane(self.private_per_second, 1)
+            else:
+                lane = self._new_lane(self.channel_per_minute / 60, _CHANNEL_BURST)
+            self._lanes.set(chat_id, lane)
+        return lane
+
+    def try_acquire(self, chat_id: str | int) -> bool:
+        """Take the tokens of a request to ``chat_id`` if it may go out now; never waits."""
+        chat_key = str(chat_id)
+        now = time.monotonic()
+        if self._waiters or self._global.ready_at(now) > now or self._lane(chat_key).ready_at(now) > now:
+            return False
+        self._take(chat_key, now, now)
+        return True
+
+    async def acquire(self, chat_id: str | int, priority: SendPriority | None = None) -> None:
+        """Wait until a request to ``chat_id`` may be sent and take its tokens."""
+        if self.try_acquire(chat_id):
+            return
+        chat_key = str(chat_id)
+        now = time.monotonic()
+
+        waiter = _Waiter(
+            priority=_priority.get() if priority is None else priority,
+            seq=next(self._seq),
+            chat_id=chat_key,
+            enqueued_at=now,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        self._waiters.sort(key=lambda item: (item.priority, item.seq))
+        self._ensure_dispatcher()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def pause(self, chat_id: str | int, seconds: float) -> None:
+        """Send nothing more to ``chat_id`` for ``seconds``."""
+        lane = self._lane(str(chat_id))
+        lane.paused_until = max(lane.paused_until, time.monotonic() + seconds)
+        self.retried += 1
+
+    def _take(self, chat_id: str, enqueued_at: float, now: float) -> None:
+        self._global.tokens -= 1
+        self._lane(chat_id).tokens -= 1
+        self._waits.append(now - enqueued_at)
+        self.sent += 1
+
+    def _ensure_dispatcher(self) -> None:
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch())
+        elif self._wake is not None:
+            self._wake.set()
+
+    async def _dispatch(self) -> None:
+        wake = self._wake
+        while self._waiters and wake is not None:
+            now = time.monotonic()
+            next_at = self._global.ready_at(now)
+            if next_at <= now:
+                next_at = self._grant_next(now)
+                if next_at is None:
+                    continue
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=max(next_at - now, 0.001))
+            except TimeoutError:
+                pass
+
+    def _grant_next(self, now: float) -> float | None:
+        """Release the first waiter whose chat has a token; otherwise return when one will."""
+        next_at: float | None = None
+        for waiter in list(self._waiters):
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+                continue
+            ready_at = self._lane(waiter.chat_id).ready_at(now)
+            if ready_at <= now:
+                self._waiters.remove(waiter)
+                self._take(waiter.chat_id, waiter.enqueued_at, now)
+                waiter.future.set_result(None)
+                return None
+            next_at = ready_at if next_at is None else min(next_at, ready_at)
+        return next_at if next_at is not None else now
+
+    def stats(self) -> OutboundStats:
+        waits = list(self._waits)
+        return OutboundStats(
+            queued=len(self._waiters),
+            queued_publishes=sum(waiter.priority == SendPriority.PUBLISH for waiter in self._waiters),
+            sent=self.sent,
+            retried=self.retried,
+            wait_avg_seconds=sum(waits) / len(waits) if waits else 0.0,
+            wait_max_seconds=max(waits, default=0.0),
+        )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for waiter in self._waiters:
+            waiter.future.cancel()
+        self._waiters.clear()
+
+    def clear(self) -> None:
+        self._lanes.clear()
+        self._waiters.clear()
+        self._waits.clear()
+        self._global = self._new_lane(self.global_per_second, self.global_per_second)
+        self._task = None
+        self.sent = 0
+        self.retried = 0
+
+
+class OutboundRequestMiddleware(BaseRequestMiddleware):
+    """Bot session middleware that sends chat-bound requests through ``scheduler``.
+
+    A request rejected with retry_after pauses its chat and is queued again,
+    at most ``max_retries`` times and only while retry_after stays within
+    ``max_retry_after`` seconds; otherwise the error reaches the caller.
+    """
+
+    def __init__(self, scheduler: OutboundScheduler, max_retries: int, max_retry_after: float) -> None:
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not method.__api_method__.lower().startswith(_SCHEDULED_PREFIXES):
+            return await make_request(bot, method)
+
+        attempt = 0
+        while True:
+            # Inside prepaid_send the first attempt already holds its tokens.
+            if attempt or _prepaid.get() != str(chat_id):
+                await self.scheduler.acquire(chat_id)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as error:
+                self.scheduler.pause(chat_id, error.retry_after)
+                attempt += 1
+                if attempt > self.max_retries or error.retry_after > self.max_retry_after:
+                    raise
+                logger.warning(
+                    "Telegram flood control, request queued again",
+                    extra={"chat_id": chat_id, "retry_after": error.retry_after, "method": method.__api_method__},
+                )
+
+
+_settings = get_settings()
+outbound_scheduler = OutboundScheduler(
+    global_per_second=_settings.outbound_global_per_second,
+    channel_per_minute=_settings.outbound_channel_per_minute,
+    private_per_second=_settings.outbound_private_per_second,
+)
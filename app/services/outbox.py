@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Protocol
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiohttp import ClientError
+
+from app.config import get_settings
+from app.db.models import OutboxMessage
+from app.db.repositories import OUTBOX_DELETE, OUTBOX_PUBLISH, Repository
+from app.db.session import session_scope
+from app.services.outbound import SendPriority, send_priority
+from app.utils.time import utc_now
+
+logger = logging.getLogger(__name__)
+
+# Bot API errors worth another attempt; any other API error is final. Errors
+# outside the Bot API (timeouts, connection resets) are retried as well.
+_TRANSIENT_ERRORS = (TelegramNetworkError, TelegramServerError, TelegramRetryAfter)
+# What a channel request is expected to fail with; anything else is a bug,
+# logged with its traceback before the entries are retried all the same.
+_SEND_ERRORS = (TelegramAPIError, ClientError, asyncio.TimeoutError)
+# Bot API cap on message ids per deleteMessages call.
+DELETE_MESSAGES_LIMIT = 100
+
+
+class PublishBot(Protocol):
+    async def send_message(
+        self,
+        chat_id: str,
+        text: str,
+        parse_mode: str | None = None,
+        disable_web_page_preview: bool = True,
+    ) -> SentMessage: ...
+
+    async def delete_messages(self, chat_id: str, message_ids: list[int]) -> bool: ...
+
+
+class SentMessage(Protocol):
+    message_id: int
+
+
+class Delivery(str, Enum):
+    SENT = "sent"
+    RETRY = "retry"
+    FAILED = "failed"
+
+
+class OutboxDispatcher:
+    """Sends ``outbox`` entries with retries and exponential backoff.
+
+    The publish path delivers its own entry right after commit; entries that
+    failed transiently, and the ones a crash left behind, are picked up by the
+    background loop. Deletes of replaced messages are never sent inline: the
+    loop collects them and removes them per chat with one deleteMessages call
+    for up to ``DELETE_MESSAGES_LIMIT`` ids. Claimed entries are leased for
+    ``lease`` seconds; entries whose lease ran out, because the process that
+    held them stopped, go back to the queue on every pass, so every committed
+    entry is sent at least once while dispatchers of other processes keep
+    their own entries.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        delete_batch_size: int,
+        max_attempts: int,
+        retry_base: float,
+        retry_max: float,
+        poll_interval: float,
+        lease: float,
+    ) -> None:
+        self.batch_size = batch_size
+        self.delete_batch_size = delete_batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._task: asyncio.Task[None] | None = None
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before attempt ``attempts + 1``."""
+        return min(self.retry_max, self.retry_base * 2 ** max(attempts - 1, 0))
+
+    def lease_until(self, now: datetime | None = None) -> datetime:
+        """End of a lease taken at ``now``."""
+        return (now or utc_now()) + timedelta(seconds=self.lease)
+
+    async def deliver(self, bot: Bot | PublishBot, entry: OutboxMessage) -> Delivery:
+        """Send one claimed publish entry and record the outcome in its own transaction."""
+        try:
+            with send_priority(SendPriority.PUBLISH):
+                sent = await bot.send_message(
+                    chat_id=entry.chat_id,
+                    text=entry.text or "",
+                    parse_mode=None,
+                    disable_web_page_preview=True,
+                )
+        except _SEND_ERRORS as error:
+            return await self._record_failure([entry], error)
+        except Exception as error:
+            logger.exception("Unexpected error sending outbox entry", extra={"outbox_id": entry.id})
+            return await self._record_failure([entry], error)
+
+        try:
+            async with session_scope() as session:
+                await Repository(session).complete_outbox(entry, sent.message_id)
+        except Exception:
+            # Left in ``sending``: it is sent again once its lease runs out.
+            logger.exception("Failed to record delivered outbox entry", extra={"outbox_id": entry.id})
+        return Delivery.SENT
+
+    async def delete(self, bot: Bot | PublishBot, entries: Sequence[OutboxMessage]) -> Delivery:
+        """Delete the messages of claimed delete entries of one chat in a single request."""
+        message_ids = [entry.message_id for entry in entries if entry.message_id is not None]
+        try:
+            with send_priority(SendPriority.CLEANUP):
+                await bot.delete_messages(chat_id=entries[0].chat_id, message_ids=message_ids)
+        except _SEND_ERRORS as error:
+            return await self._record_failure(entries, error)
+        except Exception as error:
+            logger.exception(
+                "Unexpected error deleting outbox messages", extra={"outbox_ids": [entry.id for entry in entries]}
+            )
+            return await self._record_failure(entries, error)
+
+        async with session_scope() as session:
+            await Repository(session).drop_outbox([entry.id for entry in entries])
+        return Delivery.SENT
+
+    async def _record_failure(self, entries: Sequence[OutboxMessage], error: Exception) -> Delivery:
+        attempts = max(entry.attempts for entry in entries) + 1
+        final = isinstance(error, TelegramAPIError) and not isinstance(error, _TRANSIENT_ERRORS)
+        extra = {
+            "outbox_ids": [entry.id for entry in entries],
+            "kind": entries[0].kind,
+            "chat_id": entries[0].chat_id,
+            "attempts": attempts,
+            "error": repr(error),
+        }
+        async with session_scope() as session:
+            repo = Repository(session)
+            if final or attempts >= self.max_attempts:
+                logger.warning("Outbox entries failed for good", extra=extra)
+                for entry in entries:
+                    if entry.kind == OUTBOX_PUBLISH:
+                        await repo.fail_outbox(entry, repr(error))
+                # A message that cannot be deleted now never will be: the delete is dropped.
+                await repo.drop_outbox([entry.id for entry in entries if entry.kind != OUTBOX_PUBLISH])
+                return Delivery.FAILED
+            logger.info("Outbox entries will be retried", extra=extra)
+            next_attempt_at = utc_now() + timedelta(seconds=self.backoff(attempts))
+            await repo.retry_outbox(entries, repr(error), next_attempt_at)
+        return Delivery.RETRY
+
+    async def dispatch_due(self, bot: Bot | PublishBot) -> int:
+        """Deliver the due entries concurrently; returns how many were claimed."""
+        now = utc_now()
+        lease_until = self.lease_until(now)
+        async with session_scope() as session:
+            repo = Repository(session)
+            requeued = await repo.requeue_outbox(now)
+            if requeued:
+                logger.info("Resuming outbox entries whose lease ran out", extra={"requeued": requeued})
+            publishes = await repo.claim_due_outbox(now, self.batch_size, lease_until, kind=OUTBOX_PUBLISH)
+            deletes = await repo.claim_due_outbox(now, self.delete_batch_size, lease_until, kind=OUTBOX_DELETE)
+
+        by_chat: dict[str, list[OutboxMessage]] = defaultdict(list)
+        for entry in deletes:
+            by_chat[entry.chat_id].append(entry)
+        chunks = [
+            entries[start : start + DELETE_MESSAGES_LIMIT]
+            for entries in by_chat.values()
+            for start in range(0, len(entries), DELETE_MESSAGES_LIMIT)
+        ]
+        # The outbound scheduler paces the requests; one slow chat does not hold up the rest.
+        await asyncio.gather(
+            *(self.deliver(bot, entry) for entry in publishes),
+            *(self.delete(bot, chunk) for chunk in chunks),
+        )
+        return len(publishes) + len(deletes)
+
+    async def start(self, bot: Bot | PublishBot) -> int:
+        """Requeue entries whose lease ran out and start the loop; returns how many."""
+        async with session_scope() as session:
+            requeued = await Repository(session).requeue_outbox(utc_now())
+        if requeued:
+            logger.info("Resuming outbox entries left in flight", extra={"requeued": requeued})
+        self._task = asyncio.create_task(self._run(bot))
+        return requeued
+
+    async def _run(self, bot: Bot | PublishBot) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_due(bot)
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                claimed = 0
+            if not claimed:
+                await asyncio.sleep(self.poll_interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_settings = get_settings()
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=_settings.outbox_batch_size,
+    delete_batch_size=_settings.outbox_delete_batch_size,
+    max_attempts=_settings.outbox_max_attempts,
+    retry_base=_settings.outbox_retry_base_seconds,
+    retry_max=_settings.outbox_retry_max_seconds,
+    poll_interval=_settings.outbox_poll_interval_seconds,
+    lease=_settings.outbox_lease_seconds,
+)
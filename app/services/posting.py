@@ -1,38 +1,24 @@
 from __future__ import annotations
 
-import asyncio
-from dataclasses import dataclass
-from datetime import timezone
 import logging
-from typing import Protocol
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
 
 from aiogram import Bot
 from aiogram.types import User as TelegramUser
 
 from app.config import Settings
-from app.db.repositories import Repository
-from app.db.session import session_scope
+from app.db.repositories import OUTBOX_PENDING, OUTBOX_SENDING, PublishContext, Repository
+from app.db.session import read_session_scope, session_scope
+from app.services.audit import audit_sink
+from app.services.boards import BoardSnapshot, board_catalog
+from app.services.locks import publish_locks
+from app.services.outbound import outbound_scheduler, prepaid_send
+from app.services.outbox import Delivery, PublishBot, outbox_dispatcher
+from app.services.rate_limit import rate_limiter
 from app.services.users import sync_telegram_user
-from app.utils.time import utc_now
 
 logger = logging.getLogger(__name__)
-_publish_locks: dict[tuple[int, int], asyncio.Lock] = {}
-
-
-class PublishBot(Protocol):
-    async def send_message(
-        self,
-        chat_id: str,
-        text: str,
-        parse_mode: str | None = None,
-        disable_web_page_preview: bool = True,
-    ) -> SentMessage: ...
-
-    async def delete_message(self, chat_id: str, message_id: int) -> None: ...
-
-
-class SentMessage(Protocol):
-    message_id: int
 
 
 @dataclass
@@ -43,144 +29,147 @@ class PostResult:
     max_text_length: int | None = None
 
 
-def _publish_lock(user_id: int, board_id: int) -> asyncio.Lock:
-    key = (user_id, board_id)
-    lock = _publish_locks.get(key)
-    if lock is None:
-        lock = asyncio.Lock()
-        _publish_locks[key] = lock
-    return lock
+def _reject(
+    context: PublishContext | None,
+    board: BoardSnapshot | None,
+    board_id: int | None = None,
+) -> PostResult | None:
+    if context is None or board is None:
+        return PostResult(status="no_board")
+    if board_id is not None and board.id != board_id:
+        return PostResult(status="no_board")
+    if not board.is_active:
+        return PostResult(status="board_inactive")
 
+    user_blocked = context.user is not None and context.user.is_globally_blocked
+    if user_blocked or (context.state is not None and context.state.is_blocked):
+        return PostResult(status="blocked", board_title=board.title)
+    return None
 
-async def _delete_published_message(bot: Bot | PublishBot, channel_id: str, message_id: int) -> None:
-    try:
-        await bot.delete_message(chat_id=channel_id, message_id=message_id)
-    except Exception:
-        logger.warning(
-            "Failed to delete channel post during cleanup",
-            extra={"channel_id": channel_id, "message_id": message_id},
-        )
 
+def _too_often(board: BoardSnapshot) -> PostResult:
+    return PostResult(status="too_often", board_title=board.title, rate_limit_seconds=board.rate_limit_seconds)
 
-async def publish_text_post(bot: Bot | PublishBot, tg_user: TelegramUser, text: str, settings: Settings) -> PostResult:
-    bootstrap_superadmins = set(settings.superadmin_ids)
 
-    with session_scope() as session:
-        repo = Repository(session)
-        user = sync_telegram_user(repo, tg_user)
-        selected_board = repo.get_selected_board(user.id)
-        if selected_board is None:
-            return PostResult(status="no_board")
+def _reject_post(board: BoardSnapshot, text: str) -> PostResult | None:
+    if len(text) > board.max_text_length:
+        return PostResult(status="too_long", board_title=board.title, max_text_length=board.max_text_length)
+    return None
 
-        board_id = selected_board.id
 
-    if board_id is None:
-        return PostResult(status="no_board")
+async def publish_text_post(bot: Bot | PublishBot, tg_user: TelegramUser, text: str, settings: Settings) -> PostResult:
+    """Publish ``text`` to the user's selected board.
+
+    A user whose rate-limit bucket for the last seen board is empty is turned
+    away before any session is opened. Otherwise the checks run on one joined
+    read plus the in-memory board catalog. The post, the archived predecessor
+    and an ``outbox`` entry for the channel message are persisted in one write
+    transaction. The entry is delivered right after it commits, outside the
+    publish lock, when the channel lane has a token for it; otherwise, and if
+    the channel is unreachable, it is left to the outbox dispatcher and the
+    post is ``queued``. The audit event is handed to the buffered audit sink
+    once the transaction commits.
+    """
+    bootstrap_superadmins = set(settings.superadmin_ids)
 
-    async with _publish_lock(tg_user.id, board_id):
-        with session_scope() as session:
-            repo = Repository(session)
-            user = sync_telegram_user(repo, tg_user)
-            selected_board = repo.get_selected_board(user.id)
-            if selected_board is None or selected_board.id != board_id:
-                return PostResult(status="no_board")
-
-            if not selected_board.is_active:
-                return PostResult(status="board_inactive")
-
-            membership = repo.ensure_membership(user_id=user.id, board_id=selected_board.id)
-            if user.is_globally_blocked or membership.is_blocked:
-                return PostResult(status="blocked", board_title=selected_board.title)
-
-            if len(text) > selected_board.max_text_length:
-                return PostResult(
-                    status="too_long",
-                    board_title=selected_board.title,
-                    max_text_length=selected_board.max_text_length,
-                )
+    hinted_board = board_catalog.peek(rate_limiter.selected_board(tg_user.id))
+    if hinted_board is not None and rate_limiter.retry_after(tg_user.id, hinted_board) > 0:
+        return _too_often(hinted_board)
 
-            active_post = repo.get_active_post(user_id=user.id, board_id=selected_board.id)
-            is_board_admin = repo.is_board_admin(
-                user_id=user.id,
-                board_id=selected_board.id,
-                bootstrap_superadmins=bootstrap_superadmins,
-            )
+    # Keyed by user: the selected board is only known after the precheck, which
+    # has to run under the lock to see the previous post of a concurrent request.
+    async with AsyncExitStack() as stack:
+        try:
+            await stack.enter_async_context(publish_locks.hold(f"publish:{tg_user.id}"))
+        except TimeoutError:
+            logger.warning("Publish lock not acquired in time", extra={"user_id": tg_user.id})
+            return PostResult(status="publish_error")
 
-            if active_post and not is_board_admin:
-                posted_at = active_post.posted_at
-                if posted_at.tzinfo is None:
-                    posted_at = posted_at.replace(tzinfo=timezone.utc)
-                delta = (utc_now() - posted_at).total_seconds()
-                if delta < selected_board.rate_limit_seconds:
-                    return PostResult(
-                        status="too_often",
-                        board_title=selected_board.title,
-                        rate_limit_seconds=selected_board.rate_limit_seconds,
-                    )
-
-            board_title = selected_board.title
-            board_channel_id = selected_board.channel_id
+        async with read_session_scope() as session:
+            repo = Repository(session)
+            context = await repo.get_publish_context(tg_user.id, bootstrap_superadmins)
+            board = await board_catalog.get(repo, context.board_id) if context is not None else None
 
-        try:
-            sent_message = await bot.send_message(
-                chat_id=board_channel_id,
-                text=text,
-                parse_mode=None,
-                disable_web_page_preview=True,
-            )
-        except Exception:
-            logger.exception(
-                "Failed to send message to channel",
-                extra={"user_id": tg_user.id, "board_id": board_id},
-            )
-            return PostResult(status="publish_error", board_title=board_title)
+        if context is None or board is None:
+            return PostResult(status="no_board")
+        rate_limiter.remember_selection(tg_user.id, board.id)
+        rejection = _reject(context, board) or _reject_post(board, text)
+        if rejection is not None:
+            return rejection
+
+        charged = not context.is_board_admin
+        last_posted_at = context.state.last_posted_at if context.state is not None else None
+        if charged and not rate_limiter.try_acquire(
+            tg_user.id, board, last_posted_at=last_posted_at.timestamp() if last_posted_at is not None else None
+        ):
+            return _too_often(board)
+
+        # Refunds target the board that was charged, not the one re-read later.
+        charged_board = board
+        board_id = board.id
+        board_title = board.title
+        board_channel_id = board.channel_id
+        # Taken without waiting: a handler never sits in the channel's queue.
+        inline = outbound_scheduler.try_acquire(board_channel_id)
 
-        previous_channel_message_id: int | None = None
         try:
-            with session_scope() as session:
+            async with session_scope() as session:
                 repo = Repository(session)
-                user = sync_telegram_user(repo, tg_user)
-                selected_board = repo.get_selected_board(user.id)
-                if selected_board is None or selected_board.id != board_id:
-                    await _delete_published_message(bot, board_channel_id, sent_message.message_id)
-                    return PostResult(status="no_board")
-
-                if not selected_board.is_active:
-                    await _delete_published_message(bot, board_channel_id, sent_message.message_id)
-                    return PostResult(status="board_inactive")
-
-                membership = repo.ensure_membership(user_id=user.id, board_id=selected_board.id)
-                if user.is_globally_blocked or membership.is_blocked:
-                    await _delete_published_message(bot, board_channel_id, sent_message.message_id)
-                    return PostResult(status="blocked", board_title=selected_board.title)
-
-                active_post = repo.get_active_post(user_id=user.id, board_id=selected_board.id)
-                if active_post:
-                    repo.archive_post(active_post)
-                    previous_channel_message_id = active_post.telegram_message_id
-
-                repo.create_post(
-                    user_id=user.id,
-                    board_id=selected_board.id,
-                    text=text,
-                    telegram_message_id=sent_message.message_id,
+                # Re-read in the write transaction: the board or the membership may
+                # have changed since the precheck.
+                context = await repo.get_publish_context(tg_user.id, bootstrap_superadmins)
+                board = await board_catalog.get(repo, context.board_id) if context is not None else None
+                rejection = _reject(context, board, board_id)
+                if rejection is not None or context is None:
+                    if charged:
+                        rate_limiter.refund(tg_user.id, charged_board)
+                    return rejection or PostResult(status="no_board")
+
+                user_id = await sync_telegram_user(repo, tg_user)
+                replaces_message_id: int | None = None
+                if context.state is None:
+                    await repo.ensure_membership(user_id=user_id, board_id=board_id)
+                else:
+                    replaces_message_id = context.state.active_message_id
+                    if context.state.active_post_id is not None and replaces_message_id is None:
+                        # The previous post is still queued: it must not go out after this
+                        # one, and whatever it was replacing is now this post's to delete.
+                        replaces_message_id = await repo.cancel_outbox_publish(context.state.active_post_id)
+
+                post = await repo.create_post(user_id=user_id, board_id=board_id, text=text)
+                entry = await repo.add_outbox_publish(
+                    post,
+                    board_channel_id,
+                    replaces_message_id,
+                    status=OUTBOX_SENDING if inline else OUTBOX_PENDING,
+                    next_attempt_at=outbox_dispatcher.lease_until() if inline else None,
                 )
-                repo.write_audit(
-                    actor_user_id=user.id,
+                audit_sink.record(
+                    repo.session,
+                    actor_user_id=user_id,
                     action="post_publish",
                     target_type="post",
-                    target_id=str(sent_message.message_id),
-                    board_id=selected_board.id,
+                    target_id=str(post.id),
+                    board_id=board_id,
                 )
         except Exception:
             logger.exception(
-                "Failed to persist published message",
-                extra={"user_id": tg_user.id, "board_id": board_id, "message_id": sent_message.message_id},
+                "Failed to persist post",
+                extra={"user_id": tg_user.id, "board_id": board_id},
             )
-            await _delete_published_message(bot, board_channel_id, sent_message.message_id)
+            if charged:
+                rate_limiter.refund(tg_user.id, charged_board)
             return PostResult(status="publish_error", board_title=board_title)
 
-        if previous_channel_message_id:
-            await _delete_published_message(bot, board_channel_id, previous_channel_message_id)
-
-        return PostResult(status="success", board_title=board_title)
+    if not inline:
+        return PostResult(status="queued", board_title=board_title)
+    # The lock is released: a send the flood limits hold up keeps no other request of the user waiting.
+    with prepaid_send(board_channel_id):
+        delivery = await outbox_dispatcher.deliver(bot, entry)
+    if delivery is Delivery.FAILED:
+        if charged:
+            rate_limiter.refund(tg_user.id, charged_board)
+        return PostResult(status="publish_error", board_title=board_title)
+    if delivery is Delivery.RETRY:
+        return PostResult(status="queued", board_title=board_title)
+    return PostResult(status="success", board_title=board_title)
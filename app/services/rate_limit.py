@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass
+from datetime import UTC, timedelta
+
+from app.config import get_settings
+from app.db.repositories import Repository
+from app.services.boards import BoardSnapshot, board_catalog
+from app.utils.cache import LRUCache
+from app.utils.time import utc_now
+
+
+@dataclass
+class TokenBucket:
+    tokens: float
+    updated_at: float
+
+
+def _policy(board: BoardSnapshot) -> tuple[float, int]:
+    return float(board.rate_limit_seconds), max(board.rate_limit_burst, 1)
+
+
+def _tokens_since_post(board: BoardSnapshot, elapsed: float) -> float:
+    """Most tokens a bucket can hold ``elapsed`` seconds after a post: one below capacity, refilled since."""
+    interval, burst = _policy(board)
+    if interval <= 0:
+        return float(burst)
+    return min(float(burst), burst - 1 + max(elapsed, 0.0) / interval)
+
+
+class RateLimiter:
+    """Token buckets per (user_id, board_id) refilled at one post per ``rate_limit_seconds``.
+
+    A board's burst size is the bucket capacity; with the default of one it
+    behaves exactly like the old "one post per interval" rule. Buckets and the
+    last selected board of each user live in memory, so a flood is rejected
+    before any session is opened. Admins are never charged.
+    """
+
+    def __init__(self, maxsize: int):
+        self._buckets: LRUCache[tuple[int, int], TokenBucket] = LRUCache(maxsize)
+        self._selected_boards: LRUCache[int, int] = LRUCache(maxsize)
+
+    def _refill(self, key: tuple[int, int], board: BoardSnapshot, now: float) -> TokenBucket | None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return None
+        interval, burst = _policy(board)
+        if interval <= 0:
+            bucket.tokens = float(burst)
+        else:
+            bucket.tokens = min(float(burst), bucket.tokens + (now - bucket.updated_at) / interval)
+        bucket.updated_at = now
+        return bucket
+
+    def retry_after(self, user_id: int, board: BoardSnapshot, now: float | None = None) -> float:
+        """Seconds until the user may post to ``board`` again; 0 when a token is available."""
+        now = time.time() if now is None else now
+        bucket = self._refill((user_id, board.id), board, now)
+        if bucket is None or bucket.tokens >= 1:
+            return 0.0
+        return (1 - bucket.tokens) * board.rate_limit_seconds
+
+    def try_acquire(
+        self,
+        user_id: int,
+        board: BoardSnapshot,
+        now: float | None = None,
+        last_posted_at: float | None = None,
+    ) -> bool:
+        """Take a token for a post; False when the bucket is empty.
+
+        ``last_posted_at`` is the user's last post on the board as stored in the
+        database. The bucket is capped at what it can hold since that post, so
+        a bucket this process evicted or never had, e.g. because the previous
+        post went through another worker, is not taken to be full.
+        """
+        now = time.time() if now is None else now
+        key = (user_id, board.id)
+        bucket = self._refill(key, board, now)
+        if bucket is None:
+            bucket = TokenBucket(tokens=float(_policy(board)[1]), updated_at=now)
+            self._buckets.set(key, bucket)
+        if last_posted_at is not None:
+            bucket.tokens = min(bucket.tokens, _tokens_since_post(board, now - last_posted_at))
+        if bucket.tokens < 1:
+            return False
+        bucket.tokens -= 1
+        return True
+
+    def refund(self, user_id: int, board: BoardSnapshot) -> None:
+        """Give back a token taken by ``try_acquire`` when the post did not go through."""
+        bucket = self._buckets.get((user_id, board.id))
+        if bucket is not None:
+            bucket.tokens = min(float(_policy(board)[1]), bucket.tokens + 1)
+
+    def remember_selection(self, user_id: int, board_id: int) -> None:
+        self._selected_boards.set(user_id, board_id)
+
+    def selected_board(self, user_id: int) -> int | None:
+        return self._selected_boards.get(user_id)
+
+    def forget_user(self, user_id: int) -> None:
+        """Drop the buckets of ``user_id``, e.g. after they became an admin."""
+        for key in [key for key in self._buckets if key[0] == user_id]:
+            self._buckets.pop(key)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._selected_boards.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+rate_limiter = RateLimiter(maxsize=get_settings().rate_limit_cache_size)
+
+
+async def rebuild_rate_limiter(
+    repo: Repository,
+    bootstrap_superadmins: AbstractSet[int],
+    limiter: RateLimiter = rate_limiter,
+) -> int:
+    """Replay recent posts into ``limiter`` so a restart does not reset every bucket.
+
+    Only posts inside the longest refill window of any board can still hold a
+    bucket below capacity, so older rows are never read; admin posts are skipped
+    because admins are never charged. Returns the number of replayed posts.
+    """
+    limiter.clear()
+    boards = {board.id: board for board in await board_catalog.active_boards(repo)}
+    window = max((board.rate_limit_seconds * max(board.rate_limit_burst, 1) for board in boards.values()), default=0)
+    if window <= 0:
+        return 0
+
+    replayed = 0
+    for user_id, board_id, posted_at in await repo.list_post_times_since(
+        utc_now() - timedelta(seconds=window), bootstrap_superadmins
+    ):
+        board = boards.get(board_id)
+        if board is None:
+            continue
+        if posted_at.tzinfo is None:
+            posted_at = posted_at.replace(tzinfo=UTC)
+        limiter.try_acquire(user_id, board, now=posted_at.timestamp())
+        replayed += 1
+    return replayed
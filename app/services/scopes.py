@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Iterator
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from aiogram.types import User as TelegramUser
 
 from app.config import Settings, get_settings
 from app.db.repositories import Repository
-from app.db.session import session_scope
+from app.db.session import read_session_scope, session_scope
 from app.services.admin import (
     AdminAccessService,
+    AdminAuditService,
     AdminBoardService,
     AdminContext,
     AdminModerationService,
@@ -19,20 +20,26 @@ from app.services.admin import (
 from app.services.user import UserService
 
 
-@contextmanager
-def admin_service_scope(tg_user: TelegramUser, settings: Settings | None = None) -> Iterator[AdminServices]:
+@asynccontextmanager
+async def admin_service_scope(
+    tg_user: TelegramUser,
+    settings: Settings | None = None,
+    *,
+    read_only: bool = False,
+) -> AsyncIterator[AdminServices]:
     active_settings = settings or get_settings()
-    with session_scope() as session:
+    async with (read_session_scope() if read_only else session_scope()) as session:
         context = AdminContext(repo=Repository(session), settings=active_settings, tg_user=tg_user)
         yield AdminServices(
             access=AdminAccessService(context),
             boards=AdminBoardService(context),
             roles=AdminRoleService(context),
             moderation=AdminModerationService(context),
+            audit=AdminAuditService(context),
         )
 
 
-@contextmanager
-def user_service_scope(tg_user: TelegramUser) -> Iterator[UserService]:
-    with session_scope() as session:
+@asynccontextmanager
+async def user_service_scope(tg_user: TelegramUser, *, read_only: bool = False) -> AsyncIterator[UserService]:
+    async with (read_session_scope() if read_only else session_scope()) as session:
         yield UserService(repo=Repository(session), tg_user=tg_user)
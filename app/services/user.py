@@ -4,14 +4,16 @@ from dataclasses import dataclass, field
 
 from aiogram.types import User as TelegramUser
 
-from app.db.models import Board, User
 from app.db.repositories import Repository
+from app.db.session import on_commit
+from app.services.boards import BoardSnapshot, board_catalog
+from app.services.rate_limit import rate_limiter
 from app.services.users import sync_telegram_user
 
 
 @dataclass
 class BoardPickerView:
-    boards: list[Board]
+    boards: list[BoardSnapshot]
     selected_board_id: int | None
 
 
@@ -19,26 +21,28 @@ class BoardPickerView:
 class UserService:
     repo: Repository
     tg_user: TelegramUser
-    _user: User | None = field(default=None, init=False, repr=False)
+    _user_synced: bool = field(default=False, init=False, repr=False)
 
-    @property
-    def user(self) -> User:
-        if self._user is None:
-            self._user = sync_telegram_user(self.repo, self.tg_user)
-        return self._user
+    async def user_id(self) -> int:
+        if not self._user_synced:
+            await sync_telegram_user(self.repo, self.tg_user)
+            self._user_synced = True
+        return self.tg_user.id
 
-    def board_picker_view(self) -> BoardPickerView:
-        selected = self.repo.get_user_selection(self.user.id)
+    async def board_picker_view(self) -> BoardPickerView:
+        selected = await self.repo.get_user_selection(self.tg_user.id)
         return BoardPickerView(
-            boards=self.repo.list_boards(include_archived=False),
+            boards=await board_catalog.active_boards(self.repo),
             selected_board_id=selected.board_id if selected else None,
         )
 
-    def select_board(self, board_id: int) -> Board | None:
-        board = self.repo.get_board(board_id)
-        if board is None or not board.is_active or board.id is None:
+    async def select_board(self, board_id: int) -> BoardSnapshot | None:
+        board = await board_catalog.get(self.repo, board_id)
+        if board is None or not board.is_active:
             return None
 
-        self.repo.set_user_selected_board(user_id=self.user.id, board_id=board.id)
-        self.repo.ensure_membership(user_id=self.user.id, board_id=board.id)
+        user_id = await self.user_id()
+        await self.repo.set_user_selected_board(user_id=user_id, board_id=board.id)
+        await self.repo.ensure_membership(user_id=user_id, board_id=board.id)
+        on_commit(self.repo.session, lambda: rate_limiter.remember_selection(user_id, board.id))
         return board
@@ -2,14 +2,66 @@ from __future__ import annotations
 
 from aiogram.types import User as TelegramUser
 
-from app.db.models import User
+from app.config import get_settings
 from app.db.repositories import Repository
+from app.db.session import on_commit
+from app.utils.cache import LRUCache
 
 
-def sync_telegram_user(repo: Repository, tg_user: TelegramUser) -> User:
-    return repo.sync_user(
+def profile_fingerprint(tg_user: TelegramUser) -> int:
+    return hash((tg_user.username, tg_user.first_name, tg_user.last_name))
+
+
+class UserSyncCache:
+    """Remembers which Telegram profiles are already stored as-is in the database."""
+
+    def __init__(self, maxsize: int):
+        self._fingerprints: LRUCache[int, int] = LRUCache(maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def is_current(self, user_id: int, fingerprint: int) -> bool:
+        if self._fingerprints.get(user_id) == fingerprint:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def remember(self, user_id: int, fingerprint: int) -> None:
+        self._fingerprints.set(user_id, fingerprint)
+
+    def forget(self, user_id: int) -> None:
+        self._fingerprints.pop(user_id)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes, "size": len(self._fingerprints)}
+
+    def clear(self) -> None:
+        self._fingerprints.clear()
+        self.hits = self.misses = self.writes = 0
+
+
+user_sync_cache = UserSyncCache(maxsize=get_settings().user_sync_cache_size)
+
+
+async def sync_telegram_user(repo: Repository, tg_user: TelegramUser) -> int:
+    """Make sure the user row matches the Telegram profile and return the user id.
+
+    Unchanged profiles are answered from the in-process cache without touching
+    the database; the cache is only updated once the transaction commits.
+    """
+    fingerprint = profile_fingerprint(tg_user)
+    if user_sync_cache.is_current(tg_user.id, fingerprint):
+        return tg_user.id
+
+    written = await repo.sync_user_profile(
         user_id=tg_user.id,
         username=tg_user.username,
         first_name=tg_user.first_name,
         last_name=tg_user.last_name,
     )
+    if written:
+        user_sync_cache.writes += 1
+    on_commit(repo.session, lambda: user_sync_cache.remember(tg_user.id, fingerprint))
+    return tg_user.id
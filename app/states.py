@@ -6,6 +6,10 @@ class BoardCreateStates(StatesGroup):
     waiting_channel_id = State()
 
 
+class BoardImportStates(StatesGroup):
+    waiting_document = State()
+
+
 class AdminAddStates(StatesGroup):
     waiting_user_id = State()
 
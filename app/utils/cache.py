@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded mapping that evicts the least recently used key."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        return self._data.pop(key, None)
+
+    def __iter__(self) -> Iterator[K]:
+        # Over a copy, so callers may pop keys while iterating.
+        return iter(list(self._data))
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TTLCache(Generic[K, V]):
+    """LRU cache whose entries also expire ``ttl`` seconds after being stored."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._entries: LRUCache[K, tuple[float, V]] = LRUCache(maxsize)
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key)
+            return None
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._entries.set(key, (time.monotonic() + self.ttl, value))
+
+    def pop(self, key: K) -> V | None:
+        entry = self._entries.pop(key)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlightCache(Generic[K, V]):
+    """TTL cache whose concurrent misses for one key share a single load.
+
+    The first caller runs ``load``; callers arriving meanwhile await its result
+    or its error instead of starting their own.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._values: TTLCache[K, V] = TTLCache(maxsize, ttl)
+        self._inflight: dict[K, asyncio.Future[V]] = {}
+        self.loads = 0
+
+    async def get(self, key: K, load: Callable[[], Awaitable[V]]) -> V:
+        value = self._values.get(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future[V] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await load()
+        except BaseException as error:
+            shared = error if isinstance(error, Exception) else RuntimeError("shared load was cancelled")
+            future.set_exception(shared)
+            # Nobody may be waiting; mark the exception as retrieved.
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        self.loads += 1
+        self._values.set(key, value)
+        future.set_result(value)
+        return value
+
+    def pop(self, key: K) -> V | None:
+        return self._values.pop(key)
+
+    def clear(self) -> None:
+        self._values.clear()
+        self.loads = 0
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import re
+import zlib
+from collections import Counter
+from collections.abc import Iterable
+
+# zlib only looks back 32 KiB, so a larger preset dictionary is never used.
+MAX_DICTIONARY_SIZE = 32 * 1024
+_WBITS = -15  # raw deflate: no header or checksum, the row knows its codec
+_WORD = re.compile(r"\w+\W*")
+_MAX_FRAGMENT_WORDS = 4
+
+
+def train_dictionary(samples: Iterable[str], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """Build a zlib preset dictionary from the most valuable fragments of ``samples``.
+
+    Fragments are runs of up to four words (with their punctuation) seen more
+    than once, scored by ``occurrences * length``. The best ones go last because
+    deflate encodes closer matches more cheaply.
+    """
+    counts: Counter[str] = Counter()
+    for sample in samples:
+        words = _WORD.findall(sample)
+        for length in range(1, _MAX_FRAGMENT_WORDS + 1):
+            counts.update("".join(words[start : start + length]) for start in range(len(words) - length + 1))
+
+    ranked = sorted(
+        (fragment for fragment, count in counts.items() if count > 1),
+        key=lambda fragment: counts[fragment] * len(fragment.encode()),
+    )
+    chosen: list[bytes] = []
+    used = 0
+    for fragment in reversed(ranked):
+        encoded = fragment.encode()
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+def compress_text(text: str, zdict: bytes | None = None) -> bytes:
+    compressor = zlib.compressobj(9, wbits=_WBITS, **({"zdict": zdict} if zdict else {}))
+    return compressor.compress(text.encode()) + compressor.flush()
+
+
+def decompress_text(body: bytes, zdict: bytes | None = None) -> str:
+    decompressor = zlib.decompressobj(wbits=_WBITS, **({"zdict": zdict} if zdict else {}))
+    return (decompressor.decompress(body) + decompressor.flush()).decode()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# How long shutdown waits for acknowledged updates still in the queue.
+_DRAIN_SECONDS = 30.0
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """Webhook handler that answers Telegram at once and feeds updates to ``workers`` tasks.
+
+    Updates wait in a queue of ``queue_size``; when it is full the request is
+    refused with 503 and Telegram delivers the update again later, so a burst
+    never turns into an unbounded pile of tasks.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: str,
+        workers: int,
+        queue_size: int,
+        **data: Any,
+    ) -> None:
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self.workers = workers
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=queue_size)
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning("Webhook queue is full, update refused", extra={"update_id": update.get("update_id")})
+            return web.Response(status=503)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _work(self) -> None:
+        while True:
+            update = await self._queue.get()
+            try:
+                await self._background_feed_update(self.bot, update)
+            except Exception:
+                logger.exception("Failed to process update", extra={"update_id": update.get("update_id")})
+            finally:
+                self._queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every queued update has been processed."""
+        await self._queue.join()
+
+    async def close(self) -> None:
+        try:
+            await asyncio.wait_for(self.join(), timeout=_DRAIN_SECONDS)
+        except TimeoutError:
+            logger.warning("Webhook queue not drained on shutdown", extra={"pending": self._queue.qsize()})
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await super().close()
+
+
+def build_webhook_app(
+    dispatcher: Dispatcher, bot: Bot, settings: Settings
+) -> tuple[web.Application, QueuedRequestHandler]:
+    handler = QueuedRequestHandler(
+        dispatcher,
+        bot,
+        secret_token=settings.webhook_secret,
+        workers=settings.webhook_workers,
+        queue_size=settings.webhook_queue_size,
+    )
+    app = web.Application()
+    handler.register(app, path=settings.webhook_path)
+    setup_application(app, dispatcher, bot=bot)
+    return app, handler
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, settings: Settings) -> None:
+    """Serve updates over a webhook until cancelled.
+
+    The webhook stays registered on shutdown, so Telegram keeps the updates
+    that arrive while the bot is down and delivers them after the restart.
+    """
+    if not settings.webhook_url or not settings.webhook_secret:
+        raise RuntimeError("WEBHOOK_URL and WEBHOOK_SECRET are required in webhook mode")
+
+    app, handler = build_webhook_app(dispatcher, bot, settings)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=settings.webhook_host, port=settings.webhook_port).start()
+        handler.start()
+        await bot.set_webhook(
+            url=settings.webhook_url.rstrip("/") + settings.webhook_path,
+            secret_token=settings.webhook_secret,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            drop_pending_updates=settings.drop_pending_updates,
+        )
+        logger.info("Webhook server started", extra={"port": settings.webhook_port, "workers": handler.workers})
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,103 @@
+"""Posts/second through ``publish_text_post`` on a file-backed SQLite database.
+
+Runs the same concurrent burst against the legacy shared pool
+(``SQLITE_SINGLE_WRITER=false``) and against the single writer + WAL reader pool:
+
+    uv run python -m benchmarks.publish_throughput --users 200 --posts-per-user 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from aiogram.types import User as TelegramUser
+
+from app.config import get_settings
+from app.db.repositories import Repository
+from app.db.session import init_db, reset_engine, session_scope
+from app.services.posting import publish_text_post
+
+
+class _SentMessage:
+    def __init__(self, message_id: int):
+        self.message_id = message_id
+
+
+class _NullBot:
+    def __init__(self) -> None:
+        self._next_id = 0
+
+    async def send_message(
+        self,
+        chat_id: str,
+        text: str,
+        parse_mode: str | None = None,
+        disable_web_page_preview: bool = True,
+    ) -> _SentMessage:
+        self._next_id += 1
+        return _SentMessage(self._next_id)
+
+    async def delete_message(self, chat_id: str, message_id: int) -> None:
+        return None
+
+
+async def _prepare(users: int) -> list[TelegramUser]:
+    async with session_scope() as session:
+        repo = Repository(session)
+        board = await repo.create_board("Bench", "@bench", 0, 300)
+        for user_id in range(1, users + 1):
+            await repo.sync_user(user_id, f"user{user_id}", "Bench", None)
+            await repo.set_user_selected_board(user_id, board.id)
+            await repo.ensure_membership(user_id, board.id)
+    return [TelegramUser(id=user_id, is_bot=False, first_name="Bench") for user_id in range(1, users + 1)]
+
+
+async def _run(single_writer: bool, users: int, posts_per_user: int) -> tuple[float, Counter[str]]:
+    directory = tempfile.mkdtemp(prefix="board-anon-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(directory) / 'bench.db'}"
+    os.environ["SQLITE_SINGLE_WRITER"] = "true" if single_writer else "false"
+    get_settings.cache_clear()
+    await reset_engine()
+    await init_db()
+
+    settings = get_settings()
+    tg_users = await _prepare(users)
+    bot = _NullBot()
+
+    async def user_burst(tg_user: TelegramUser) -> list[str]:
+        statuses = []
+        for index in range(posts_per_user):
+            result = await publish_text_post(bot=bot, tg_user=tg_user, text=f"post {index}", settings=settings)
+            statuses.append(result.status)
+        return statuses
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(user_burst(tg_user) for tg_user in tg_users))
+    elapsed = time.perf_counter() - started
+    await reset_engine()
+
+    statuses = Counter(status for user_statuses in results for status in user_statuses)
+    return statuses["success"] / elapsed, statuses
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--posts-per-user", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    for label, single_writer in (("shared pool", False), ("single writer", True)):
+        rate, statuses = await _run(single_writer, args.users, args.posts_per_user)
+        print(f"{label:>14}: {rate:8.1f} posts/s  {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
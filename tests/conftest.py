@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import get_settings
+from app.db.repositories import Repository
+from app.db.session import init_db, reset_engine
+from app.services.admin import board_stats_cache, permissions_cache
+from app.services.audit import audit_sink
+from app.services.boards import board_catalog
+from app.services.outbound import outbound_scheduler
+from app.services.outbox import outbox_dispatcher
+from app.services.rate_limit import rate_limiter
+from app.services.users import user_sync_cache
+
+
+def _clear_process_caches() -> None:
+    user_sync_cache.clear()
+    permissions_cache.clear()
+    board_stats_cache.clear()
+    board_catalog.clear()
+    rate_limiter.clear()
+    outbound_scheduler.clear()
+    audit_sink.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_process_caches() -> Iterator[None]:
+    # Every test builds a fresh database, so nothing cached in-process may leak across tests.
+    _clear_process_caches()
+    yield
+    _clear_process_caches()
+
+
+@pytest.fixture
+async def repo() -> AsyncIterator[Repository]:
+    """A repository on a fresh in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        yield Repository(session)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def configured_db(monkeypatch: pytest.MonkeyPatch, tmp_path) -> AsyncIterator[None]:
+    """Point the app's engines at a fresh, migrated SQLite file."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("SUPERADMIN_IDS", "")
+    get_settings.cache_clear()
+    await reset_engine()
+    await init_db()
+    yield
+    await outbox_dispatcher.stop()
+    await reset_engine()
+    get_settings.cache_clear()
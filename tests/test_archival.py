@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from sqlmodel import func, select, update
+
+from app.config import Settings
+from app.db.models import Post, PostArchive
+from app.db.repositories import Repository
+from app.db.session import session_scope
+from app.services.archival import archive_old_posts, compress_archive, train_compression_dictionary
+from app.utils.compression import compress_text, decompress_text, train_dictionary
+from app.utils.time import utc_now
+
+
+async def test_archive_old_posts_moves_superseded_posts_in_batches(configured_db: None) -> None:
+    async with session_scope() as session:
+        repo = Repository(session)
+        await repo.sync_user(10, "u", "U", None)
+        board = await repo.create_board("Board", "@board", 120, 300)
+        board_id = board.id
+        for message_id in range(1, 7):
+            await repo.create_post(10, board_id, f"post {message_id}", message_id)
+        # Four of the five superseded posts are old enough for cold storage.
+        await session.exec(
+            update(Post)
+            .where(Post.telegram_message_id <= 4)
+            .values(archived_at=utc_now() - timedelta(days=40))
+        )
+        stats_before = await repo.stats()
+
+    settings = Settings.model_construct(post_archive_after_days=30, post_archive_batch_size=3)
+    assert await archive_old_posts(settings) == 4
+    assert await archive_old_posts(settings) == 0
+
+    async with session_scope() as session:
+        repo = Repository(session)
+        hot_ids = (await session.exec(select(Post.telegram_message_id).order_by(Post.id))).all()
+        cold_count = (await session.exec(select(func.count()).select_from(PostArchive))).one()
+        stats = await repo.stats()
+        counted = await repo.count_stats()
+        board_stats = await repo.board_stats(recent_since=utc_now() - timedelta(hours=24))
+
+    assert hot_ids == [5, 6]
+    assert cold_count == 4
+    assert stats == stats_before == counted
+    assert board_stats[board_id].posts == 6
+    assert board_stats[board_id].active_posts == 1
+
+    async with session_scope() as session:
+        repo = Repository(session)
+        assert await repo.reconcile_board_counters() == 1
+        assert await repo.board_stats(recent_since=utc_now() - timedelta(hours=24)) == board_stats
+
+
+def test_trained_dictionary_round_trips_and_shrinks_similar_posts() -> None:
+    samples = [f"Продам велосипед номер {index}, почти новый, недорого. Пишите в личку!" for index in range(50)]
+    zdict = train_dictionary(samples)
+    text = "Продам велосипед номер 777, почти новый, недорого. Пишите в личку!"
+
+    compressed = compress_text(text, zdict)
+
+    assert decompress_text(compressed, zdict) == text
+    assert len(compressed) < len(compress_text(text)) // 2
+
+
+async def test_archive_is_compressed_and_recompressed_transparently(configured_db: None) -> None:
+    texts = [f"Продам велосипед номер {index}, почти новый, недорого. Пишите в личку!" for index in range(6)]
+    async with session_scope() as session:
+        repo = Repository(session)
+        await repo.sync_user(10, "u", "U", None)
+        board = await repo.create_board("Board", "@board", 120, 300)
+        board_id = board.id
+        for message_id, text in enumerate(texts, start=1):
+            await repo.create_post(10, board.id, text, message_id)
+
+    settings = Settings.model_construct(post_archive_after_days=0, post_archive_batch_size=10)
+    assert await archive_old_posts(settings) == 5
+
+    async with session_scope() as session:
+        repo = Repository(session)
+        first_id = (await session.exec(select(PostArchive.id).order_by(PostArchive.id))).first()
+        assert first_id is not None
+        assert await repo.get_archived_post_text(first_id) == texts[0]
+        before = await repo.archive_size_report()
+
+    async with session_scope() as session:
+        repo = Repository(session)
+        # Fresh traffic from other users to learn from; archived posts are not sampled.
+        for user_id in range(11, 21):
+            await repo.sync_user(user_id, None, "U", None)
+            await repo.create_post(user_id, board_id, f"Продам велосипед номер {user_id}, недорого.", user_id)
+
+    dictionary = await train_compression_dictionary(sample_size=100)
+    assert dictionary is not None
+    assert await compress_archive(batch_size=2) == 5
+    assert await compress_archive(batch_size=2) == 0
+
+    async with session_scope() as session:
+        repo = Repository(session)
+        stored = (await session.exec(select(PostArchive).order_by(PostArchive.id))).all()
+        assert {post.dictionary_id for post in stored} == {dictionary.id}
+        assert [await repo.get_archived_post_text(post.id) for post in stored] == texts[:5]
+        after = await repo.archive_size_report()
+
+    assert before["rows"] == after["rows"] == after["compressed_rows"] == 5
+    assert before["raw_bytes"] == after["raw_bytes"]
+    assert after["compressed_bytes"] < before["compressed_bytes"] < before["raw_bytes"]
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import nullcontext
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlmodel import func, select
+
+from app.config import get_settings
+from app.db.audit_partitions import months_before, partition_name
+from app.db.models import AuditLog
+from app.db.repositories import AuditCursor, AuditEntry, Repository
+from app.db.session import session_scope
+from app.services.audit import AuditSink, drop_expired_audit_partitions, move_legacy_audit_logs
+from app.utils.time import utc_now
+
+
+@pytest.fixture
+async def configured_db(configured_db: None) -> None:
+    async with session_scope() as session:
+        await Repository(session).sync_user(1, "admin", "A", None)
+
+
+async def audit_entries() -> list[AuditEntry]:
+    async with session_scope() as session:
+        return await Repository(session).list_audit_page(None, limit=1000)
+
+
+async def audit_count() -> int:
+    return len(await audit_entries())
+
+
+async def record_in_transaction(sink: AuditSink, action: str, *, fail: bool = False) -> None:
+    with pytest.raises(RuntimeError) if fail else nullcontext():
+        async with session_scope() as session:
+            sink.record(session, actor_user_id=1, action=action, target_type="board", metadata={"n": 1})
+            if fail:
+                raise RuntimeError("rolled back")
+
+
+async def test_audit_sink_buffers_until_batch_is_full_and_skips_rollbacks(configured_db: None, tmp_path) -> None:
+    sink = AuditSink(batch_size=3, flush_interval=60)
+    await sink.start(tmp_path / "audit.journal")
+    try:
+        await record_in_transaction(sink, "first")
+        await record_in_transaction(sink, "rolled_back", fail=True)
+        await record_in_transaction(sink, "second")
+
+        assert sink.pending == 2
+        assert await audit_count() == 0
+        assert len((tmp_path / "audit.journal").read_text(encoding="utf-8").splitlines()) == 2
+
+        # The third event fills the batch and wakes the background flusher.
+        await record_in_transaction(sink, "third")
+        for _ in range(100):
+            if sink.flushed == 3:
+                break
+            await asyncio.sleep(0.01)
+
+        assert sink.flushed == 3
+        assert await audit_count() == 3
+        assert (tmp_path / "audit.journal").read_text(encoding="utf-8") == ""
+    finally:
+        await sink.stop()
+
+    entries = await audit_entries()
+    assert [entry.action for entry in reversed(entries)] == ["first", "second", "third"]
+    assert entries[0].metadata_json == '{"n": 1}'
+
+
+async def test_audit_journal_is_replayed_after_a_crash(configured_db: None, tmp_path) -> None:
+    journal = tmp_path / "audit.journal"
+    crashed = AuditSink(batch_size=100, flush_interval=60)
+    crashed._open_journal(journal)
+    await record_in_transaction(crashed, "before_crash")
+    await record_in_transaction(crashed, "also_before_crash")
+    with journal.open("a", encoding="utf-8") as torn:
+        torn.write('{"actor_user_id": 1, "act')
+    # The process dies here: nothing reached the database.
+    assert await audit_count() == 0
+
+    restarted = AuditSink(batch_size=100, flush_interval=60)
+    try:
+        assert await restarted.start(journal) == 2
+        assert await audit_count() == 2
+    finally:
+        await restarted.stop()
+    assert journal.read_text(encoding="utf-8") == ""
+
+
+def audit_row(action: str, created_at: datetime, board_id: int | None = None) -> dict[str, object]:
+    return {
+        "actor_user_id": 1,
+        "action": action,
+        "target_type": "board",
+        "target_id": None,
+        "board_id": board_id,
+        "metadata_json": None,
+        "created_at": created_at,
+    }
+
+
+async def test_audit_rows_go_to_monthly_partitions_and_page_by_keyset(configured_db: None) -> None:
+    start = datetime(2026, 1, 31, 22, 0, tzinfo=UTC)
+    rows = [audit_row(f"e{n}", start + timedelta(minutes=10 * n), board_id=n % 2 + 1) for n in range(30)]
+    async with session_scope() as session:
+        await Repository(session).insert_audit_events(rows)
+
+    async with session_scope() as session:
+        repo = Repository(session)
+        assert await repo.list_audit_partitions() == ["audit_logs_202602", "audit_logs_202601"]
+
+        seen: list[str] = []
+        cursor = None
+        while True:
+            page = await repo.list_audit_page({1}, cursor, limit=4)
+            seen.extend(entry.action for entry in page)
+            if len(page) < 4:
+                break
+            cursor = AuditCursor.decode(page[-1].cursor.encode())
+        mixed = await repo.list_audit_page({1, 2}, limit=3)
+
+    assert seen == [f"e{n}" for n in range(28, -1, -2)]
+    assert [entry.action for entry in mixed] == ["e29", "e28", "e27"]
+
+
+async def test_partition_created_in_a_rolled_back_transaction_is_created_again(configured_db: None) -> None:
+    created_at = datetime(2031, 5, 1, tzinfo=UTC)
+    with pytest.raises(RuntimeError):
+        async with session_scope() as session:
+            await Repository(session).insert_audit_events([audit_row("lost", created_at)])
+            raise RuntimeError("rolled back")
+
+    async with session_scope() as session:
+        repo = Repository(session)
+        assert partition_name(created_at) not in await repo.list_audit_partitions()
+        await repo.insert_audit_events([audit_row("kept", created_at)])
+
+    assert [entry.action for entry in await audit_entries()] == ["kept"]
+
+
+async def test_audit_retention_drops_whole_partitions(configured_db: None, monkeypatch: pytest.MonkeyPatch) -> None:
+    now = utc_now()
+    async with session_scope() as session:
+        await Repository(session).insert_audit_events(
+            [audit_row("old", months_before(now, 3)), audit_row("recent", months_before(now, 1)), audit_row("now", now)]
+        )
+    monkeypatch.setenv("AUDIT_RETENTION_MONTHS", "2")
+    get_settings.cache_clear()
+
+    dropped = await drop_expired_audit_partitions(get_settings())
+
+    assert dropped == [partition_name(months_before(now, 3))]
+    assert [entry.action for entry in await audit_entries()] == ["now", "recent"]
+
+
+async def test_legacy_audit_rows_are_moved_into_partitions(configured_db: None) -> None:
+    async with session_scope() as session:
+        session.add_all(
+            [AuditLog(actor_user_id=1, action=f"legacy{n}", target_type="board") for n in range(5)]
+        )
+
+    assert await move_legacy_audit_logs(batch_size=2) == 5
+
+    async with session_scope() as session:
+        assert (await session.exec(select(func.count()).select_from(AuditLog))).one() == 0
+    assert sorted(entry.action for entry in await audit_entries()) == [f"legacy{n}" for n in range(5)]
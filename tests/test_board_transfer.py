@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from aiogram.types import User as TelegramUser
+
+from app.config import Settings
+from app.db.repositories import Repository
+from app.db.session import session_scope
+from app.services.admin import AdminBoardService, AdminContext, BoardImportResult
+from app.services.audit import audit_sink
+from app.services.board_transfer import (
+    BoardExportFile,
+    BoardImportError,
+    BoardRecord,
+    ImportIssue,
+    parse_boards,
+)
+
+CSV_DOCUMENT = (
+    "title,channel_id,rate_limit_seconds,max_text_length,rate_limit_burst,is_active,admins\n"
+    "News,@news,60,,3,,7 8\n"
+    "Jobs,@jobs,,500,,0,\n"
+)
+
+
+def _board_service(repo: Repository) -> AdminBoardService:
+    settings = Settings.model_construct(superadmin_ids=[1], default_rate_limit_seconds=120, default_max_text_length=300)
+    tg_user = TelegramUser(id=1, is_bot=False, first_name="Admin", username="admin")
+    return AdminBoardService(AdminContext(repo=repo, settings=settings, tg_user=tg_user))
+
+
+@pytest.fixture
+def boards(repo: Repository) -> AdminBoardService:
+    return _board_service(repo)
+
+
+async def _export(records: list[BoardRecord], export_format: str) -> bytes:
+    file = BoardExportFile(records, export_format)
+    file.chunk_size = 64
+    return b"".join([chunk async for chunk in file.read(None)])
+
+
+def test_parse_csv_and_json_documents() -> None:
+    records = parse_boards(CSV_DOCUMENT.encode(), "boards.csv")
+    document = [{"title": "News", "channel_id": "@news", "rate_limit_seconds": 60, "admins": [7, 8], "is_active": True}]
+
+    assert records == [
+        BoardRecord(title="News", channel_id="@news", rate_limit_seconds=60, rate_limit_burst=3, admins=(7, 8)),
+        BoardRecord(title="Jobs", channel_id="@jobs", max_text_length=500, is_active=False),
+    ]
+    assert parse_boards(json.dumps({"boards": document}).encode()) == [
+        BoardRecord(title="News", channel_id="@news", rate_limit_seconds=60, is_active=True, admins=(7, 8))
+    ]
+
+
+def test_parse_reports_every_bad_field() -> None:
+    document = "title,channel_id,rate_limit_seconds,admins\nNews,@news,-1,x\n,@jobs,,\nOther,@news,,\n"
+
+    with pytest.raises(BoardImportError) as caught:
+        parse_boards(document.encode(), "boards.csv")
+
+    assert caught.value.issues == [
+        ImportIssue(1, "rate_limit_seconds"),
+        ImportIssue(1, "admins"),
+        ImportIssue(2, "title"),
+        ImportIssue(3, "channel_id"),
+    ]
+    with pytest.raises(BoardImportError) as caught:
+        parse_boards(b"name,channel\nNews,@news\n", "boards.csv")
+    assert caught.value.issues == [ImportIssue(0, "title"), ImportIssue(0, "channel_id")]
+
+
+def test_parse_accepts_only_slugified_slugs() -> None:
+    document = "slug,title,channel_id\ndaily,News,@news\nDaily News,Jobs,@jobs\nнов/ости,Other,@other\n"
+
+    with pytest.raises(BoardImportError) as caught:
+        parse_boards(document.encode(), "boards.csv")
+
+    assert caught.value.issues == [ImportIssue(2, "slug"), ImportIssue(3, "slug")]
+
+
+async def test_import_creates_updates_and_skips_in_one_pass(repo: Repository, boards: AdminBoardService) -> None:
+    await repo.create_board("News", "@news", 120, 300)
+    await repo.create_board("Old", "@old", 120, 300)
+
+    result = await boards.import_boards(parse_boards(CSV_DOCUMENT.encode(), "boards.csv"))
+    rerun = await boards.import_boards(parse_boards(CSV_DOCUMENT.encode(), "boards.csv"))
+
+    assert result == BoardImportResult(created=1, updated=1, skipped=0)
+    assert rerun == BoardImportResult(created=0, updated=0, skipped=2)
+    await repo.session.commit()
+    assert audit_sink.pending == 1
+    exported = {record.channel_id: record for record in await boards.export_boards()}
+    assert exported["@news"] == BoardRecord(
+        slug="news",
+        title="News",
+        channel_id="@news",
+        rate_limit_seconds=60,
+        max_text_length=300,
+        rate_limit_burst=3,
+        is_active=True,
+        admins=(7, 8),
+    )
+    assert exported["@jobs"].is_active is False
+    assert exported["@jobs"].max_text_length == 500
+    assert exported["@old"].rate_limit_seconds == 120
+    assert await repo.stats() == {
+        "users": 1,
+        "boards_total": 3,
+        "boards_active": 2,
+        "posts_total": 0,
+        "posts_active": 0,
+    }
+
+
+@pytest.mark.parametrize("export_format", ["csv", "json"])
+async def test_export_round_trips_through_import(
+    repo: Repository, boards: AdminBoardService, export_format: str
+) -> None:
+    for index in range(5):
+        await repo.create_board("Board", f"@board{index}", 120 + index, 300)
+    await repo.grant_board_admins([(9, 1)])
+    records = await boards.export_boards()
+
+    data = await _export(records, export_format)
+
+    assert parse_boards(data, f"boards.{export_format}") == records
+    assert await boards.import_boards(parse_boards(data, f"boards.{export_format}")) == BoardImportResult(0, 0, 5)
+
+
+async def test_import_keeps_the_slugs_of_new_boards(repo: Repository, boards: AdminBoardService) -> None:
+    records = [
+        BoardRecord(slug="daily", title="News", channel_id="@news"),
+        BoardRecord(title="Daily", channel_id="@daily"),
+    ]
+
+    assert await boards.import_boards(records) == BoardImportResult(2, 0, 0)
+
+    assert {board.channel_id: board.slug for board in await repo.list_boards()} == {
+        "@news": "daily",
+        "@daily": "daily-2",
+    }
+    with pytest.raises(BoardImportError) as caught:
+        await boards.import_boards([BoardRecord(slug="jobs", title="A", channel_id="@a")] * 2)
+    assert caught.value.issues == [ImportIssue(1, "slug"), ImportIssue(2, "slug")]
+
+
+async def test_a_bad_record_rolls_the_whole_import_back(configured_db: None, monkeypatch: pytest.MonkeyPatch) -> None:
+    async with session_scope() as session:
+        repo = Repository(session)
+        await repo.create_board("News", "@news", 120, 300)
+        jobs = await repo.create_board("Jobs", "@jobs", 120, 300)
+    list_boards = Repository.list_boards
+
+    async def stale_list_boards(self: Repository, include_archived: bool = True) -> list:
+        # As read just before another admin created "jobs".
+        return [board for board in await list_boards(self, include_archived) if board.id != jobs.id]
+
+    monkeypatch.setattr(Repository, "list_boards", stale_list_boards)
+    records = [
+        BoardRecord(slug="news", title="Daily news", channel_id="@news"),
+        BoardRecord(title="Alpha", channel_id="@alpha"),
+        BoardRecord(slug="jobs", title="Jobs", channel_id="@jobs-2"),
+        BoardRecord(title="Gamma", channel_id="@gamma"),
+    ]
+
+    with pytest.raises(BoardImportError) as caught:
+        async with session_scope() as session:
+            await _board_service(Repository(session)).import_boards(records)
+
+    assert caught.value.issues == [ImportIssue(3, "slug")]
+    monkeypatch.undo()
+    async with session_scope() as session:
+        repo = Repository(session)
+        assert sorted(board.title for board in await repo.list_boards()) == ["Jobs", "News"]
+        assert (await repo.stats())["boards_total"] == 2
+
+
+async def test_a_failure_after_boards_are_created_leaves_none(
+    configured_db: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def failing_grants(self: Repository, grants) -> None:
+        raise RuntimeError("grant failed")
+
+    monkeypatch.setattr(Repository, "grant_board_admins", failing_grants)
+    records = [BoardRecord(title=title, channel_id=f"@{title.lower()}", admins=(7,)) for title in ("Alpha", "Beta")]
+
+    with pytest.raises(RuntimeError):
+        async with session_scope() as session:
+            await _board_service(Repository(session)).import_boards(records)
+
+    async with session_scope() as session:
+        repo = Repository(session)
+        assert await repo.list_boards() == []
+        assert (await repo.stats())["boards_total"] == 0
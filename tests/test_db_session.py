@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.db.models import STAT_COUNTERS
+from app.db.repositories import NewBoard, Repository
+from app.db.session import (
+    async_database_url,
+    read_session_scope,
+    session_scope,
+)
+
+
+def test_async_database_url_picks_async_drivers() -> None:
+    assert async_database_url("sqlite:///database.db") == "sqlite+aiosqlite:///database.db"
+    assert async_database_url("postgresql://u:p@db/bot") == "postgresql+asyncpg://u:p@db/bot"
+    assert async_database_url("sqlite+aiosqlite://") == "sqlite+aiosqlite://"
+
+
+async def test_sqlite_writer_uses_wal_and_reader_pool_is_read_only(configured_db: None) -> None:
+    async with session_scope() as session:
+        journal_mode = (await session.exec(text("PRAGMA journal_mode"))).scalar_one()
+
+    assert journal_mode == "wal"
+
+    async with read_session_scope() as session:
+        assert (await session.exec(text("SELECT count(*) FROM boards"))).scalar_one() == 0
+        with pytest.raises(OperationalError):
+            await session.exec(text("INSERT INTO users (id, is_globally_blocked, created_at) VALUES (1, 0, '2024-01-01')"))
+
+
+
+async def test_stats_of_a_fresh_database_read_on_the_read_only_pool(configured_db: None) -> None:
+    async with read_session_scope() as session:
+        assert await Repository(session).stats() == dict.fromkeys(STAT_COUNTERS, 0)
+
+    async with session_scope() as session:
+        await Repository(session).sync_user(1, "user", None, None)
+
+    async with read_session_scope() as session:
+        assert (await Repository(session).stats())["users"] == 1
+
+
+async def test_released_savepoint_rolls_back_with_the_outer_transaction(configured_db: None) -> None:
+    with pytest.raises(RuntimeError):
+        async with session_scope() as session:
+            repo = Repository(session)
+            await repo.list_boards(include_archived=True)
+            await repo.create_boards([NewBoard("News", "@news", 120, 300)])
+            raise RuntimeError("handler failed")
+
+    async with read_session_scope() as session:
+        assert await Repository(session).list_boards(include_archived=True) == []
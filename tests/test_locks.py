@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.config import Settings
+from app.services.locks import (
+    FileLockBackend,
+    LockManager,
+    PostgresAdvisoryLockBackend,
+    build_lock_backend,
+)
+
+
+async def test_locks_serialize_one_key_and_are_dropped_when_idle() -> None:
+    locks = LockManager()
+    order: list[str] = []
+
+    async def critical(name: str, key: str) -> None:
+        async with locks.hold(key):
+            order.append(f"{name}+")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}-")
+
+    await asyncio.gather(critical("a", "user:1"), critical("b", "user:1"), critical("c", "user:2"))
+
+    assert order.index("a-") < order.index("b+")
+    assert order.index("c+") < order.index("a-")
+    assert len(locks) == 0
+
+
+async def test_cancelled_waiter_releases_its_reference() -> None:
+    locks = LockManager()
+    async with locks.hold("user:1"):
+        waiter = asyncio.create_task(_enter(locks, "user:1"))
+        await asyncio.sleep(0)
+        assert len(locks) == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+    assert len(locks) == 0
+
+
+async def test_file_backend_excludes_other_processes(tmp_path: Path) -> None:
+    # Two managers with their own descriptors stand in for two worker processes.
+    first = LockManager(FileLockBackend(tmp_path, stripes=4))
+    second = LockManager(FileLockBackend(tmp_path, stripes=4))
+    entered = asyncio.Event()
+
+    async with first.hold("publish:1"):
+        contender = asyncio.create_task(_enter(second, "publish:1", entered))
+        await asyncio.sleep(0.05)
+        assert not entered.is_set()
+    await asyncio.wait_for(contender, timeout=1)
+
+    assert entered.is_set()
+    assert len(list(tmp_path.glob("*.lock"))) == 1
+
+
+async def test_waiting_for_a_backend_lock_times_out(tmp_path: Path) -> None:
+    first = LockManager(FileLockBackend(tmp_path, stripes=4))
+    second = LockManager(FileLockBackend(tmp_path, stripes=4), timeout=0.05)
+
+    async with first.hold("publish:1"):
+        with pytest.raises(TimeoutError):
+            await _enter(second, "publish:1")
+        assert len(second) == 0
+
+    await asyncio.wait_for(_enter(second, "publish:1"), timeout=1)
+
+
+def test_backend_is_picked_from_settings(tmp_path: Path) -> None:
+    assert build_lock_backend(Settings.model_construct(publish_lock_backend="local")) is None
+    backend = build_lock_backend(Settings.model_construct(publish_lock_backend="file", publish_lock_dir=str(tmp_path)))
+    assert isinstance(backend, FileLockBackend)
+    with pytest.raises(RuntimeError):
+        build_lock_backend(
+            Settings.model_construct(publish_lock_backend="postgres", database_url="sqlite:///database.db")
+        )
+    backend = build_lock_backend(
+        Settings.model_construct(
+            publish_lock_backend="postgres", database_url="postgresql://bot@db/bot", publish_lock_pool_size=3
+        )
+    )
+    assert isinstance(backend, PostgresAdvisoryLockBackend)
+    assert backend.pool_size == 3
+
+
+async def _enter(locks: LockManager, key: str, entered: asyncio.Event | None = None) -> None:
+    async with locks.hold(key):
+        if entered is not None:
+            entered.set()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta, timezone
+from typing import Any
+
+import pytest
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, event, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.schema import CreateTable
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.audit_partitions import audit_partition
+from app.db.migrations import HEAD, Migration, current_version, migrate, runner
+from app.db.migrations.online import rebuild_table
+from app.db.migrations.v0002_reviewed_indexes import concurrent_index_statements
+from app.db.migrations.v0005_timestamptz import timestamptz_statements
+from app.db.models import STAT_COUNTERS, Post
+from app.db.repositories import Repository
+from app.db.session import install_sqlite_transactions
+from app.db.types import UTCDateTime
+
+
+@pytest.fixture
+async def engine(tmp_path) -> AsyncIterator[AsyncEngine]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    install_sqlite_transactions(engine)
+    yield engine
+    await engine.dispose()
+
+
+async def names(engine: AsyncEngine, kind: str) -> set[str]:
+    async with engine.connect() as connection:
+        rows = await connection.execute(text("SELECT name FROM sqlite_master WHERE type = :kind"), {"kind": kind})
+        return set(rows.scalars())
+
+
+async def counters(engine: AsyncEngine) -> dict[str, int]:
+    async with engine.connect() as connection:
+        rows = await connection.execute(text("SELECT name, value FROM stat_counters"))
+        return {name: value for name, value in rows}
+
+
+async def test_new_database_is_stamped_and_up_to_date_start_is_one_query(engine: AsyncEngine) -> None:
+    assert await migrate(engine) == []
+    assert await current_version(engine) == HEAD
+    assert "posts" in await names(engine, "table")
+    assert await counters(engine) == dict.fromkeys(STAT_COUNTERS, 0)
+
+    statements: list[str] = []
+
+    def capture(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        # BEGIN is sent by the engine for every transaction, not by migrate().
+        if statement != "BEGIN":
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        assert await migrate(engine) == []
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    assert len(statements) == 1
+
+
+async def test_unversioned_database_gets_missing_tables_and_reviewed_indexes(engine: AsyncEngine) -> None:
+    await migrate(engine)
+    async with engine.begin() as connection:
+        # What a database created before versioning looks like.
+        await connection.execute(text("DROP TABLE schema_version"))
+        await connection.execute(text("DROP TABLE stat_counters"))
+        await connection.execute(text("DROP INDEX ix_admin_roles_user_role_board"))
+        await connection.execute(text("CREATE INDEX ix_posts_user_board_active ON posts (user_id, board_id, is_archived)"))
+
+    assert await migrate(engine) == [1, 2, 3, 4, 5, 6, 7]
+
+    assert "stat_counters" in await names(engine, "table")
+    assert await counters(engine) == dict.fromkeys(STAT_COUNTERS, 0)
+    indexes = await names(engine, "index")
+    assert {"ix_admin_roles_user_role_board", "ix_posts_user_board_posted", "ix_posts_archived_queue"} <= indexes
+    assert "ix_posts_user_board_active" not in indexes
+    assert await current_version(engine) == HEAD
+
+
+
+
+async def test_offline_migration_is_only_applied_when_allowed(
+    engine: AsyncEngine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    await migrate(engine)
+    upgraded: list[int] = []
+
+    async def upgrade(_engine: AsyncEngine) -> None:
+        upgraded.append(HEAD + 1)
+
+    offline = Migration(HEAD + 1, "rewrite", upgrade, offline_dialects=("sqlite",))
+    monkeypatch.setattr(runner, "MIGRATIONS", (*runner.MIGRATIONS, offline))
+    monkeypatch.setattr(runner, "HEAD", HEAD + 1)
+
+    with pytest.raises(RuntimeError, match="board-anon-bot-admin migrate"):
+        await migrate(engine)
+    assert upgraded == []
+    assert await current_version(engine) == HEAD
+
+    assert await migrate(engine, allow_offline=True) == [HEAD + 1]
+    assert upgraded == [HEAD + 1]
+
+
+def test_indexes_are_built_concurrently_on_postgres() -> None:
+    statements = concurrent_index_statements(postgresql.dialect())
+    assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_posts_posted_at ON posts (posted_at)" in statements
+    assert "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_boards_slug ON boards (slug)" in statements
+    assert statements[-1] == "DROP INDEX CONCURRENTLY IF EXISTS ix_board_memberships_user_id"
+    assert all("CONCURRENTLY" in statement for statement in statements)
+
+
+async def test_board_states_are_backfilled_once_by_a_migration(engine: AsyncEngine) -> None:
+    await migrate(engine)
+    async with AsyncSession(engine) as session:
+        repo = Repository(session)
+        await repo.sync_user(1, "user", None, None)
+        board = await repo.create_board("Board", "@board", 120, 300)
+        await repo.ensure_membership(1, board.id)
+        await session.commit()
+    async with engine.begin() as connection:
+        # A membership written before user_board_state existed.
+        await connection.execute(text("DELETE FROM user_board_state"))
+        await connection.execute(text("DELETE FROM schema_version WHERE version = 7"))
+
+    assert await migrate(engine) == [7]
+
+    async with engine.connect() as connection:
+        states = (await connection.execute(text("SELECT user_id, board_id FROM user_board_state"))).all()
+    assert states == [(1, 1)]
+def test_timestamps_are_timestamptz_on_postgres() -> None:
+    # asyncpg refuses the aware datetimes of utc_now() for a plain timestamp column.
+    tables = [*SQLModel.metadata.sorted_tables, audit_partition("audit_logs_202601")]
+    naive = [
+        f"{table.name}.{column.name}"
+        for table in tables
+        for column in table.columns
+        if column.type.python_type is datetime and not isinstance(column.type, UTCDateTime)
+    ]
+    assert naive == []
+    ddl = str(CreateTable(Post.__table__).compile(dialect=postgresql.dialect()))
+    assert "posted_at TIMESTAMP WITH TIME ZONE NOT NULL" in ddl
+    column_type = UTCDateTime()
+    moscow = datetime(2026, 1, 1, 3, tzinfo=timezone(timedelta(hours=3)))
+    assert column_type.process_bind_param(moscow, postgresql.dialect()) == datetime(2026, 1, 1, tzinfo=UTC)
+    # SQLite hands back the stored value without an offset.
+    read = column_type.process_result_value(datetime(2026, 1, 1), sqlite.dialect())
+    assert read is not None and read.tzinfo is UTC
+
+    statements = timestamptz_statements(["posts", "audit_logs_202601", "unknown"])
+    assert statements[0] == (
+        "ALTER TABLE audit_logs_202601 ALTER COLUMN created_at "
+        "TYPE TIMESTAMP WITH TIME ZONE USING created_at AT TIME ZONE 'UTC'"
+    )
+    # Both timestamps of posts change in one rewrite of the table.
+    (posts,) = statements[1:]
+    assert posts.count("ALTER COLUMN") == 2
+    assert "posted_at TYPE" in posts and "archived_at TYPE" in posts
+
+
+async def test_rebuild_table_copies_in_chunks_and_keeps_concurrent_writes(engine: AsyncEngine) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)"))
+        await connection.execute(text("INSERT INTO items (id, value) VALUES (:id, :id)"), [{"id": n} for n in range(1, 51)])
+
+    target = Table(
+        "items",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("value", Integer, nullable=False),
+        Column("note", String(32)),
+        Index("ix_items_value", "value"),
+    )
+
+    async def write_meanwhile() -> None:
+        for n in range(10):
+            async with engine.begin() as connection:
+                await connection.execute(text("UPDATE items SET value = value + 1000 WHERE id = 1"))
+                await connection.execute(text("INSERT INTO items (id, value) VALUES (:id, 0)"), {"id": 100 + n})
+                await connection.execute(text("DELETE FROM items WHERE id = :id"), {"id": 40 + n})
+            await asyncio.sleep(0)
+
+    copied, _ = await asyncio.gather(rebuild_table(engine, target, batch_size=7), write_meanwhile())
+
+    async with engine.connect() as connection:
+        rows = dict((await connection.execute(text("SELECT id, value FROM items"))).all())
+        columns = [row[1] for row in await connection.execute(text("PRAGMA table_info(items)"))]
+    assert copied > 0
+    assert columns == ["id", "value", "note"]
+    assert rows[1] == 10_001
+    assert all(100 + n in rows for n in range(10))
+    assert all(40 + n not in rows for n in range(10))
+    assert len(rows) == 50
+    assert "ix_items_value" in await names(engine, "index")
+    assert not await names(engine, "trigger")
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from app.services.outbound import (
+    OutboundRequestMiddleware,
+    OutboundScheduler,
+    SendPriority,
+    prepaid_send,
+    send_priority,
+)
+
+
+def make_scheduler(**overrides: float) -> OutboundScheduler:
+    options = {"global_per_second": 1000.0, "channel_per_minute": 60_000.0, "private_per_second": 1000.0}
+    options.update(overrides)
+    return OutboundScheduler(**options)
+
+
+async def test_publishes_overtake_queued_replies() -> None:
+    scheduler = make_scheduler(global_per_second=20.0)
+    for chat in range(20):
+        await scheduler.acquire(f"-100{chat}")
+    order: list[str] = []
+
+    async def send(name: str, chat_id: str, priority: SendPriority) -> None:
+        with send_priority(priority):
+            await scheduler.acquire(chat_id)
+        order.append(name)
+
+    reply = asyncio.create_task(send("reply", "42", SendPriority.REPLY))
+    cleanup = asyncio.create_task(send("cleanup", "@board", SendPriority.CLEANUP))
+    await asyncio.sleep(0)
+    publish = asyncio.create_task(send("publish", "@board", SendPriority.PUBLISH))
+    await asyncio.sleep(0)
+    assert scheduler.stats().queued == 3
+    assert scheduler.stats().queued_publishes == 1
+
+    await asyncio.gather(reply, cleanup, publish)
+
+    assert order == ["publish", "reply", "cleanup"]
+    stats = scheduler.stats()
+    assert (stats.queued, stats.sent) == (0, 23)
+    assert stats.wait_max_seconds > 0
+
+
+async def test_throttled_chat_does_not_hold_back_other_chats() -> None:
+    scheduler = make_scheduler(channel_per_minute=60.0)
+    for _ in range(3):
+        await scheduler.acquire("@busy")
+    order: list[str] = []
+
+    async def send(chat_id: str, priority: SendPriority) -> None:
+        await scheduler.acquire(chat_id, priority)
+        order.append(chat_id)
+
+    busy = asyncio.create_task(send("@busy", SendPriority.PUBLISH))
+    await asyncio.sleep(0)
+    await asyncio.wait_for(send("@quiet", SendPriority.CLEANUP), timeout=0.5)
+
+    assert order == ["@quiet"]
+    assert not busy.done()
+    await scheduler.stop()
+    with pytest.raises(asyncio.CancelledError):
+        await busy
+
+
+async def test_middleware_pauses_chat_and_retries_after_flood_control() -> None:
+    scheduler = make_scheduler()
+    middleware = OutboundRequestMiddleware(scheduler, max_retries=2, max_retry_after=5)
+    method = SendMessage(chat_id="@board", text="post")
+    calls: list[Any] = []
+
+    async def make_request(bot: Any, request: Any) -> str:
+        calls.append(request)
+        if len(calls) == 1:
+            raise TelegramRetryAfter(method=request, message="Too Many Requests", retry_after=0)
+        return "sent"
+
+    assert await middleware(make_request, None, method) == "sent"
+    assert len(calls) == 2
+    assert scheduler.stats().retried == 1
+
+    async def always_flooded(bot: Any, request: Any) -> str:
+        raise TelegramRetryAfter(method=request, message="Too Many Requests", retry_after=60)
+
+    with pytest.raises(TelegramRetryAfter):
+        await middleware(always_flooded, None, method)
+
+
+async def test_middleware_passes_through_requests_without_a_chat() -> None:
+    scheduler = make_scheduler(global_per_second=1.0)
+    middleware = OutboundRequestMiddleware(scheduler, max_retries=0, max_retry_after=0)
+    await scheduler.acquire("@board")
+
+    async def make_request(bot: Any, request: Any) -> bool:
+        return True
+
+    assert await asyncio.wait_for(middleware(make_request, None, AnswerCallbackQuery(callback_query_id="1")), 0.1)
+    assert scheduler.stats().sent == 1
+
+
+async def test_try_acquire_never_waits_and_prepaid_sends_skip_the_queue() -> None:
+    scheduler = make_scheduler(channel_per_minute=60.0)
+    middleware = OutboundRequestMiddleware(scheduler, max_retries=0, max_retry_after=0)
+    assert [scheduler.try_acquire("@board") for _ in range(4)] == [True, True, True, False]
+    assert scheduler.stats().sent == 3
+
+    async def make_request(bot: Any, request: Any) -> str:
+        return "sent"
+
+    # The tokens were taken by try_acquire; the request itself takes none.
+    with prepaid_send("@board"):
+        assert await asyncio.wait_for(middleware(make_request, None, SendMessage(chat_id="@board", text="x")), 0.1)
+    assert scheduler.stats().sent == 3
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError
+from aiogram.methods import SendMessage
+from aiogram.types import User as TelegramUser
+from sqlmodel import select
+
+from app.config import get_settings
+from app.db.models import OutboxMessage
+from app.db.repositories import (
+    OUTBOX_DELETE,
+    OUTBOX_FAILED,
+    OUTBOX_PENDING,
+    OUTBOX_SENDING,
+    Repository,
+)
+from app.db.session import session_scope
+from app.services.locks import publish_locks
+from app.services.outbound import outbound_scheduler
+from app.services.outbox import outbox_dispatcher
+from app.services.posting import publish_text_post
+
+
+class SentMessage:
+    def __init__(self, message_id: int):
+        self.message_id = message_id
+
+
+class ChannelBot:
+    """Fake bot whose requests fail with the queued errors first."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.sent: list[tuple[str, str]] = []
+        self.deleted: list[tuple[str, int]] = []
+        self.delete_calls: list[tuple[str, int]] = []
+
+    async def send_message(
+        self,
+        chat_id: str,
+        text: str,
+        parse_mode: str | None = None,
+        disable_web_page_preview: bool = True,
+    ) -> SentMessage:
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+        return SentMessage(700 + len(self.sent))
+
+    async def delete_messages(self, chat_id: str, message_ids: list[int]) -> bool:
+        if self.errors:
+            raise self.errors.pop(0)
+        self.delete_calls.append((chat_id, len(message_ids)))
+        self.deleted.extend((chat_id, message_id) for message_id in message_ids)
+        return True
+
+
+@pytest.fixture
+def configured_db(configured_db: None, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Retries are due at once so the tests can dispatch them without waiting.
+    monkeypatch.setattr(outbox_dispatcher, "retry_base", 0)
+
+
+async def prepare_board(user_id: int = 100) -> TelegramUser:
+    async with session_scope() as session:
+        repo = Repository(session)
+        await repo.sync_user(user_id, "user", "Test", None)
+        board = await repo.create_board("Board", "@board", 0, 300)
+        await repo.set_user_selected_board(user_id, board.id)
+        await repo.ensure_membership(user_id, board.id)
+
+    return TelegramUser(id=user_id, is_bot=False, first_name="Test", username="user")
+
+
+async def outbox_entries() -> list[OutboxMessage]:
+    async with session_scope() as session:
+        return list((await session.exec(select(OutboxMessage).order_by(OutboxMessage.id))).all())
+
+
+async def active_message_id(user_id: int = 100) -> int | None:
+    async with session_scope() as session:
+        repo = Repository(session)
+        selection = await repo.get_user_selection(user_id)
+        assert selection is not None
+        state = await repo.get_board_state(user_id, selection.board_id)
+        return state.active_message_id if state is not None else None
+
+
+def network_error() -> TelegramNetworkError:
+    return TelegramNetworkError(SendMessage(chat_id="@board", text="x"), "timeout")
+
+
+async def test_unreachable_channel_queues_the_post_until_it_recovers(configured_db: None) -> None:
+    settings = get_settings()
+    tg_user = await prepare_board()
+    bot = ChannelBot(network_error())
+
+    result = await publish_text_post(bot=bot, tg_user=tg_user, text="hello", settings=settings)
+
+    assert result.status == "queued"
+    (entry,) = await outbox_entries()
+    assert (entry.status, entry.attempts) == (OUTBOX_PENDING, 1)
+    assert await active_message_id() is None
+
+    assert await outbox_dispatcher.dispatch_due(bot) == 1
+
+    assert bot.sent == [("@board", "hello")]
+    assert await outbox_entries() == []
+    assert await active_message_id() == 701
+
+
+async def test_post_waits_for_the_dispatcher_when_the_channel_lane_is_empty(configured_db: None) -> None:
+    settings = get_settings()
+    tg_user = await prepare_board()
+    bot = ChannelBot()
+    while outbound_scheduler.try_acquire("@board"):
+        pass
+
+    result = await publish_text_post(bot=bot, tg_user=tg_user, text="hello", settings=settings)
+
+    assert result.status == "queued"
+    assert bot.sent == []
+    (entry,) = await outbox_entries()
+    assert (entry.status, entry.attempts) == (OUTBOX_PENDING, 0)
+    assert await outbox_dispatcher.dispatch_due(bot) == 1
+    assert bot.sent == [("@board", "hello")]
+
+
+async def test_publish_lock_is_released_before_the_channel_send(configured_db: None) -> None:
+    settings = get_settings()
+    tg_user = await prepare_board()
+    sending = asyncio.Event()
+    release = asyncio.Event()
+
+    class SlowBot(ChannelBot):
+        async def send_message(self, *args: Any, **kwargs: Any) -> SentMessage:
+            sending.set()
+            await release.wait()
+            return await super().send_message(*args, **kwargs)
+
+    bot = SlowBot()
+    publish = asyncio.create_task(publish_text_post(bot=bot, tg_user=tg_user, text="hello", settings=settings))
+    await asyncio.wait_for(sending.wait(), 1)
+
+    async with asyncio.timeout(1):
+        async with publish_locks.hold(f"publish:{tg_user.id}"):
+            pass
+    release.set()
+    assert (await publish).status == "success"
+
+
+async def test_unexpected_send_error_is_logged_and_retried(
+    configured_db: None, caplog: pytest.LogCaptureFixture
+) -> None:
+    settings = get_settings()
+    tg_user = await prepare_board()
+    bot = ChannelBot(RuntimeError("bug"))
+
+    result = await publish_text_post(bot=bot, tg_user=tg_user, text="hello", settings=settings)
+
+    assert result.status == "queued"
+    assert "Unexpected error sending outbox entry" in caplog.text
+    (entry,) = await outbox_entries()
+    assert (entry.status, entry.attempts) == (OUTBOX_PENDING, 1)
+
+
+async def test_newer_post_replaces_a_queued_one(configured_db: None) -> None:
+    settings = get_settings()
+    tg_user = await prepare_board()
+    bot = ChannelBot()
+    await publish_text_post(bot=bot, tg_user=tg_user, text="first", settings=settings)
+    bot.errors.append(network_error())
+    queued = await publish_text_post(bot=bot, tg_user=tg_user, text="second", settings=settings)
+
+    third = await publish_text_post(bot=bot, tg_user=tg_user, text="third", settings=settings)
+    await outbox_dispatcher.dispatch_due(bot)
+
+    assert [queued.status, third.status] == ["queued", "success"]
+    # "second" never goes out, and "third" takes over deleting "first".
+    assert bot.sent == [("@board", "first"), ("@board", "third")]
+    assert bot.deleted == [("@board", 701)]
+    assert await outbox_entries() == []
+    assert await active_message_id() == 702
+
+
+async def test_replaced_messages_are_deleted_in_batches_per_chat(configured_db: None) -> None:
+    settings = get_settings()
+    tg_user = await prepare_board()
+    bot = ChannelBot()
+    await publish_text_post(bot=bot, tg_user=tg_user, text="first", settings=settings)
+    await publish_text_post(bot=bot, tg_user=tg_user, text="second", settings=settings)
+
+    # Replacing a post only queues the delete; nothing is deleted inline.
+    assert bot.deleted == []
+    backlog = [("@board", message_id) for message_id in range(1, 150)] + [("@other", 1), ("@other", 2)]
+    async with session_scope() as session:
+        for chat_id, message_id in backlog:
+            session.add(OutboxMessage(kind=OUTBOX_DELETE, status=OUTBOX_PENDING, chat_id=chat_id, message_id=message_id))
+    bot.errors.append(network_error())
+
+    assert await outbox_dispatcher.dispatch_due(bot) == 152
+    # The first @board call failed: its ids stay queued for a retry, the rest went out.
+    retried = await outbox_entries()
+    assert {(entry.status, entry.attempts) for entry in retried} == {(OUTBOX_PENDING, 1)}
+    assert len(retried) == 100
+
+    assert await outbox_dispatcher.dispatch_due(bot) == 100
+
+    assert bot.delete_calls == [("@board", 50), ("@other", 2), ("@board", 100)]
+    assert ("@board", 701) in bot.deleted
+    assert await outbox_entries() == []
+
+
+async def test_start_resumes_entries_a_stopped_process_left_in_flight(configured_db: None) -> None:
+    await prepare_board()
+    async with session_scope() as session:
+        repo = Repository(session)
+        post = await repo.create_post(100, 1, "hello")
+        entry = await repo.add_outbox_publish(post, "@board", replaces_message_id=None)
+    assert entry.status == OUTBOX_SENDING
+    bot = ChannelBot()
+
+    assert await outbox_dispatcher.start(bot) == 1
+    for _ in range(100):
+        if not await outbox_entries():
+            break
+        await asyncio.sleep(0.01)
+    await outbox_dispatcher.stop()
+
+    assert bot.sent == [("@board", "hello")]
+    assert await outbox_entries() == []
+    assert await active_message_id() == 701
+
+
+async def test_entries_leased_by_a_live_dispatcher_are_left_alone(
+    configured_db: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    await prepare_board()
+    async with session_scope() as session:
+        repo = Repository(session)
+        post = await repo.create_post(100, 1, "hello")
+        # Being delivered by another process, whose lease has most of its time left.
+        entry = await repo.add_outbox_publish(
+            post, "@board", replaces_message_id=None, next_attempt_at=outbox_dispatcher.lease_until()
+        )
+    bot = ChannelBot()
+
+    assert await outbox_dispatcher.start(bot) == 0
+    await outbox_dispatcher.stop()
+    assert await outbox_dispatcher.dispatch_due(bot) == 0
+    assert bot.sent == []
+
+    expired = entry.next_attempt_at + timedelta(seconds=1)
+    monkeypatch.setattr("app.services.outbox.utc_now", lambda: expired)
+    assert await outbox_dispatcher.dispatch_due(bot) == 1
+    assert bot.sent == [("@board", "hello")]
+    assert await outbox_entries() == []
+
+
+async def test_rejected_post_is_archived_and_its_predecessor_restored(configured_db: None) -> None:
+    settings = get_settings()
+    tg_user = await prepare_board()
+    bot = ChannelBot()
+    await publish_text_post(bot=bot, tg_user=tg_user, text="first", settings=settings)
+    bot.errors.append(TelegramBadRequest(SendMessage(chat_id="@board", text="x"), "Bad Request: message is too long"))
+
+    result = await publish_text_post(bot=bot, tg_user=tg_user, text="second", settings=settings)
+
+    assert result.status == "publish_error"
+    (failed,) = await outbox_entries()
+    assert (failed.status, failed.attempts) == (OUTBOX_FAILED, 1)
+    async with session_scope() as session:
+        repo = Repository(session)
+        stats = await repo.stats()
+        active = await repo.get_active_post(100, 1)
+    assert active is not None and (active.text, active.telegram_message_id) == ("first", 701)
+    assert (stats["posts_total"], stats["posts_active"]) == (2, 1)
+    assert await active_message_id() == 701
+
+    await outbox_dispatcher.dispatch_due(bot)
+
+    assert bot.deleted == []
+    # The next post replaces the restored one as usual.
+    await publish_text_post(bot=bot, tg_user=tg_user, text="third", settings=settings)
+    await outbox_dispatcher.dispatch_due(bot)
+    assert bot.deleted == [("@board", 701)]
+
+
+async def test_rejected_post_replaced_meanwhile_still_removes_its_predecessor(configured_db: None) -> None:
+    settings = get_settings()
+    tg_user = await prepare_board()
+    bot = ChannelBot()
+    await publish_text_post(bot=bot, tg_user=tg_user, text="first", settings=settings)
+    async with session_scope() as session:
+        repo = Repository(session)
+        second = await repo.create_post(100, 1, "second")
+        entry = await repo.add_outbox_publish(second, "@board", replaces_message_id=701)
+        # "third" arrives while "second" is being sent, so it cannot take the cleanup over.
+        await repo.create_post(100, 1, "third")
+
+    async with session_scope() as session:
+        await Repository(session).fail_outbox(entry, "message is too long")
+
+    async with session_scope() as session:
+        active = await Repository(session).get_active_post(100, 1)
+    assert active is not None and active.text == "third"
+    await outbox_dispatcher.dispatch_due(bot)
+    assert bot.deleted == [("@board", 701)]
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import inspect
+import re
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.repositories import OUTBOX_PENDING, OUTBOX_PUBLISH, AuditCursor, NewBoard, Repository
+from app.utils.time import utc_now
+
+Scenario = Callable[[Repository], Awaitable[Any]]
+SUPERADMINS: frozenset[int] = frozenset()
+HOUR_AGO = utc_now() - timedelta(hours=1)
+
+# Every public Repository method and the calls whose statements are explained.
+SCENARIOS: dict[str, Scenario] = {
+    "add_outbox_publish": lambda repo: _queue_publish(repo),
+    "archive_post": lambda repo: _archive_live_post(repo),
+    "archive_size_report": lambda repo: repo.archive_size_report(),
+    "backfill_board_states": lambda repo: repo.backfill_board_states(),
+    "board_stats": lambda repo: repo.board_stats(recent_since=HOUR_AGO),
+    "cancel_outbox_publish": lambda repo: repo.cancel_outbox_publish(6),
+    "claim_due_outbox": lambda repo: repo.claim_due_outbox(utc_now(), 10, utc_now(), kind=OUTBOX_PUBLISH),
+    "complete_outbox": lambda repo: _deliver_outbox(repo, "complete"),
+    "count_stats": lambda repo: repo.count_stats(),
+    "create_board": lambda repo: repo.create_board("Another", "@another", 120, 300),
+    "create_boards": lambda repo: repo.create_boards(
+        [NewBoard("First", "@first2", 120, 300), NewBoard("Third", "@third", 120, 300)]
+    ),
+    "create_post": lambda repo: repo.create_post(1, 1, "next", telegram_message_id=900),
+    "drop_audit_partitions": lambda repo: repo.drop_audit_partitions(utc_now() - timedelta(days=400)),
+    "drop_outbox": lambda repo: repo.drop_outbox([1]),
+    "ensure_membership": lambda repo: repo.ensure_membership(3, 2),
+    "fail_outbox": lambda repo: _deliver_outbox(repo, "fail"),
+    "get_active_post": lambda repo: repo.get_active_post(1, 1),
+    "get_archived_post_text": lambda repo: repo.get_archived_post_text(1000),
+    "get_board": lambda repo: repo.get_board(1),
+    "get_board_state": lambda repo: repo.get_board_state(1, 1),
+    "get_publish_context": lambda repo: repo.get_publish_context(1, SUPERADMINS),
+    "get_selected_board": lambda repo: repo.get_selected_board(1),
+    "get_user": lambda repo: repo.get_user(1),
+    "get_user_selection": lambda repo: repo.get_user_selection(1),
+    "grant_board_admin": lambda repo: repo.grant_board_admin(3, 2),
+    "grant_board_admins": lambda repo: repo.grant_board_admins([(2, 1), (3, 2)]),
+    "grant_superadmin": lambda repo: repo.grant_superadmin(3),
+    "insert_audit_events": lambda repo: repo.insert_audit_events([_audit_row()]),
+    "is_any_admin": lambda repo: repo.is_any_admin(3, SUPERADMINS),
+    "is_board_admin": lambda repo: repo.is_board_admin(2, 1, SUPERADMINS),
+    "is_superadmin": lambda repo: repo.is_superadmin(2, SUPERADMINS),
+    "latest_compression_dictionary": lambda repo: repo.latest_compression_dictionary(),
+    "list_admin_roles": lambda repo: repo.list_admin_roles(2),
+    "list_audit_page": lambda repo: _page_audit_log(repo),
+    "list_audit_partitions": lambda repo: repo.list_audit_partitions(),
+    "list_board_admin_ids": lambda repo: repo.list_board_admin_ids(),
+    "list_boards": lambda repo: repo.list_boards(include_archived=False),
+    "list_manageable_boards": lambda repo: repo.list_manageable_boards(2, SUPERADMINS),
+    "list_post_times_since": lambda repo: repo.list_post_times_since(HOUR_AGO, {9}),
+    "list_rate_bursts": lambda repo: repo.list_rate_bursts(),
+    "move_archived_posts": lambda repo: repo.move_archived_posts(utc_now(), limit=10),
+    "move_legacy_audit_logs": lambda repo: repo.move_legacy_audit_logs(limit=10),
+    "recompress_archived_posts": lambda repo: repo.recompress_archived_posts(after_id=0, limit=10),
+    "reconcile_board_counters": lambda repo: repo.reconcile_board_counters(),
+    "reconcile_stats": lambda repo: repo.reconcile_stats(),
+    "requeue_outbox": lambda repo: repo.requeue_outbox(utc_now()),
+    "retry_outbox": lambda repo: _deliver_outbox(repo, "retry"),
+    "revoke_board_admin": lambda repo: repo.revoke_board_admin(2, 1),
+    "revoke_superadmin": lambda repo: repo.revoke_superadmin(2),
+    "sample_post_texts": lambda repo: repo.sample_post_texts(10),
+    "save_compression_dictionary": lambda repo: repo.save_compression_dictionary(b"dictionary", sample_count=1),
+    "set_board_active": lambda repo: repo.set_board_active(1, False),
+    "set_board_rate_burst": lambda repo: repo.set_board_rate_burst(1, 3),
+    "set_board_rate_bursts": lambda repo: repo.set_board_rate_bursts({1: 2, 2: 3}),
+    "set_membership_blocked": lambda repo: repo.set_membership_blocked(1, 1, True),
+    "set_user_selected_board": lambda repo: repo.set_user_selected_board(1, 2),
+    "stats": lambda repo: repo.stats(),
+    "sync_user": lambda repo: repo.sync_user(1, "renamed", None, None),
+    "sync_user_profile": lambda repo: repo.sync_user_profile(4, "new", None, None),
+    "update_board_rate_limit": lambda repo: repo.update_board_rate_limit(1, 60),
+    "update_boards": lambda repo: _update_boards(repo),
+    "write_audit": lambda repo: repo.write_audit(1, "board_create", "board", board_id=1),
+}
+
+# Full scans that are the point of the query, of the table or of a whole index;
+# move_archived_posts walks the partial archive queue index of posts in id order.
+# Anything else must search an index.
+INTENDED_SCANS: dict[str, set[str]] = {
+    # Whole-table aggregates: counters are recounted here, /stats reads stat_counters.
+    "count_stats": {"users", "boards", "posts", "posts_archive"},
+    "reconcile_stats": {"users", "boards", "posts", "posts_archive"},
+    "reconcile_board_counters": {"posts", "posts_archive"},
+    "stats": {"stat_counters"},
+    # One counter row per board; members are grouped over the board_id index.
+    "board_stats": {"board_post_counters", "board_memberships"},
+    "archive_size_report": {"posts_archive"},
+    # The board catalog and rate policies are loaded whole into process caches.
+    "list_boards": {"boards"},
+    "list_rate_bursts": {"board_rate_policies"},
+    # Startup sweep over memberships; the per-row lookups must still be indexed.
+    "backfill_board_states": {"board_memberships"},
+    # Newest or oldest rows in rowid order, stopped by LIMIT.
+    "sample_post_texts": {"posts"},
+    "move_legacy_audit_logs": {"audit_logs"},
+    "latest_compression_dictionary": {"compression_dictionaries"},
+    "move_archived_posts": {"compression_dictionaries", "posts"},
+    "recompress_archived_posts": {"compression_dictionaries"},
+}
+
+_EXPLAINED = re.compile(r"^\s*(SELECT|UPDATE|DELETE|INSERT\s+INTO\s+\S+\s*\([^)]*\)\s*SELECT|WITH)\b", re.IGNORECASE | re.DOTALL)
+_TABLE_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+def _audit_row() -> dict[str, Any]:
+    return {
+        "actor_user_id": 1,
+        "action": "board_create",
+        "target_type": "board",
+        "target_id": "1",
+        "board_id": 1,
+        "metadata_json": None,
+        "created_at": utc_now(),
+    }
+
+
+async def _archive_live_post(repo: Repository) -> None:
+    post = await repo.get_active_post(1, 1)
+    assert post is not None
+    await repo.archive_post(post)
+
+
+async def _queue_publish(repo: Repository) -> None:
+    post = await repo.get_active_post(1, 1)
+    assert post is not None
+    await repo.add_outbox_publish(post, "@first", replaces_message_id=4)
+
+
+async def _deliver_outbox(repo: Repository, outcome: str) -> None:
+    (entry,) = await repo.claim_due_outbox(utc_now(), 1, utc_now())
+    if outcome == "complete":
+        await repo.complete_outbox(entry, telegram_message_id=901)
+    elif outcome == "retry":
+        await repo.retry_outbox([entry], "timeout", utc_now() + timedelta(seconds=2))
+    else:
+        await repo.fail_outbox(entry, "chat not found")
+
+
+async def _update_boards(repo: Repository) -> None:
+    board = await repo.get_board(1)
+    assert board is not None
+    await repo.update_boards([(board, {"title": "Renamed", "is_active": False})])
+
+
+async def _page_audit_log(repo: Repository) -> None:
+    (first,) = await repo.list_audit_page({1}, limit=1)
+    await repo.list_audit_page({1}, AuditCursor(first.created_at, first.id), limit=5)
+    await repo.list_audit_page(None, AuditCursor(first.created_at, first.id), limit=5)
+
+
+async def _seed(repo: Repository) -> None:
+    for user_id in (1, 2, 3):
+        await repo.sync_user(user_id, f"user{user_id}", None, None)
+    await repo.create_board("First", "@first", 120, 300)
+    await repo.create_board("Second", "@second", 120, 300)
+    await repo.set_user_selected_board(1, 1)
+    await repo.ensure_membership(1, 1)
+    await repo.grant_board_admin(2, 1)
+    for message_id in range(1, 6):
+        await repo.create_post(1, 1, f"post {message_id}", telegram_message_id=message_id)
+    other = await repo.create_post(3, 2, "other board")
+    await repo.add_outbox_publish(other, "@second", replaces_message_id=100, status=OUTBOX_PENDING)
+    await repo.move_archived_posts(utc_now() + timedelta(seconds=1), limit=2)
+    await repo.save_compression_dictionary(b"post ", sample_count=5)
+    await repo.insert_audit_events([_audit_row() for _ in range(3)])
+    await repo.reconcile_stats()
+    await repo.reconcile_board_counters()
+    await repo.session.commit()
+
+
+@pytest.fixture
+async def engine() -> AsyncIterator[AsyncEngine]:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await _seed(Repository(session))
+    yield engine
+    await engine.dispose()
+
+
+def test_every_repository_method_has_a_plan_scenario() -> None:
+    methods = {
+        name
+        for name, member in inspect.getmembers(Repository, inspect.iscoroutinefunction)
+        if not name.startswith("_")
+    }
+    assert methods == set(SCENARIOS)
+    assert set(INTENDED_SCANS) <= methods
+
+
+@pytest.mark.parametrize("method", sorted(SCENARIOS))
+async def test_repository_queries_do_not_scan_tables(engine: AsyncEngine, method: str) -> None:
+    statements: list[tuple[str, Any]] = []
+
+    def capture(_conn: Any, _cursor: Any, statement: str, parameters: Any, _context: Any, executemany: bool) -> None:
+        if not executemany and _EXPLAINED.match(statement):
+            statements.append((statement, parameters))
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            await SCENARIOS[method](Repository(session))
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        tables = set(SQLModel.metadata.tables) | set(await Repository(session).list_audit_partitions())
+        connection = await session.connection()
+        scans: list[str] = []
+        for statement, parameters in statements:
+            plan = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            for row in plan:
+                scan = _TABLE_SCAN.match(row.detail)
+                # Subqueries and sqlite_master show up as SCAN too; only real tables count.
+                if scan is None or scan.group(1) not in tables:
+                    continue
+                if scan.group(1) not in INTENDED_SCANS.get(method, set()):
+                    scans.append(f"{row.detail} in: {' '.join(statement.split())}")
+        await session.rollback()
+
+    assert not scans, "\n".join(scans)
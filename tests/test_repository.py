@@ -1,91 +1,157 @@
 from __future__ import annotations
 
+import asyncio
 import json
 
-from app.config import get_settings
-from sqlmodel import SQLModel, Session, create_engine
-
-from app.db.models import AuditLog
-from app.db.repositories import Repository
-
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, delete, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-def make_repo() -> Repository:
-    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
-    SQLModel.metadata.create_all(engine)
-    session = Session(engine)
-    return Repository(session)
+from app.config import get_settings
+from app.db.models import StatCounter, UserBoardState
+from app.db.repositories import STAT_COUNTERS, NewBoard, Repository
 
 
-def test_create_board_slug_is_unique() -> None:
-    repo = make_repo()
-    first = repo.create_board("General Board", "@board1", 120, 300)
-    second = repo.create_board("General Board", "@board2", 120, 300)
+async def test_create_board_slug_is_unique(repo: Repository) -> None:
+    first = await repo.create_board("General Board", "@board1", 120, 300)
+    second = await repo.create_board("General Board", "@board2", 120, 300)
 
     assert first.slug == "general-board"
     assert second.slug.startswith("general-board-")
     assert first.slug != second.slug
 
 
-def test_selection_and_membership() -> None:
-    repo = make_repo()
-    repo.sync_user(100, "user", "First", "Last")
-    board = repo.create_board("Board", "@board", 120, 300)
+async def test_create_boards_allocates_slugs_in_one_query(repo: Repository) -> None:
+    await repo.create_board("News", "@news", 120, 300)
+    await repo.create_board("News", "@news2", 120, 300)
+    await repo.create_board("News digest", "@digest", 120, 300)
+    statements: list[str] = []
+    engine = repo.session.bind
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    boards = await repo.create_boards([NewBoard("News", f"@n{index}", 120, 300) for index in range(3)])
+
+    assert [board.slug for board in boards] == ["news-3", "news-4", "news-5"]
+    assert sum(statement.lstrip().startswith("SELECT boards.slug") for statement in statements) == 1
+    assert (await repo.stats())["boards_total"] == 6
+
+
+async def test_create_boards_retries_a_slug_taken_concurrently(repo: Repository, monkeypatch) -> None:
+    await repo.create_board("News", "@news", 120, 300)
+    taken_slugs = Repository._taken_slugs
+    stale_reads = iter([set()])
+
+    async def first_read_is_stale(self: Repository, bases: set[str]) -> set[str]:
+        return next(stale_reads, None) or await taken_slugs(self, bases)
+
+    monkeypatch.setattr(Repository, "_taken_slugs", first_read_is_stale)
+    board = await repo.create_board("News", "@other", 120, 300)
+
+    assert board.slug == "news-2"
+    assert (await repo.stats())["boards_total"] == 2
+
 
-    repo.set_user_selected_board(100, board.id)
-    selection = repo.get_user_selection(100)
-    membership = repo.ensure_membership(100, board.id)
+async def test_selection_and_membership(repo: Repository) -> None:
+    await repo.sync_user(100, "user", "First", "Last")
+    board = await repo.create_board("Board", "@board", 120, 300)
+
+    await repo.set_user_selected_board(100, board.id)
+    selection = await repo.get_user_selection(100)
+    membership = await repo.ensure_membership(100, board.id)
 
     assert selection is not None
     assert selection.board_id == board.id
     assert membership.is_blocked is False
 
 
-def test_admin_scope_checks() -> None:
-    repo = make_repo()
-    repo.sync_user(1, "super", "S", None)
-    repo.sync_user(2, "boardadmin", "B", None)
-    board_a = repo.create_board("A", "@a", 120, 300)
-    board_b = repo.create_board("B", "@b", 120, 300)
+async def test_admin_scope_checks(repo: Repository) -> None:
+    await repo.sync_user(1, "super", "S", None)
+    await repo.sync_user(2, "boardadmin", "B", None)
+    board_a = await repo.create_board("A", "@a", 120, 300)
+    board_b = await repo.create_board("B", "@b", 120, 300)
 
-    repo.grant_board_admin(2, board_a.id)
+    await repo.grant_board_admin(2, board_a.id)
 
-    assert repo.is_superadmin(1, {1}) is True
-    assert repo.is_board_admin(1, board_a.id, {1}) is True
-    assert repo.is_board_admin(2, board_a.id, set()) is True
-    assert repo.is_board_admin(2, board_b.id, set()) is False
+    assert await repo.is_superadmin(1, {1}) is True
+    assert await repo.is_board_admin(1, board_a.id, {1}) is True
+    assert await repo.is_board_admin(2, board_a.id, set()) is True
+    assert await repo.is_board_admin(2, board_b.id, set()) is False
 
 
-def test_single_active_post_archive_flow() -> None:
-    repo = make_repo()
-    repo.sync_user(10, "u", "U", None)
-    board = repo.create_board("Board", "@board", 120, 300)
+async def test_single_active_post_archive_flow(repo: Repository) -> None:
+    await repo.sync_user(10, "u", "U", None)
+    board = await repo.create_board("Board", "@board", 120, 300)
 
-    first = repo.create_post(10, board.id, "first", 111)
-    active = repo.get_active_post(10, board.id)
+    first = await repo.create_post(10, board.id, "first", 111)
+    active = await repo.get_active_post(10, board.id)
     assert active is not None
     assert active.id == first.id
 
-    repo.archive_post(first)
-    second = repo.create_post(10, board.id, "second", 222)
+    await repo.archive_post(first)
+    second = await repo.create_post(10, board.id, "second", 222)
 
-    active_after = repo.get_active_post(10, board.id)
+    active_after = await repo.get_active_post(10, board.id)
     assert active_after is not None
     assert active_after.id == second.id
     assert active_after.is_archived is False
 
 
-def test_manageable_boards_and_stats_are_scoped_in_db() -> None:
-    repo = make_repo()
-    repo.sync_user(1, "super", "S", None)
-    repo.sync_user(2, "moderator", "M", None)
-    board_a = repo.create_board("A", "@a", 120, 300)
-    board_b = repo.create_board("B", "@b", 120, 300)
-    repo.set_board_active(board_b.id, is_active=False)
-    repo.grant_board_admin(2, board_a.id)
-    repo.create_post(1, board_a.id, "hello", 101)
+async def test_board_state_follows_posts_and_blocks(repo: Repository) -> None:
+    await repo.sync_user(10, "u", "U", None)
+    board = await repo.create_board("Board", "@board", 120, 300)
+    await repo.ensure_membership(10, board.id)
+
+    first = await repo.create_post(10, board.id, "first", 111)
+    state = await repo.get_board_state(10, board.id)
+    assert state is not None
+    assert (state.active_post_id, state.active_message_id) == (first.id, 111)
+    assert state.last_posted_at == first.posted_at
+
+    second = await repo.create_post(10, board.id, "second", 222)
+    assert (state.active_post_id, state.active_message_id) == (second.id, 222)
+    await repo.session.refresh(first)
+    assert first.is_archived is True
+
+    await repo.archive_post(second)
+    assert state.active_post_id is None
+
+    await repo.set_membership_blocked(10, board.id, True)
+    assert state.is_blocked is True
+
 
-    manageable = repo.list_manageable_boards(2, set())
-    stats = repo.stats()
+async def test_backfill_board_states_from_memberships(repo: Repository) -> None:
+    await repo.sync_user(10, "u", "U", None)
+    board = await repo.create_board("Board", "@board", 120, 300)
+    board_id = board.id
+    await repo.ensure_membership(10, board_id)
+    post = await repo.create_post(10, board_id, "first", 111)
+    post_id = post.id
+    await repo.set_membership_blocked(10, board_id, True)
+    await repo.session.exec(delete(UserBoardState))
+    await repo.session.commit()
+
+    assert await repo.backfill_board_states() == 1
+    assert await repo.backfill_board_states() == 0
+
+    state = await repo.get_board_state(10, board_id)
+    assert state is not None
+    assert state.is_blocked is True
+    assert (state.active_post_id, state.active_message_id) == (post_id, 111)
+    assert state.last_posted_at is not None
+
+
+async def test_manageable_boards_and_stats_are_scoped_in_db(repo: Repository) -> None:
+    await repo.sync_user(1, "super", "S", None)
+    await repo.sync_user(2, "moderator", "M", None)
+    board_a = await repo.create_board("A", "@a", 120, 300)
+    board_b = await repo.create_board("B", "@b", 120, 300)
+    await repo.set_board_active(board_b.id, is_active=False)
+    await repo.grant_board_admin(2, board_a.id)
+    await repo.create_post(1, board_a.id, "hello", 101)
+
+    manageable = await repo.list_manageable_boards(2, set())
+    stats = await repo.stats()
 
     assert [board.id for board in manageable] == [board_a.id]
     assert stats == {
@@ -97,19 +163,79 @@ def test_manageable_boards_and_stats_are_scoped_in_db() -> None:
     }
 
 
-def test_audit_metadata_is_valid_json() -> None:
-    repo = make_repo()
-    repo.sync_user(1, "admin", "A", None)
-
-    item = repo.write_audit(
+async def test_stat_counters_follow_writes_and_reconcile(repo: Repository) -> None:
+    assert await repo.stats() == dict.fromkeys(STAT_COUNTERS, 0)
+
+    await repo.sync_user(1, "u", "U", None)
+    await repo.sync_user(1, "u2", "U", None)
+    board = await repo.create_board("A", "@a", 120, 300)
+    await repo.create_post(1, board.id, "first", 101)
+    second = await repo.create_post(1, board.id, "second", 102)
+    await repo.archive_post(second)
+    await repo.archive_post(second)
+    await repo.set_board_active(board.id, is_active=False)
+    await repo.set_board_active(board.id, is_active=False)
+
+    expected = {"users": 1, "boards_total": 1, "boards_active": 0, "posts_total": 2, "posts_active": 0}
+    assert await repo.stats() == expected
+    assert await repo.count_stats() == expected
+
+    await repo.session.exec(update(StatCounter).values(value=42))
+    assert await repo.reconcile_stats() == expected
+    assert await repo.stats() == expected
+
+
+async def test_upserts_from_two_sessions_share_one_row(tmp_path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'upsert.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        setup = Repository(session)
+        await setup.sync_user(1, "u", "U", None)
+        board_id = (await setup.create_board("Board", "@board", 120, 300)).id
+        await session.commit()
+    both_checked = asyncio.Barrier(2)
+
+    async def handle(blocked: bool | None) -> int:
+        async with AsyncSession(engine) as session:
+            repo = Repository(session)
+            assert await repo.get_board_state(1, board_id) is None
+            # Both handlers saw no membership before either of them wrote one.
+            await both_checked.wait()
+            if blocked is None:
+                membership = await repo.ensure_membership(1, board_id)
+            else:
+                membership = await repo.set_membership_blocked(1, board_id, blocked)
+            membership_id = membership.id
+            await repo.set_user_selected_board(1, board_id)
+            await repo.sync_user(1, "u", "U", None)
+            await session.commit()
+            return membership_id
+
+    created_id, blocked_id = await asyncio.gather(handle(None), handle(True))
+
+    assert created_id == blocked_id
+    async with AsyncSession(engine) as session:
+        repo = Repository(session)
+        state = await repo.get_board_state(1, board_id)
+        assert state is not None and state.is_blocked is True
+        assert (await repo.get_user_selection(1)).board_id == board_id
+        assert (await repo.stats())["users"] == 1
+    await engine.dispose()
+
+
+async def test_audit_metadata_is_valid_json(repo: Repository) -> None:
+    await repo.sync_user(1, "admin", "A", None)
+
+    item = await repo.write_audit(
         actor_user_id=1,
         action="board_create",
         target_type="board",
         metadata={"title": "Board", "channel_id": "@board"},
     )
 
-    stored = repo.session.get(AuditLog, item.id)
-    assert stored is not None
+    (stored,) = await repo.list_audit_page(None)
+    assert stored.id == item.id
     assert json.loads(stored.metadata_json or "{}") == {"channel_id": "@board", "title": "Board"}
 
 
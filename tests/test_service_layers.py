@@ -1,34 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import replace
+
+import pytest
 from aiogram.types import User as TelegramUser
-from sqlmodel import SQLModel, Session, create_engine
+from sqlalchemy import event
 
 from app.config import Settings
-from app.db.repositories import Repository
-from app.services.admin import AdminAccessService, AdminBoardService, AdminContext, AdminModerationService, AdminRoleService
+from app.db.repositories import BoardStats, Repository
+from app.locales.messages import admin_stats_text, board_stats_text, t
+from app.services.admin import (
+    AdminAccessService,
+    AdminBoardService,
+    AdminContext,
+    AdminModerationService,
+    AdminRoleService,
+    board_stats_cache,
+    permissions_cache,
+)
+from app.services.boards import BoardCatalog, BoardSnapshot, board_catalog
+from app.services.outbound import OutboundStats
+from app.services.rate_limit import RateLimiter, rebuild_rate_limiter
 from app.services.user import UserService
-
-
-def make_repo() -> Repository:
-    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
-    SQLModel.metadata.create_all(engine)
-    session = Session(engine)
-    return Repository(session)
+from app.services.users import sync_telegram_user, user_sync_cache
 
 
 def make_tg_user(user_id: int, username: str = "user") -> TelegramUser:
     return TelegramUser(id=user_id, is_bot=False, first_name="Test", username=username)
 
 
-def test_user_service_returns_board_picker_view_and_selects_board() -> None:
-    repo = make_repo()
-    repo.create_board("Alpha", "@alpha", 120, 300)
-    target_board = repo.create_board("Beta", "@beta", 120, 300)
+async def test_user_service_returns_board_picker_view_and_selects_board(repo: Repository) -> None:
+    await repo.create_board("Alpha", "@alpha", 120, 300)
+    target_board = await repo.create_board("Beta", "@beta", 120, 300)
     assert target_board.id is not None
     service = UserService(repo=repo, tg_user=make_tg_user(100))
 
-    selected_board = service.select_board(target_board.id)
-    board_picker = service.board_picker_view()
+    selected_board = await service.select_board(target_board.id)
+    board_picker = await service.board_picker_view()
 
     assert selected_board is not None
     assert selected_board.id == target_board.id
@@ -36,26 +45,24 @@ def test_user_service_returns_board_picker_view_and_selects_board() -> None:
     assert board_picker.selected_board_id == target_board.id
 
 
-def test_admin_access_service_exposes_active_and_inactive_manageable_boards() -> None:
-    repo = make_repo()
-    repo.sync_user(1, "admin", "A", None)
-    active_board = repo.create_board("Active", "@active", 120, 300)
-    inactive_board = repo.create_board("Inactive", "@inactive", 120, 300)
+async def test_admin_access_service_exposes_active_and_inactive_manageable_boards(repo: Repository) -> None:
+    await repo.sync_user(1, "admin", "A", None)
+    active_board = await repo.create_board("Active", "@active", 120, 300)
+    inactive_board = await repo.create_board("Inactive", "@inactive", 120, 300)
     assert inactive_board.id is not None
     assert active_board.id is not None
-    repo.set_board_active(inactive_board.id, is_active=False)
-    repo.grant_board_admin(1, active_board.id)
+    await repo.set_board_active(inactive_board.id, is_active=False)
+    await repo.grant_board_admin(1, active_board.id)
     settings = Settings.model_construct(superadmin_ids=[])
     context = AdminContext(repo=repo, settings=settings, tg_user=make_tg_user(1, "admin"))
     service = AdminAccessService(context)
 
-    assert [board.id for board in service.active_manageable_boards()] == [active_board.id]
-    assert [board.id for board in service.inactive_manageable_boards()] == []
+    assert [board.id for board in await service.active_manageable_boards()] == [active_board.id]
+    assert [board.id for board in await service.inactive_manageable_boards()] == []
 
 
-def test_admin_board_role_and_moderation_services_handle_single_use_cases() -> None:
-    repo = make_repo()
-    repo.sync_user(1, "admin", "A", None)
+async def test_admin_board_role_and_moderation_services_handle_single_use_cases(repo: Repository) -> None:
+    await repo.sync_user(1, "admin", "A", None)
     settings = Settings.model_construct(
         superadmin_ids=[],
         default_rate_limit_seconds=120,
@@ -66,22 +73,291 @@ def test_admin_board_role_and_moderation_services_handle_single_use_cases() -> N
     roles = AdminRoleService(context)
     moderation = AdminModerationService(context)
 
-    board = boards.create_board("Board", "@board")
+    board = await boards.create_board("Board", "@board")
     assert board.id is not None
 
-    granted_board = roles.grant_board_admin(target_user_id=2, board_id=board.id)
-    blocked_board = moderation.block_user(target_user_id=3, board_id=board.id)
-    archived_board = boards.archive_board(board.id)
+    granted_board = await roles.grant_board_admin(target_user_id=2, board_id=board.id)
+    blocked_board = await moderation.block_user(target_user_id=3, board_id=board.id)
+    archived_board = await boards.archive_board(board.id)
     assert archived_board is not None
     assert archived_board.is_active is False
 
-    activated_board = boards.activate_board(board.id)
+    activated_board = await boards.activate_board(board.id)
     assert activated_board is not None
     assert activated_board.is_active is True
 
-    updated_board = boards.update_rate_limit(board.id, 90)
+    updated_board = await boards.update_rate_limit(board.id, 90)
 
     assert granted_board is not None
     assert blocked_board is not None
     assert updated_board is not None
     assert updated_board.rate_limit_seconds == 90
+
+
+async def test_user_sync_cache_skips_unchanged_profiles(repo: Repository) -> None:
+    await sync_telegram_user(repo, make_tg_user(5, "first"))
+    await repo.session.commit()
+
+    await sync_telegram_user(repo, make_tg_user(5, "first"))
+    await sync_telegram_user(repo, make_tg_user(5, "renamed"))
+    await repo.session.commit()
+
+    stored = await repo.get_user(5)
+    assert stored is not None
+    assert stored.username == "renamed"
+    assert user_sync_cache.stats() == {"hits": 1, "misses": 2, "writes": 2, "size": 1}
+    assert t("admin_user_sync_stats", **user_sync_cache.stats()) == (
+        "Кэш профилей: 1 пользователей, без обращения к базе 1, с проверкой в базе 2, из них обновлено 2"
+    )
+
+
+def test_stats_screen_lists_counters_queues_caches_and_boards() -> None:
+    counters = dict.fromkeys(
+        ("users", "boards_total", "boards_active", "posts_total", "posts_active"), 1
+    )
+    board = BoardSnapshot(
+        id=1,
+        slug="b",
+        title="Board",
+        channel_id="@b",
+        is_active=True,
+        rate_limit_seconds=60,
+        max_text_length=300,
+    )
+    outbound = OutboundStats(
+        queued=0, queued_publishes=0, sent=0, retried=0, wait_avg_seconds=0.0, wait_max_seconds=0.0
+    )
+    user_sync = {"hits": 0, "misses": 0, "writes": 0, "size": 0}
+    details = [(board, BoardStats(board_id=1, posts=2))]
+
+    text = admin_stats_text(counters, details, outbound, user_sync)
+
+    lines = text.split("\n")
+    assert t("admin_stats", **counters) in text
+    assert t("admin_user_sync_stats", **user_sync) in lines
+    outbound_line = t(
+        "admin_outbound_stats", queued=0, queued_publishes=0, wait_avg=0.0, wait_max=0.0, retried=0
+    )
+    assert any(line.startswith(outbound_line) for line in lines)
+    assert text.endswith(board_stats_text(details))
+
+
+async def test_admin_access_checks_share_one_role_query(repo: Repository) -> None:
+    board_a = await repo.create_board("A", "@a", 120, 300)
+    board_b = await repo.create_board("B", "@b", 120, 300)
+    await repo.grant_board_admin(7, board_a.id)
+    settings = Settings.model_construct(superadmin_ids=[])
+    service = AdminAccessService(AdminContext(repo=repo, settings=settings, tg_user=make_tg_user(7)))
+    role_queries: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        if "admin_roles" in statement:
+            role_queries.append(statement)
+
+    sync_engine = repo.session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert await service.ensure_any_admin() is True
+        assert await service.ensure_superadmin() is False
+        assert await service.can_manage_board(board_a.id) is True
+        assert await service.can_manage_board(board_b.id) is False
+        assert [board.id for board in await service.manageable_boards()] == [board_a.id]
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    assert len(role_queries) == 1
+
+
+async def test_role_cache_is_invalidated_by_grants(repo: Repository) -> None:
+    board = await repo.create_board("Board", "@board", 120, 300)
+    board_id = board.id
+    assert board_id is not None
+    await repo.sync_user(1, "admin", "A", None)
+    settings = Settings.model_construct(superadmin_ids=[1])
+
+    def context_for(user_id: int) -> AdminContext:
+        return AdminContext(repo=repo, settings=settings, tg_user=make_tg_user(user_id))
+
+    assert await AdminAccessService(context_for(9)).can_manage_board(board_id) is False
+    assert permissions_cache.get(9) is not None
+
+    await AdminRoleService(context_for(1)).grant_board_admin(target_user_id=9, board_id=board_id)
+    await repo.session.commit()
+
+    assert permissions_cache.get(9) is None
+    assert await AdminAccessService(context_for(9)).can_manage_board(board_id) is True
+
+
+async def test_board_catalog_is_rebuilt_after_board_mutations(repo: Repository) -> None:
+    await repo.sync_user(1, "admin", "A", None)
+    settings = Settings.model_construct(
+        superadmin_ids=[1],
+        default_rate_limit_seconds=120,
+        default_max_text_length=300,
+    )
+    boards = AdminBoardService(AdminContext(repo=repo, settings=settings, tg_user=make_tg_user(1, "admin")))
+
+    await boards.create_board("Alpha", "@alpha")
+    await repo.session.commit()
+    assert [board.title for board in await board_catalog.active_boards(repo)] == ["Alpha"]
+    version = board_catalog.version
+
+    beta = await boards.create_board("Beta", "@beta")
+    beta_id = beta.id
+    assert beta_id is not None
+    await boards.archive_board(beta_id)
+    await repo.session.commit()
+
+    assert board_catalog.version > version
+    assert [board.title for board in await board_catalog.active_boards(repo)] == ["Alpha"]
+    archived = await board_catalog.get(repo, beta_id)
+    assert archived is not None
+    assert archived.is_active is False
+
+
+async def test_board_catalog_sees_changes_of_other_processes_after_its_ttl(
+    repo: Repository, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    now = 1000.0
+    monkeypatch.setattr("app.services.boards.time.monotonic", lambda: now)
+    catalog = BoardCatalog(ttl=60)
+    board = await repo.create_board("Alpha", "@alpha", 120, 300)
+    assert (await catalog.get(repo, board.id)) is not None
+
+    # Another process renames the board; nothing invalidates this catalog.
+    await repo.update_boards([(board, {"title": "Renamed"})])
+    now += 59
+    assert catalog.peek(board.id) == await catalog.get(repo, board.id)
+    assert catalog.peek(board.id).title == "Alpha"
+
+    now += 1
+    assert catalog.peek(board.id) is None
+    assert (await catalog.get(repo, board.id)).title == "Renamed"
+
+
+def test_rate_limiter_allows_bursts_and_refills_one_token_per_interval() -> None:
+    limiter = RateLimiter(maxsize=10)
+    board = BoardSnapshot(
+        id=1,
+        slug="b",
+        title="B",
+        channel_id="@b",
+        is_active=True,
+        rate_limit_seconds=60,
+        max_text_length=300,
+        rate_limit_burst=2,
+    )
+
+    assert limiter.try_acquire(100, board, now=0)
+    assert limiter.try_acquire(100, board, now=1)
+    assert not limiter.try_acquire(100, board, now=2)
+    assert limiter.retry_after(100, board, now=30) == pytest.approx(30)
+
+    limiter.refund(100, board)
+    assert limiter.try_acquire(100, board, now=31)
+    assert limiter.try_acquire(100, board, now=91)
+    # Another user and another board have their own buckets.
+    assert limiter.try_acquire(200, board, now=91)
+
+
+def test_rate_limiter_caps_a_missing_bucket_at_the_last_stored_post() -> None:
+    limiter = RateLimiter(maxsize=1)
+    board = BoardSnapshot(
+        id=1,
+        slug="b",
+        title="B",
+        channel_id="@b",
+        is_active=True,
+        rate_limit_seconds=60,
+        max_text_length=300,
+        rate_limit_burst=1,
+    )
+    assert limiter.try_acquire(100, board, now=0)
+    # Another user evicts the bucket, as a second worker process never had it.
+    assert limiter.try_acquire(200, board, now=1)
+
+    assert not limiter.try_acquire(100, board, now=4, last_posted_at=0)
+    assert limiter.try_acquire(100, board, now=60, last_posted_at=0)
+
+    burst = replace(board, id=2, rate_limit_burst=3)
+    # One post leaves at most burst - 1 tokens, even in an unknown bucket.
+    assert limiter.try_acquire(100, burst, now=10, last_posted_at=9)
+    assert limiter.try_acquire(100, burst, now=11, last_posted_at=10)
+    assert not limiter.try_acquire(100, burst, now=12, last_posted_at=11)
+
+
+async def test_rate_limiter_is_rebuilt_from_recent_posts(repo: Repository) -> None:
+    board = await repo.create_board("Board", "@board", 120, 300)
+    other = await repo.create_board("Other", "@other", 120, 300)
+    board_id, other_id = board.id, other.id
+    await repo.set_board_rate_burst(other_id, 2)
+    for user_id in (100, 200, 300):
+        await repo.sync_user(user_id, None, "Test", None)
+    await repo.grant_board_admin(200, board_id)
+    await repo.create_post(100, board_id, "recent", telegram_message_id=1)
+    await repo.create_post(200, board_id, "admin", telegram_message_id=2)
+    await repo.create_post(100, other_id, "within burst", telegram_message_id=3)
+    await repo.session.commit()
+
+    limiter = RateLimiter(maxsize=10)
+    replayed = await rebuild_rate_limiter(repo, {300}, limiter)
+    board_snapshot = await board_catalog.get(repo, board_id)
+    other_snapshot = await board_catalog.get(repo, other_id)
+    assert board_snapshot is not None and other_snapshot is not None
+
+    assert replayed == 2
+    assert other_snapshot.rate_limit_burst == 2
+    assert limiter.retry_after(100, board_snapshot) > 0
+    assert limiter.retry_after(100, other_snapshot) == 0
+    assert limiter.retry_after(200, board_snapshot) == 0
+
+
+async def test_board_stats_are_grouped_scoped_and_computed_once(repo: Repository) -> None:
+    board_a = await repo.create_board("A", "@a", 120, 300)
+    board_b = await repo.create_board("B", "@b", 120, 300)
+    board_a_id, board_b_id = board_a.id, board_b.id
+    for user_id in (1, 2, 3):
+        await repo.sync_user(user_id, None, "Test", None)
+    await repo.grant_board_admin(7, board_a_id)
+    await repo.ensure_membership(1, board_a_id)
+    await repo.set_membership_blocked(2, board_a_id, True)
+    await repo.create_post(1, board_a_id, "first", 101)
+    await repo.create_post(1, board_a_id, "second", 102)
+    await repo.create_post(3, board_b_id, "other", 103)
+    await repo.session.commit()
+
+    settings = Settings.model_construct(superadmin_ids=[])
+    service = AdminBoardService(AdminContext(repo=repo, settings=settings, tg_user=make_tg_user(7)))
+    # Warm the role cache and the board catalog so only the stats load is shared.
+    await service.context.permissions()
+    await board_catalog.all_boards(repo)
+
+    stats_queries: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        if "board_post_counters" in statement:
+            stats_queries.append(statement)
+
+    sync_engine = repo.session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        results = await asyncio.gather(*(service.board_stats() for _ in range(10)))
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    assert len(stats_queries) == 1
+    assert board_stats_cache.loads == 1
+    for result in results:
+        assert [(board.id, stats) for board, stats in result] == [
+            (
+                board_a_id,
+                BoardStats(
+                    board_id=board_a_id,
+                    posts=2,
+                    active_posts=1,
+                    members=2,
+                    blocked_members=1,
+                    posts_24h=2,
+                ),
+            )
+        ]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.config import Settings
+from app.webhook import QueuedRequestHandler, build_webhook_app
+
+SECRET = "webhook-secret"
+
+
+def update(update_id: int) -> dict[str, object]:
+    return {
+        "update_id": update_id,
+        "message": {"message_id": update_id, "date": 0, "chat": {"id": 1, "type": "private"}, "text": "hi"},
+    }
+
+
+@pytest.fixture
+def processing() -> tuple[Dispatcher, asyncio.Event, list[int]]:
+    dispatcher = Dispatcher()
+    release = asyncio.Event()
+    handled: list[int] = []
+
+    @dispatcher.message()
+    async def handle(message: Message) -> None:
+        await release.wait()
+        handled.append(message.message_id)
+
+    return dispatcher, release, handled
+
+
+@pytest.fixture
+async def webhook(
+    processing: tuple[Dispatcher, asyncio.Event, list[int]],
+) -> AsyncIterator[tuple[TestClient, QueuedRequestHandler]]:
+    dispatcher, _, _ = processing
+    settings = Settings.model_construct(
+        webhook_path="/webhook", webhook_secret=SECRET, webhook_workers=1, webhook_queue_size=1
+    )
+    app, handler = build_webhook_app(dispatcher, Bot("42:TEST"), settings)
+    async with TestClient(TestServer(app)) as client:
+        handler.start()
+        yield client, handler
+
+
+async def test_requests_without_the_secret_are_refused(
+    webhook: tuple[TestClient, QueuedRequestHandler],
+) -> None:
+    client, _ = webhook
+    response = await client.post("/webhook", json=update(1), headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+
+    assert response.status == 401
+
+
+async def test_updates_are_acknowledged_before_they_are_processed(
+    webhook: tuple[TestClient, QueuedRequestHandler], processing: tuple[Dispatcher, asyncio.Event, list[int]]
+) -> None:
+    client, handler = webhook
+    _, release, handled = processing
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+
+    first = await client.post("/webhook", json=update(1), headers=headers)
+    await asyncio.sleep(0.01)
+    # The only worker is busy and the queue holds one more; a third is refused for redelivery.
+    second = await client.post("/webhook", json=update(2), headers=headers)
+    third = await client.post("/webhook", json=update(3), headers=headers)
+
+    assert [first.status, second.status, third.status] == [200, 200, 503]
+    assert handled == []
+    release.set()
+    await asyncio.wait_for(handler.join(), timeout=1)
+    assert handled == [1, 2]